@@ -0,0 +1,34 @@
+"""
+Measures how many events per second can be created and cloned.
+
+    python benchmarks/event_throughput.py [events]
+"""
+
+import sys
+from time import time
+
+from compysition.event import Event, JSONEvent, LogEvent
+
+
+def rate(function, events):
+    start = time()
+    for i in xrange(events):
+        function()
+    return events / (time() - start)
+
+
+def main(events=100000):
+    event = JSONEvent(data={"foo": "bar"}, custom="value")
+    cases = [("Event()", lambda: Event()),
+             ("Event(custom kwargs)", lambda: Event(service="test", priority=1, custom="value")),
+             ("JSONEvent(data)", lambda: JSONEvent(data={"foo": "bar"})),
+             ("LogEvent", lambda: LogEvent(20, "actor", "message")),
+             ("cow_clone", event.cow_clone)]
+
+    for name, function in cases:
+        rate(function, events / 10)
+        print("{0:<24} {1:>12.0f} events/s".format(name, max(rate(function, events) for i in xrange(3))))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
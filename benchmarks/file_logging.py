@@ -0,0 +1,49 @@
+"""
+Measures the log lines/sec ceiling of FileLogger, with the stdlib logging handler (per event and per batch) and in buffered mode.
+Every case writes the same lines to a new file in a temporary directory, including the final flush.
+
+    python benchmarks/file_logging.py [lines]
+"""
+
+import logging
+import shutil
+import sys
+import tempfile
+from time import time
+
+from compysition.actors import FileLogger
+from compysition.event import LogEvent
+
+
+def run(lines, batch_size=1, **kwargs):
+    directory = tempfile.mkdtemp()
+    try:
+        actor = FileLogger("file_logger", directory=directory, default_filename="{0}.log".format(time()), **kwargs)
+        events = [LogEvent(logging.INFO, "http_server", "Received POST request for service orders", id="a1b2c3d4e5f6")
+                  for _ in xrange(batch_size)]
+
+        start = time()
+        for _ in xrange(lines / batch_size):
+            if batch_size > 1:
+                actor.consume_batch(events)
+            else:
+                actor.consume(events[0])
+        actor.post_hook()
+        return lines / (time() - start)
+    finally:
+        shutil.rmtree(directory)
+
+
+def main(lines=200000):
+    cases = (("logging handler, per event", {}),
+             ("logging handler, batch of 100", {"batch_size": 100}),
+             ("buffered, per event", {"buffered": True}),
+             ("buffered, batch of 100", {"batch_size": 100, "buffered": True}))
+
+    print("{0:<32} {1:>12}".format("mode", "lines/s"))
+    for name, kwargs in cases:
+        print("{0:<32} {1:>12.0f}".format(name, run(lines, **kwargs)))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
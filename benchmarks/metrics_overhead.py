@@ -0,0 +1,43 @@
+"""
+Measures the overhead of metrics collection on the consume and send path of an actor.
+
+    python benchmarks/metrics_overhead.py [events]
+"""
+
+import sys
+from time import time
+
+from compysition.actor import Actor
+from compysition.event import Event
+from compysition.metrics import MetricsRegistry
+from compysition.testutils.test_actor import TestActorWrapper
+
+
+class Passthrough(Actor):
+
+    def consume(self, event, *args, **kwargs):
+        self.send_event(event)
+
+
+def run(events, registry):
+    actor = TestActorWrapper(Passthrough("passthrough", metrics=registry))
+    start = time()
+    for i in xrange(events):
+        actor.input = Event(data=str(i))
+    for i in xrange(events):
+        actor.output
+    return time() - start
+
+
+def main(events=20000):
+    run(1000, MetricsRegistry())
+    disabled = min(run(events, MetricsRegistry(enabled=False)) for i in xrange(3))
+    enabled = min(run(events, MetricsRegistry()) for i in xrange(3))
+    print("{events} events".format(events=events))
+    print("metrics disabled: {0:.0f} events/s".format(events / disabled))
+    print("metrics enabled:  {0:.0f} events/s".format(events / enabled))
+    print("overhead:         {0:.1f}%".format((enabled - disabled) / disabled * 100))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,62 @@
+"""
+Compares RedactedFileLogger redaction with the previous implementation (re.sub with every pattern string in turn) for 30 PII
+patterns, on log messages without and with sensitive data.
+
+    python benchmarks/redaction.py [seconds per case]
+"""
+
+import logging
+import re
+import sys
+from time import time
+
+from compysition.actors import RedactedFileLogger
+from compysition.event import LogEvent
+
+FIELDS = ["first_name", "last_name", "middle_name", "ssn", "dob", "email", "phone", "mobile", "street", "city", "zip",
+          "account_number", "routing_number", "card_number", "cvv", "expiration", "password", "pin", "license", "passport",
+          "tax_id", "salary", "employer", "mother_maiden_name", "security_answer", "ip_address", "device_id", "username",
+          "member_id", "policy_number"]
+PATTERNS = ["<{0}>(.*?)</{0}>".format(field) for field in FIELDS]
+
+MESSAGES = (("no match", "Received POST request for service orders. Queue size is 12"),
+            ("XML, no match", "Out: <order><id>12</id><items>{0}</items></order>".format("<item sku='a'>1</item>" * 50)),
+            ("XML, 3 matches", "Out: <person><first_name>John</first_name><ssn>123-45-6789</ssn><email>j@example.com</email>"
+                               "</person>{0}".format("<item sku='a'>1</item>" * 50)))
+
+
+def previous(message):
+    def redact_message(match_object):
+        return match_object.group(0).replace(match_object.group(1), 'REDACTED')
+
+    for pattern in PATTERNS:
+        message = re.sub(pattern, redact_message, message)
+    return message
+
+
+def rate(function, duration):
+    count = 0
+    start = time()
+    while time() - start < duration:
+        function()
+        count += 1
+    return count / (time() - start)
+
+
+def main(duration=1.0):
+    actor = RedactedFileLogger("redacted", PATTERNS)
+    print("{0:<16} {1:>14} {2:>14} {3:>9}".format("message", "previous/s", "compiled/s", "speedup"))
+    for name, message in MESSAGES:
+        event = LogEvent(logging.INFO, "actor", message)
+        assert actor._process_redaction(LogEvent(logging.INFO, "actor", message)).message == previous(message)
+
+        def current():
+            event.message = message
+            actor._process_redaction(event)
+
+        old, new = rate(lambda: previous(message), duration), rate(current, duration)
+        print("{0:<16} {1:>14.0f} {2:>14.0f} {3:>8.1f}x".format(name, old, new, new / old))
+
+
+if __name__ == "__main__":
+    main(*[float(arg) for arg in sys.argv[1:]])
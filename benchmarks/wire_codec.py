@@ -0,0 +1,49 @@
+"""
+Compares BinaryCodec with PickleCodec (the previous wire format) by throughput and bytes on the wire.
+
+    python benchmarks/wire_codec.py [seconds per case]
+"""
+
+import sys
+from time import time
+
+from compysition.codec import BinaryCodec, PickleCodec
+from compysition.event import JSONEvent, XMLEvent, JSONHttpEvent
+
+
+def rate(function, duration):
+    function()
+    count = 0
+    start = time()
+    while time() - start < duration:
+        function()
+        count += 1
+    return count / (time() - start)
+
+
+def events():
+    record = {"id": 1, "name": "Customer", "tags": ["a", "b", "c"], "address": {"street": "Main Street", "city": "Springfield"}}
+    yield "JSONEvent small", JSONEvent(data=record)
+    yield "JSONEvent 100KB", JSONEvent(data={"records": [record] * 1000})
+    yield "XMLEvent 100KB", XMLEvent(data="<records>{0}</records>".format("<record id='1'><name>Customer</name></record>" * 2200))
+    yield "JSONHttpEvent", JSONHttpEvent(data=record, headers={"Content-Type": "application/json"}, accept="application/json")
+
+
+def main(duration=1.0):
+    codecs = (("pickle", PickleCodec()), ("binary", BinaryCodec()))
+    print("{0:<18} {1:<7} {2:>10} {3:>14} {4:>14} {5:>20}".format("event", "codec", "bytes", "encode/s", "decode/s",
+                                                                 "decode+data/s"))
+    for name, event in events():
+        for codec_name, codec in codecs:
+            frames = codec.encode(event)
+
+            def decode_and_access():
+                codec.decode(frames).data
+
+            print("{0:<18} {1:<7} {2:>10} {3:>14.0f} {4:>14.0f} {5:>20.0f}".format(
+                name, codec_name, sum(len(frame) for frame in frames), rate(lambda: codec.encode(event), duration),
+                rate(lambda: codec.decode(frames), duration), rate(decode_and_access, duration)))
+
+
+if __name__ == "__main__":
+    main(*[float(arg) for arg in sys.argv[1:]])
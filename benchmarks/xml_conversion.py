@@ -0,0 +1,69 @@
+"""
+Compares the direct lxml <-> dict converter with the previous xmltodict path (serialize, then parse again) on 1KB, 100KB and 10MB
+documents.
+
+    python benchmarks/xml_conversion.py
+"""
+
+from time import time
+
+import xmltodict
+from lxml import etree
+from xml.parsers import expat
+
+from compysition.conversion import element_to_dict, dict_to_element
+from compysition.event import internal_xmlify, remove_internal_xmlify
+
+RECORD = ("<record id='{0}' type='order'><name>Customer {0}</name><address><street>{0} Main Street</street><city>Springfield</city>"
+          "</address><items><item sku='a'>1</item><item sku='b'>2</item></items><note>Some &amp; text</note></record>")
+
+
+def document(size):
+    records = []
+    length = 0
+    index = 0
+    while length < size:
+        record = RECORD.format(index)
+        records.append(record)
+        length += len(record)
+        index += 1
+    return etree.fromstring("<records>{0}</records>".format("".join(records)))
+
+
+def best(function, argument, duration=1.0):
+    function(argument)
+    best_time = None
+    runs = 0
+    started = time()
+    while runs < 3 or time() - started < duration:
+        start = time()
+        function(argument)
+        elapsed = time() - start
+        best_time = elapsed if best_time is None else min(best_time, elapsed)
+        runs += 1
+    return best_time
+
+
+def xmltodict_parse(element):
+    return remove_internal_xmlify(xmltodict.parse(etree.tostring(element), expat=expat))
+
+
+def xmltodict_unparse(data):
+    return etree.fromstring(xmltodict.unparse(internal_xmlify(data)).encode("utf-8"))
+
+
+def main():
+    print("{0:<8} {1:<12} {2:>14} {3:>14} {4:>9}".format("size", "direction", "xmltodict ms", "direct ms", "speedup"))
+    for label, size in (("1KB", 1024), ("100KB", 100 * 1024), ("10MB", 10 * 1024 * 1024)):
+        element = document(size)
+        data = remove_internal_xmlify(element_to_dict(element))
+        cases = (("xml->dict", xmltodict_parse, lambda element: remove_internal_xmlify(element_to_dict(element)), element),
+                 ("dict->xml", xmltodict_unparse, lambda data: dict_to_element(internal_xmlify(data)), data))
+        for direction, old, new, argument in cases:
+            old_time, new_time = best(old, argument), best(new, argument)
+            print("{0:<8} {1:<12} {2:>14.3f} {3:>14.3f} {4:>8.1f}x".format(label, direction, old_time * 1000, new_time * 1000,
+                                                                        old_time / new_time))
+
+
+if __name__ == "__main__":
+    main()
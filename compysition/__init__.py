@@ -24,6 +24,8 @@
 from actor import Actor
 from queue import Queue
 from queue import QueuePool
+from queue import SpillQueue
+from queue import PriorityLaneQueue
 from logger import Logger
 from director import Director
 from event import Event
@@ -27,13 +27,30 @@ from compysition.logger import Logger
 from compysition.errors import *
 from restartlet import RestartPool
 from compysition.event import Event
-from gevent import sleep
+from compysition.scheduler import RetryScheduler
+from compysition.metrics import MetricsRegistry
+from gevent import sleep, getcurrent
 from gevent.event import Event as GEvent
 from copy import deepcopy
+from time import time
 import traceback
+import logging
+import random
 import abc
 
 
+class _WorkerGroup(object):
+    '''The worker greenlets consuming from a single inbound queue of an actor'''
+
+    __slots__ = ("consumer", "function", "size", "idle")
+
+    def __init__(self, consumer, function):
+        self.consumer = consumer
+        self.function = function
+        self.size = 0
+        self.idle = 0
+
+
 class Actor(object):
     """
     The actor class is the abstract base class for all implementing compysition actors.
@@ -45,12 +62,16 @@ class Actor(object):
     __metaclass__ = abc.ABCMeta
 
     DEFAULT_EVENT_SERVICE = "default"
+    DEFAULT_CONCURRENCY = 250
+    RESCUE_JITTER = 0.5
     input = Event
     output = Event
     REQUIRED_EVENT_ATTRIBUTES = None
     __NOT_DEFINED = object()
 
-    def __init__(self, name, size=0, blocking_consume=False, rescue=False, max_rescue=5, *args, **kwargs):
+    def __init__(self, name, size=0, blocking_consume=False, rescue=False, max_rescue=5, rescue_delay=1, max_rescue_delay=60,
+                 retry_scheduler=None, eager_copy=False, concurrency=None, batch_size=1, max_linger_ms=0, high_watermark=None,
+                 low_watermark=None, metrics=None, tracer=None, flight_recorder=None, log_rate_limiter=None, *args, **kwargs):
         """
         **Base class for all compysition actors**
 
@@ -61,18 +82,78 @@ class Actor(object):
             size (Optional[int]):
                 | The max amount of events any outbound queue connected to this actor may contain. A value of 0 represents an infinite qsize
                 | (Default: 0)
+            high_watermark (Optional[int]):
+                | The amount of events at which an outbound queue created by this actor becomes throttled. Sending to a throttled
+                | queue blocks until it has drained to low_watermark. A value of None uses 'size'
+                | (Default: None)
+            low_watermark (Optional[int]):
+                | The amount of events a throttled outbound queue must drain to before sending resumes
+                | (Default: high_watermark / 2)
             blocking_consume (Optional[bool]):
-                | Define if this module should spawn a greenlet for every single 'consume' execution, or if
-                | it should execute 'consume' and block until that 'consume' is complete. This is usually
-                | only necessary if executing work on an event in the order that it was received is critical.
+                | Define if this module should execute 'consume' and block until that 'consume' is complete before
+                | taking the next event off of an inbound queue. This is usually only necessary if executing work on an event
+                | in the order that it was received is critical. This is equivalent to a concurrency of 1
+                | (Default: False)
+            concurrency (Optional[int]):
+                | The maximum number of long-lived worker greenlets that consume events from each inbound queue. This bounds the
+                | amount of events that may be in progress on this actor at any given time. A single worker is started per queue,
+                | and another is added whenever an event is taken while no other worker is idle. Ignored if blocking_consume is True
+                | (Default: Actor.DEFAULT_CONCURRENCY)
+            batch_size (Optional[int]):
+                | If greater than 1, events are taken from each inbound queue in lists of up to this many events and passed to
+                | 'consume_batch' instead of 'consume'
+                | (Default: 1)
+            max_linger_ms (Optional[int]):
+                | The maximum amount of time, in milliseconds, to wait for a batch to fill after its first event was received.
+                | Only used if batch_size is greater than 1
+                | (Default: 0)
+            rescue (Optional[bool]):
+                | If True, an event that raised an unexpected exception during 'consume' is re-delivered to the queue it was taken
+                | from after a delay, rather than being sent to the error queues
+                | (Default: False)
+            max_rescue (Optional[int]):
+                | The amount of times a single event is re-delivered before it is sent to the error queues
+                | (Default: 5)
+            rescue_delay (Optional[float]):
+                | The delay in seconds before the first re-delivery of a rescued event. The delay doubles with every following
+                | attempt, and is reduced by a random jitter of up to Actor.RESCUE_JITTER to spread out retries of simultaneous failures
+                | (Default: 1)
+            max_rescue_delay (Optional[float]):
+                | The upper bound in seconds of the re-delivery delay
+                | (Default: 60)
+            retry_scheduler (Optional[compysition.scheduler.RetryScheduler]):
+                | The timer wheel used to re-deliver rescued events. A Director shares a single scheduler between its actors
+                | (Default: A RetryScheduler owned by this actor)
+            metrics (Optional[compysition.metrics.MetricsRegistry]):
+                | The registry that consume, send and queue metrics of this actor are recorded in. A Director shares a single
+                | registry between its actors
+                | (Default: A MetricsRegistry owned by this actor)
+            tracer (Optional[compysition.tracing.Tracer]):
+                | Samples sent events for per-hop tracing, and stamps the hops of traced events. A Director shares a single tracer
+                | between its actors
+                | (Default: None, events are not traced)
+            flight_recorder (Optional[compysition.flightrecorder.FlightRecorder]):
+                | Holds low level log records of this actor until an error occurs for their meta_id. Records of an event are
+                | released when the event is sent to the error queues. A Director shares a single recorder between its actors
+                | (Default: None, all records are sent to the log actors)
+            log_rate_limiter (Optional[compysition.logger.LogRateLimiter]):
+                | Limits the rate of log records of this actor per level and message template. A Director shares a single
+                | limiter between its actors
+                | (Default: None, log records are not limited)
+            eager_copy (Optional[bool]):
+                | Define if every outbound queue should receive a full deepcopy of a sent event. By default, sent events are
+                | copy-on-write clones that share event.data until a holder accesses it. This is only necessary if this actor
+                | retains and modifies event.data of an event after it has been sent
                 | (Default: False)
 
         """
         self.blockdiag_config = {"shape": "box"}
         self.name = name
         self.size = size
-        self.pool = QueuePool(size)
-        self.logger = Logger(name, self.pool.logs)
+        self.pool = QueuePool(size, high_watermark=high_watermark, low_watermark=low_watermark)
+        self.logger = Logger(name, self.pool.logs, recorder=flight_recorder, limiter=log_rate_limiter)
+        self.log_level = logging.NOTSET
+        self.__log_sources = []
         self.__loop = True
         self.threads = RestartPool(logger=self.logger, sleep_interval=1)
 
@@ -80,9 +161,54 @@ class Actor(object):
         self.__run.clear()
         self.__block = GEvent()
         self.__block.clear()
-        self.__blocking_consume = blocking_consume
+        self.__idle_workers = set()
+        self.__worker_groups = {}
+        self.__in_flight = 0
+        self.__throttled_queues = set()
+        if blocking_consume:
+            concurrency = 1
+        self.concurrency = int(concurrency or self.DEFAULT_CONCURRENCY)
+        self.batch_size = max(int(batch_size), 1)
+        self.max_linger_ms = max_linger_ms
         self.rescue = rescue
         self.max_rescue = max_rescue
+        self.rescue_delay = rescue_delay
+        self.max_rescue_delay = max_rescue_delay
+        self.retry_scheduler = retry_scheduler or RetryScheduler()
+        self.metrics = metrics or MetricsRegistry()
+        self.tracer = tracer
+        self.__setup_metrics()
+        self.eager_copy = eager_copy
+
+    def __setup_metrics(self):
+        labels = {"actor": self.name}
+        self.__consumed = self.metrics.counter("compysition_events_consumed_total", "Events taken from inbound queues and consumed",
+                                               labels=labels)
+        self.__consume_errors = self.metrics.counter("compysition_consume_errors_total", "Events that raised an exception during consume",
+                                                     labels=labels)
+        self.__consume_duration = self.metrics.histogram("compysition_consume_duration_seconds", "Duration of consume and consume_batch calls",
+                                                         labels=labels)
+        self.__throttled_sends = self.metrics.counter("compysition_throttled_sends_total", "Sends that waited for a throttled queue",
+                                                      labels=labels)
+        self.metrics.gauge("compysition_events_in_flight", "Events currently being consumed", labels=labels, function=lambda: self.__in_flight)
+        self.metrics.gauge("compysition_pending_retries", "Rescued events waiting for re-delivery", labels=labels,
+                           function=lambda: self.pending_retries)
+        self.__sent = {}
+
+    def __register_queue_metrics(self, queue_name, queue):
+        labels = {"actor": self.name, "queue": queue_name}
+        self.metrics.gauge("compysition_queue_depth", "Events waiting on an inbound queue", labels=labels, function=queue._total_size)
+        self.metrics.counter("compysition_queue_puts_total", "Events put on an inbound queue", labels=labels, function=lambda: queue.put_count)
+        self.metrics.counter("compysition_queue_gets_total", "Events taken from an inbound queue", labels=labels, function=lambda: queue.get_count)
+
+    def __get_sent_counter(self, queue):
+        counter = self.__sent.get(queue.name, None)
+        if counter is None:
+            counter = self.metrics.counter("compysition_events_sent_total", "Events sent to an outbound queue",
+                                           labels={"actor": self.name, "queue": queue.name})
+            self.__sent[queue.name] = counter
+
+        return counter
 
     def block(self):
         self.__block.wait()
@@ -90,16 +216,35 @@ class Actor(object):
     def connect_error_queue(self, destination_queue_name="inbox", *args, **kwargs):
         self.__connect_queue(pool_scope=self.pool.error, destination_queue_name="error_{0}".format(destination_queue_name), *args, **kwargs)
 
-    def connect_log_queue(self, destination_queue_name="inbox", *args, **kwargs):
-        self.__connect_queue(pool_scope=self.pool.logs, destination_queue_name="log_{0}".format(destination_queue_name), *args, **kwargs)
+    def connect_log_queue(self, destination_queue_name="inbox", destination=None, *args, **kwargs):
+        self.__connect_queue(pool_scope=self.pool.logs, destination=destination, destination_queue_name="log_{0}".format(destination_queue_name),
+                             *args, **kwargs)
+        destination.register_log_source(self.logger)
+
+    def register_log_source(self, logger):
+        '''Registers the logger of an actor that logs to this actor, and pushes the level of this actor to it'''
+        if logger not in self.__log_sources:
+            self.__log_sources.append(logger)
+        logger.set_sink_level(self.name, self.log_level)
+
+    def set_log_level(self, level):
+        '''
+        Sets the lowest level of log events that this actor writes when it is used as a log actor. The level is pushed to the
+        logger of every actor that logs to this actor, which then discard records below it without creating log events
+        '''
+        self.log_level = level
+        for logger in self.__log_sources:
+            logger.set_sink_level(self.name, level)
 
     def connect_queue(self, *args, **kwargs):
         self.__connect_queue(pool_scope=self.pool.outbound, *args, **kwargs)
 
-    def __connect_queue(self, source_queue_name="outbox", destination=None, destination_queue_name="inbox", pool_scope=None, check_existing=True):
+    def __connect_queue(self, source_queue_name="outbox", destination=None, destination_queue_name="inbox", pool_scope=None, check_existing=True,
+                        queue_class=None, queue_kwargs=None):
         """Connects the <source_queue_name> queue to the <destination> queue.
         If the destination queue already exists, the source queue is changed to be a reference to that queue, as Many to One connections
-        are supported, but One to Many is not"""
+        are supported, but One to Many is not.
+        If a new queue is created, it is an instance of <queue_class> (Default: compysition.queue.Queue) created with <queue_kwargs>"""
 
         source_queue = pool_scope.get(source_queue_name, None)
         destination_queue = destination.pool.inbound.get(destination_queue_name, None)
@@ -115,7 +260,7 @@ class Actor(object):
 
         if not source_queue:
             if not destination_queue:
-                source_queue = pool_scope.add(source_queue_name)
+                source_queue = pool_scope.add(source_queue_name, queue_class=queue_class, queue_kwargs=queue_kwargs)
                 destination.register_consumer(destination_queue_name, source_queue)
             elif destination_queue:
                 pool_scope.add(source_queue_name, queue=destination_queue)
@@ -137,12 +282,62 @@ class Actor(object):
     def is_running(self):
         return self.__run.is_set()
 
+    @property
+    def throttled(self):
+        """True while this actor is blocked sending to at least one saturated outbound queue"""
+        return len(self.__throttled_queues) > 0
+
+    def is_throttled(self, queues=__NOT_DEFINED):
+        """
+        Returns True if any of <queues> (Default: all outbound queues) has reached its high watermark. Producers that receive
+        events from outside of the actor graph can use this to reject work rather than block
+        """
+        if queues is self.__NOT_DEFINED:
+            queues = self.pool.outbound.values()
+
+        return any(queue.is_throttled() for queue in queues)
+
+    @property
+    def pending_retries(self):
+        """The amount of rescued events currently waiting for re-delivery to this actor"""
+        return self.retry_scheduler.pending(owner=self.name)
+
+    def pending_events(self):
+        """
+        Returns the amount of events this actor has yet to process. This includes events waiting on inbound queues, events currently
+        being consumed and rescued events waiting for re-delivery
+        """
+        return sum(queue._total_size() for queue in self.pool.inbound.values()) + self.__in_flight + self.pending_retries
+
+    def is_drained(self):
+        return self.pending_events() == 0
+
+    def stop_accepting(self):
+        """
+        Called by the Director when shutting down gracefully, before the actor graph is drained. Actors that produce events from an
+        external source (such as a listening socket or a schedule) override this to stop accepting new work, while continuing to
+        process work that was already accepted
+        """
+        pass
+
     def register_consumer(self, queue_name, queue):
         '''
-        Add the passed queue and queue name to
+        Add the passed queue and queue name to the inbound pool, and start the worker greenlets that consume from it
         '''
         self.pool.inbound.add(queue_name, queue=queue)
-        self.threads.spawn(self.__consumer, self.consume, queue)
+        self.__register_queue_metrics(queue_name, queue)
+        if self.batch_size > 1:
+            consumer, function = self.__batch_consumer, self.consume_batch
+        else:
+            consumer, function = self.__consumer, self.consume
+
+        self.__worker_groups[queue] = _WorkerGroup(consumer, function)
+        self.__add_worker(queue)
+
+    def __add_worker(self, queue):
+        group = self.__worker_groups[queue]
+        group.size += 1
+        self.threads.spawn(group.consumer, group.function, queue)
 
     def start(self):
         '''Starts the module.'''
@@ -172,6 +367,9 @@ class Actor(object):
         self.__loop = False
         self.__block.set()
 
+        for worker in list(self.__idle_workers):
+            worker.kill(block=False)
+
         # This should do a self.threads.join() but currently it is blocking. This issue needs to be resolved
         # But in the meantime post_hook will execute
 
@@ -181,8 +379,8 @@ class Actor(object):
 
     def send_event(self, event, queues=__NOT_DEFINED, check_output=True):
         """
-        Sends event to all registered outbox queues. If multiple queues are consuming the event,
-        a deepcopy of the event is sent instead of raw event.
+        Sends event to all registered outbox queues. Each queue receives a copy-on-write clone of the event
+        (see Event.cow_clone), or a deepcopy of the event if this actor was created with eager_copy
         """
 
         if queues is self.__NOT_DEFINED:
@@ -195,6 +393,7 @@ class Actor(object):
         Calls 'send_event' with all error queues as the 'queues' parameter
         """
         queues = self.pool.error.values()
+        self.logger.release(event.meta_id)
         self._loop_send(event, queues=queues, check_output=False)
 
     def _loop_send(self, event, queues, check_output=True):
@@ -206,85 +405,258 @@ class Actor(object):
         if check_output and not isinstance(event, self.output):
             raise InvalidActorOutput("Event was of type '{_type}', expected '{output}'".format(_type=type(event), output=self.output))
 
-        if len(queues) > 0:
-            self._send(queues[0], deepcopy(event))
-            map(lambda _queue: self._send(_queue, deepcopy(event)), queues[1:])
+        if self.tracer is not None:
+            self.tracer.sample(event)
+            if event.trace:
+                self.tracer.forwarded(event)
+
+        if self.eager_copy:
+            for queue in queues:
+                self._send(queue, deepcopy(event))
+        else:
+            for queue in queues:
+                self._send(queue, event.cow_clone())
 
     def _send(self, queue, event):
+        if queue.is_throttled():
+            self.__throttled_sends.inc()
+            self.__wait_until_free(queue)
+
+        if self.tracer is not None and isinstance(event.trace, list):
+            self.tracer.enqueued(event, queue)
+
         queue.put(event)
+        self.__get_sent_counter(queue).inc()
         sleep(0)
 
+    def __wait_until_free(self, queue):
+        """
+        Blocks the sending greenlet until <queue> has drained to its low watermark
+        """
+        if queue.name not in self.__throttled_queues:
+            self.__throttled_queues.add(queue.name)
+            self.logger.warning("Outbound queue '{queue}' reached its high watermark of {high} events. Throttling until it drains to {low}",
+                                queue=queue.name, high=queue.high_watermark, low=queue.low_watermark)
+
+        queue.wait_until_free()
+
+        if queue.name in self.__throttled_queues:
+            self.__throttled_queues.discard(queue.name)
+            self.logger.info("Outbound queue '{queue}' drained to {size} events. No longer throttled", queue=queue.name, size=queue.qsize())
+
     def __consumer(self, function, queue):
-        '''Greenthread which applies <function> to each element from <queue>
+        '''Long-lived worker greenthread which applies <function> to each element from <queue>.
+        Up to Actor.concurrency of these workers are started for every inbound queue. Events are taken in the order the queue
+        provides them, so a PriorityLaneQueue inbox is consumed according to Event.priority
         '''
 
         self.__run.wait()
 
         while self.loop():
-            queue.wait_until_content()
             try:
-                event = queue.get(timeout=10)
+                event = self.__wait_for_event(queue)
             except QueueEmpty:
                 pass
             else:
-                if self.__blocking_consume:
-                    self.__do_consume(function, event, queue)
-                else:
-                    self.threads.spawn(self.__do_consume, function, event, queue, restart=False)
+                self.__do_consume(function, event, queue)
 
         while True:
-            if queue.qsize() > 0:
-                try:
-                    event = queue.get()
-                except QueueEmpty as err:
-                    break
-                else:
-                    self.threads.spawn(self.__do_consume, function, event, queue, restart=False)
+            try:
+                event = self.__take(queue, block=False)
+            except QueueEmpty:
+                break
+            else:
+                self.__do_consume(function, event, queue)
+
+    def __batch_consumer(self, function, queue):
+        '''Long-lived worker greenthread which applies <function> to lists of up to Actor.batch_size elements from <queue>.
+        A batch is dispatched once it is full, or once Actor.max_linger_ms has passed since its first element was received
+        '''
+
+        self.__run.wait()
+
+        while self.loop():
+            try:
+                events = [self.__wait_for_event(queue)]
+            except QueueEmpty:
+                pass
             else:
+                deadline = time() + self.max_linger_ms / 1000.0
+                while len(events) < self.batch_size:
+                    remaining = deadline - time()
+                    try:
+                        events.append(self.__take(queue, block=remaining > 0, timeout=max(remaining, 0)))
+                    except QueueEmpty:
+                        break
+
+                self.__do_consume_batch(function, events, queue)
+
+        events = []
+        while True:
+            try:
+                events.append(self.__take(queue, block=False))
+            except QueueEmpty:
                 break
 
-    def __do_consume(self, function, event, queue):
+        for index in xrange(0, len(events), self.batch_size):
+            self.__do_consume_batch(function, events[index:index + self.batch_size], queue)
+
+    def __wait_for_event(self, queue):
         """
-        A function designed to be spun up in a greenlet to maximize concurrency for the __consumer method
-        This function actually calls the consume function for the actor
+        Blocks the calling worker until an event is available on <queue>. While blocked, the worker is registered as idle so that
+        'stop' may release it without interrupting a consume in progress. If no other worker of <queue> is idle once the event
+        was taken, another worker is started, up to Actor.concurrency
         """
+        worker = getcurrent()
+        group = self.__worker_groups[queue]
+        self.__idle_workers.add(worker)
+        group.idle += 1
         try:
+            event = self.__take(queue)
+        finally:
+            self.__idle_workers.discard(worker)
+            group.idle -= 1
 
-            if not isinstance(event, self.input):
-                new_event = event.convert(self.input[0])
-                self.logger.warning("Incoming event was of type '{_type}' when type {input} was expected. Converted to {converted}".format(
-                    _type=type(event), input=self.input, converted=type(new_event)), event=event)
-                event = new_event
+        if group.idle == 0 and group.size < self.concurrency:
+            self.__add_worker(queue)
 
-            if self.REQUIRED_EVENT_ATTRIBUTES:
-                missing = [event.get(attribute) for attribute in self.REQUIRED_EVENT_ATTRIBUTES if not event.get(attribute, None)]
-                if len(missing) > 0:
-                    raise InvalidActorInput("Required incoming event attributes were missing: {missing}".format(missing=missing))
+        return event
 
+    def __take(self, queue, block=True, timeout=None):
+        """
+        Gets an event from <queue>, counting it as in flight until it is released by __do_consume or __do_consume_batch
+        """
+        event = queue.get(block=block, timeout=timeout)
+        self.__in_flight += 1
+        return event
+
+    def __prepare_input(self, event):
+        """
+        Validates an incoming event against Actor.input and Actor.REQUIRED_EVENT_ATTRIBUTES, converting it if necessary
+        """
+        if not isinstance(event, self.input):
+            new_event = event.convert(self.input[0])
+            self.logger.warning("Incoming event was of type '{_type}' when type {input} was expected. Converted to {converted}".format(
+                _type=type(event), input=self.input, converted=type(new_event)), event=event)
+            event = new_event
+
+        if self.REQUIRED_EVENT_ATTRIBUTES:
+            missing = [event.get(attribute) for attribute in self.REQUIRED_EVENT_ATTRIBUTES if not event.get(attribute, None)]
+            if len(missing) > 0:
+                raise InvalidActorInput("Required incoming event attributes were missing: {missing}".format(missing=missing))
+
+        return event
+
+    def __do_consume(self, function, event, queue):
+        """
+        Executed by the __consumer workers for every event taken from an inbound queue
+        This function actually calls the consume function for the actor
+        """
+        start = time()
+        hop = self.tracer.started(event, self) if self.tracer is not None and isinstance(event.trace, list) else None
+        try:
+            event = self.__prepare_input(event)
             function(event, origin=queue.name, origin_queue=queue)
-        except QueueFull as err:
-            err.wait_until_free()
-            queue.put(event)
-        except InvalidActorInput as error:
-            self.logger.error("Invalid input detected: {0}".format(error))
-        except InvalidEventConversion:
-            self.logger.error("Event was of type '{_type}', expected '{input}'".format(_type=type(event), input=self.input))
         except Exception as err:
+            self.__process_consume_error(err, event, queue)
+        finally:
+            if hop is not None:
+                self.tracer.finished(event, hop)
+            self.__in_flight -= 1
+            self.__consumed.inc()
+            self.__consume_duration.observe(time() - start)
+
+    def __do_consume_batch(self, function, events, queue):
+        """
+        Executed by the __batch_consumer workers for every batch taken from an inbound queue
+        This function actually calls the consume_batch function for the actor. If consume_batch raises an exception,
+        every event in the batch is treated as failed
+        """
+        start = time()
+        hops = [(event, self.tracer.started(event, self)) for event in events if isinstance(event.trace, list)] if self.tracer is not None else []
+        try:
+            prepared = []
+            for event in events:
+                try:
+                    prepared.append(self.__prepare_input(event))
+                except Exception as err:
+                    self.__process_consume_error(err, event, queue)
+
+            if len(prepared) > 0:
+                try:
+                    function(prepared, origin=queue.name, origin_queue=queue)
+                except Exception as err:
+                    for event in prepared:
+                        self.__process_consume_error(err, event, queue)
+        finally:
+            for event, hop in hops:
+                self.tracer.finished(event, hop)
+            self.__in_flight -= len(events)
+            self.__consumed.inc(len(events))
+            self.__consume_duration.observe(time() - start)
+
+    def __process_consume_error(self, err, event, queue):
+        """
+        Handles an exception raised while consuming <event>. Must be called from within the 'except' block that caught <err>
+        """
+        self.__consume_errors.inc()
+        if isinstance(err, QueueFull):
+            # Backpressure is applied by _send before every put, so a full queue here is an error. The event may already have
+            # been sent to some outbound queues, so it is neither re-queued nor rescued, which would send duplicates
+            self.logger.error("Unable to send event: {error}", event=event, error=err)
+            event.error = err
+            self.send_error(event)
+        elif isinstance(err, InvalidActorInput):
+            self.logger.error("Invalid input detected: {0}".format(err))
+        elif isinstance(err, InvalidEventConversion):
+            self.logger.error("Event was of type '{_type}', expected '{input}'".format(_type=type(event), input=self.input))
+        else:
             self.logger.warning("Event exception caught: {traceback}".format(traceback=traceback.format_exc()), event=event)
-            rescue_tracker = "{actor}_rescue_num".format(actor=self.name)
-            if self.rescue and event.get(rescue_tracker, 0) < self.max_rescue:
-                setattr(event, rescue_tracker, event.get(rescue_tracker, 0) + 1)
-                sleep(1)
-                queue.put(event)
+            # The attempts are held on the event, so that they survive pickling (e.g. by a SpillQueue) and conversion
+            attempts = event.rescue_attempts or {}
+            attempt = attempts.get(self.name, 0) + 1
+            if self.rescue and attempt <= self.max_rescue:
+                attempts[self.name] = attempt
+                event.rescue_attempts = attempts
+                self.retry_scheduler.schedule(self.__get_rescue_delay(attempt), self.__redeliver, args=(event, queue), owner=self.name)
             else:
+                if event.rescue_attempts:
+                    event.rescue_attempts.pop(self.name, None)
                 event.error = err
                 self.send_error(event)
 
+    def __get_rescue_delay(self, attempt):
+        """
+        Exponential backoff for the <attempt>th re-delivery of an event, reduced by a random jitter
+        """
+        delay = min(self.rescue_delay * (2 ** (attempt - 1)), self.max_rescue_delay)
+        return delay * (1 - random.random() * self.RESCUE_JITTER)
+
+    def __redeliver(self, event, queue):
+        if queue.is_throttled():
+            queue.wait_until_free()
+
+        queue.put(event)
+
     def create_event(self, *args, **kwargs):
         if len(self.output) == 1:
             return self.output[0](**kwargs)
         raise ValueError("Unable to call create_event function with multiple output types defined")
 
+    def consume_batch(self, events, *args, **kwargs):
+        """
+        Consumes a list of events at once. Only called if this actor was created with a batch_size greater than 1.
+        Implementing actors may override this to amortize I/O or setup across many events. By default, 'consume' is
+        called for every event in the batch
+
+        Args:
+            events: A list of the implementation of event.Event this actor is consuming
+            *args:
+            **kwargs:
+        """
+        for event in events:
+            self.consume(event, *args, **kwargs)
+
     @abc.abstractmethod
     def consume(self, event, *args, **kwargs):
         """
@@ -29,6 +29,7 @@ from lxml import etree
 from util import XPathLookup
 from compysition.event import XMLEvent, JSONEvent
 from compysition.errors import MalformedEventData
+from compysition.attributepath import compile_path
 
 class EventAttributeModifier(Actor):
 
@@ -52,6 +53,7 @@ class EventAttributeModifier(Actor):
         else:
             self.key = key
 
+        self.key_path = compile_path(self.key, separator=self.separator)
         self.log_change = log_change
 
     def consume(self, event, *args, **kwargs):
@@ -68,34 +70,11 @@ class EventAttributeModifier(Actor):
 
     def get_key_chain_value(self, event, value):
         #TODO: Redo this to not modify arrays
-        keys = self.key.split(self.separator)
-        event_key = keys.pop(0)
-        if len(keys) == 0:
-            event.set(event_key, value)
-        else:
-            current_step = event.get(event_key, None)
-            if not current_step:
-                current_step = {}
-                event.set(event_key, current_step)
-
-            try:
-                while True:
-                    try:
-                        item = keys.pop(0)
-                        if len(keys) > 0:
-                            next_step = current_step[item]
-                            current_step = next_step
-                        else:
-                            current_step[item] = value
-                    except KeyError:
-                        next_step = {} if len(keys) > 0 else value
-                        current_step[item] = next_step
-                        current_step = next_step
-                    except IndexError:
-                        break
-            except Exception as err:
-                self.logger.error("Unable to follow key chain. Ran into non-dict value of '{value}'".format(value=current_step), event=event)
-                raise
+        try:
+            self.key_path.set(event, value)
+        except Exception as err:
+            self.logger.error("Unable to set key chain '{key}': {err}".format(key=self.key, err=err), event=event)
+            raise
 
         return event
 
@@ -105,8 +84,12 @@ class EventAttributeModifier(Actor):
 
 class EventAttributeLookupModifier(EventAttributeModifier):
 
+    def __init__(self, name, *args, **kwargs):
+        super(EventAttributeLookupModifier, self).__init__(name, *args, **kwargs)
+        self.value_path = compile_path((self.value, ) if isinstance(self.value, str) else self.value)
+
     def get_modify_value(self, event):
-        return event.lookup(self.value)
+        return self.value_path.get(event)
 
 
 class HTTPStatusModifier(EventAttributeModifier):
@@ -159,17 +142,18 @@ class JSONEventAttributeModifier(EventAttributeModifier):
 
     def __init__(self, name, separator="/", *args, **kwargs):
         self.separator = separator
-        super(JSONEventAttributeModifier, self).__init__(name, *args, **kwargs)
+        super(JSONEventAttributeModifier, self).__init__(name, separator=separator, *args, **kwargs)
+        self.value_path = compile_path(self.value, separator=self.separator, attributes=False)
 
     def get_modify_value(self, event):
         data = event.data
         if isinstance(data, list):
             for datum in data:
-                value = reduce(lambda acc, key: acc.get(key, {}), [datum] + self.value.split(self.separator))
+                value = self.value_path.get(datum, {})
                 if value is not None:
                     break
         else:
-            value = reduce(lambda acc, key: acc.get(key, {}), [data] + self.value.split(self.separator))
+            value = self.value_path.get(data, {})
 
         if isinstance(value, dict) and len(value) == 0:
             value = None
@@ -96,6 +96,9 @@ class EventGenerator(Actor):
         gevent.sleep(self.delay)
         self.scheduler.start()
 
+    def stop_accepting(self):
+        self.scheduler.pause()
+
     def post_hook(self):
         self.scheduler.shutdown()
 
@@ -45,6 +45,10 @@ class EventLogger(Actor):
         self.log_full_event = log_full_event
 
     def consume(self, event, *args, **kwargs):
+        if not self.logger.is_enabled_for(self.level):
+            self.send_event(event)
+            return
+
         message = self.prefix + ""
         if self.log_full_event:
             message += str(event)
@@ -28,6 +28,7 @@ from util import XPathLookup
 import json
 from compysition.event import HttpEvent
 from compysition.errors import SetupError, EventCommandNotAllowed
+from compysition.attributepath import compile_path
 
 
 class EventRouter(Actor):
@@ -118,9 +119,8 @@ class EventRouter(Actor):
                 matched = True
                 if len(filter.outboxes) > 0:
                     self.send_event(event, queues=filter.outboxes)
-                    self.logger.debug("EventFilter matched for outbound queues ({outbox_names}). Event successfully forwarded".format(
-                            outbox_names=filter.outbox_names),
-                        event=event)
+                    self.logger.debug("EventFilter matched for outbound queues ({outbox_names}). Event successfully forwarded",
+                                      event=event, outbox_names=filter.outbox_names)
                 else:
                     self.logger.info("EventFilter matched, but no outbound queues were defined for filter. Event has been discarded.", event=event)
 
@@ -245,6 +245,8 @@ class EventFilter(object):
         else:
             raise TypeError("The defined event_scope must be either type str or tuple(str)")
 
+        self.event_scope_path = compile_path(self.event_scope)
+
     def set_next_filter(self, filter):
         if filter is not None:
             if isinstance(filter, EventFilter):
@@ -276,21 +278,19 @@ class EventFilter(object):
 
     def _get_value(self, event, event_scope, *args, **kwargs):
         """
-        This method iterates through the self.event_scope tuple in a series of getattr or get calls,
-        depending on if the event in the scope step is a dict or an object. More supported types may be added in the future
+        This method follows the event_scope tuple in a series of getattr or get calls, depending on if the event in the
+        scope step is a dict or an object, using a compiled path (See compysition.attributepath).
         If the chain fails at any point, a None is returned
         """
         try:
-            current_step = event
-            for scope_step in event_scope:
-                if isinstance(current_step, dict):
-                    current_step = current_step.get(scope_step, None)
-                elif isinstance(current_step, object):
-                    current_step = getattr(current_step, scope_step, None)
+            if event_scope is self.event_scope:
+                value = self.event_scope_path.get(event)
+            else:
+                value = compile_path(event_scope).get(event)
         except Exception as err:
-            current_step = None
+            value = None
 
-        yield current_step
+        yield value
 
 
 class EventXMLFilter(EventFilter):
@@ -384,6 +384,8 @@ class EventJSONFilter(EventFilter):
 
     def __init__(self, json_scope=None, *args, **kwargs):
         super(EventJSONFilter, self).__init__(*args, **kwargs)
+        if isinstance(json_scope, str):
+            json_scope = (json_scope, )
         self.json_scope = json_scope
 
     def _get_value(self, event, event_scope):
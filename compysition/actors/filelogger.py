@@ -27,7 +27,9 @@ import logging
 import logging.handlers
 import traceback
 import os
+import gevent
 import gevent.lock
+from gevent.threadpool import ThreadPool
 from compysition.event import LogEvent
 
 class RotatingFileHandler(logging.handlers.RotatingFileHandler):
@@ -56,22 +58,185 @@ class RotatingFileHandler(logging.handlers.RotatingFileHandler):
             os.mkdir(file_path)
 
 
+class BufferedLogFile(object):
+
+    """
+    A log file that accumulates formatted lines in memory, and writes them in chunks. The file is rotated like
+    RotatingFileHandler, but its size is tracked in memory once it has been opened, so rotation does not seek or stat per write.
+
+    extend and take are called from the gevent hub thread, while write, rollover and close are only ever called from the single
+    writer thread of a FileLogger
+    """
+
+    def __init__(self, file_path, maxBytes=0, backupCount=0):
+        self.file_path = file_path
+        self.maxBytes = maxBytes
+        self.backupCount = backupCount
+        self.lines = []
+        self.pending = 0
+        self.size = 0
+        self.file = None
+
+    def extend(self, lines):
+        self.lines.extend(lines)
+        self.pending += sum(map(len, lines)) + len(lines)
+
+    def take(self):
+        """Returns the buffered lines as a single chunk, and empties the buffer"""
+        data = "\n".join(self.lines) + "\n"
+        self.lines = []
+        self.pending = 0
+        return data
+
+    def write(self, data):
+        if self.file is None:
+            self.open()
+
+        if self.maxBytes > 0 and self.size > 0 and self.size + len(data) > self.maxBytes:
+            self.rollover()
+
+        self.file.write(data)
+        self.file.flush()
+        self.size += len(data)
+
+    def open(self, mode="a"):
+        directory = os.path.dirname(self.file_path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        self.file = open(self.file_path, mode)
+        self.file.seek(0, os.SEEK_END)
+        self.size = self.file.tell()
+
+    def rollover(self):
+        """Rotates the file the same way as logging.handlers.RotatingFileHandler.doRollover"""
+        self.file.close()
+        if self.backupCount > 0:
+            for index in xrange(self.backupCount - 1, 0, -1):
+                source = "{0}.{1}".format(self.file_path, index)
+                destination = "{0}.{1}".format(self.file_path, index + 1)
+                if os.path.exists(source):
+                    if os.path.exists(destination):
+                        os.remove(destination)
+                    os.rename(source, destination)
+
+            destination = self.file_path + ".1"
+            if os.path.exists(destination):
+                os.remove(destination)
+            os.rename(self.file_path, destination)
+
+        self.open(mode="w")
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
 class FileLogger(Actor):
     '''**Prints incoming events to a log file for debugging.**
+
+    Parameters:
+
+        name (str):
+            | The instance name
+        default_filename (Optional[str]):
+            | The file that log events are written to, unless they define a 'logger_filename'
+            | (Default: "compysition.log")
+        level (Optional[str]):
+            | The name of the lowest level that is written
+            | (Default: "INFO")
+        directory (Optional[str]):
+            | The directory that log files are written to
+            | (Default: "logs")
+        maxBytes (Optional[int]):
+            | The size in bytes at which a log file is rotated
+            | (Default: 20000000)
+        backupCount (Optional[int]):
+            | The amount of rotated log files that are kept
+            | (Default: 10)
+        buffered (Optional[bool]):
+            | If True, formatted lines are accumulated in memory per file, and written in chunks by a dedicated thread, so the
+            | gevent hub never blocks on disk. Chunks are written once <flush_size> bytes are buffered, at least every
+            | <flush_interval> seconds, and when the actor stops. Lines may be lost if the process is killed
+            | (Default: False)
+        flush_size (Optional[int]):
+            | The amount of buffered bytes per file that triggers a write in buffered mode
+            | (Default: 65536)
+        flush_interval (Optional[float]):
+            | The maximum time in seconds that lines are buffered in buffered mode
+            | (Default: 1)
     '''
 
     input = LogEvent
 
-    def __init__(self, name, default_filename="compysition.log", level="INFO", directory="logs", maxBytes=20000000, backupCount=10, *args, **kwargs):
+    def __init__(self, name, default_filename="compysition.log", level="INFO", directory="logs", maxBytes=20000000, backupCount=10,
+                 buffered=False, flush_size=64 * 1024, flush_interval=1, *args, **kwargs):
         super(FileLogger, self).__init__(name, *args, **kwargs)
         self.blockdiag_config["shape"] = "note"
         self.default_filename = default_filename
         self.level = getattr(logging, level.upper(), logging.INFO)
+        self.set_log_level(self.level)
         self.directory = directory
         self.maxBytes = int(maxBytes)
         self.backupCount = int(backupCount)
+        self.buffered = buffered
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
 
         self.loggers = {}
+        self.log_files = {}
+        if self.buffered:
+            # A single thread writes all chunks, in the order they were flushed
+            self.__writer = ThreadPool(1)
+
+    def pre_hook(self):
+        if self.buffered:
+            self.threads.spawn(self.__flush_periodically)
+
+    def post_hook(self):
+        if self.buffered:
+            self.flush()
+            self.__writer.join()
+            for log_file in self.log_files.itervalues():
+                log_file.close()
+            self.__writer.kill()
+
+    def __flush_periodically(self):
+        while self.loop():
+            gevent.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        """Hands the buffered lines of every file to the writer thread. Blocks the calling greenlet while the writer is busy"""
+        for log_file in self.log_files.values():
+            if log_file.pending > 0:
+                self.__flush_file(log_file)
+
+    def __flush_file(self, log_file):
+        self.__writer.spawn(self.__write, log_file, log_file.take())
+
+    @staticmethod
+    def __write(log_file, data):
+        try:
+            log_file.write(data)
+        except:
+            print traceback.format_exc()
+
+    def _get_log_file(self, event_filename):
+        log_file = self.log_files.get(event_filename, None)
+        if not log_file:
+            log_file = BufferedLogFile("{0}/{1}".format(self.directory, event_filename), maxBytes=self.maxBytes,
+                                       backupCount=self.backupCount)
+            self.log_files[event_filename] = log_file
+        return log_file
+
+    def _buffer_entries(self, event_filename, events):
+        log_file = self._get_log_file(event_filename)
+        log_file.extend([self._format_entry(event) for event in events if event.level >= self.level])
+
+        if log_file.pending >= self.flush_size:
+            self.__flush_file(log_file)
 
     def _create_logger(self, filepath):
         file_logger = logging.getLogger(filepath)
@@ -85,6 +250,10 @@ class FileLogger(Actor):
 
     def _process_log_entry(self, event):
         event_filename = event.get("logger_filename", self.default_filename)
+        if self.buffered:
+            self._buffer_entries(event_filename, [event])
+            return
+
         logger = self.loggers.get(event_filename, None)
         if not logger:
             logger = self._create_logger("{0}/{1}".format(self.directory, event_filename))
@@ -92,7 +261,28 @@ class FileLogger(Actor):
 
         self._do_log(logger, event)
 
-    def _do_log(self, logger, event):
+    def _process_log_entries(self, events):
+        """
+        Groups a batch of log entries by their destination file, so that each file is looked up once per batch
+        """
+        grouped = {}
+        for event in events:
+            grouped.setdefault(event.get("logger_filename", self.default_filename), []).append(event)
+
+        for event_filename, file_events in grouped.iteritems():
+            if self.buffered:
+                self._buffer_entries(event_filename, file_events)
+                continue
+
+            logger = self.loggers.get(event_filename, None)
+            if not logger:
+                logger = self._create_logger("{0}/{1}".format(self.directory, event_filename))
+                self.loggers[event_filename] = logger
+
+            for event in file_events:
+                self._do_log(logger, event)
+
+    def _format_entry(self, event):
         actor_name = event.origin_actor
         id = event.id
         message = event.message
@@ -106,10 +296,16 @@ class FileLogger(Actor):
         else:
             entry = "actor={0} :: {1}".format(actor_name, message)
 
+        return "{0}{1}".format(entry_prefix, entry)
+
+    def _do_log(self, logger, event):
         try:
-            logger.log(level, "{0}{1}".format(entry_prefix, entry))
+            logger.log(event.level, self._format_entry(event))
         except:
             print traceback.format_exc()
 
     def consume(self, event, *args, **kwargs):
         self._process_log_entry(event)
+
+    def consume_batch(self, events, *args, **kwargs):
+        self._process_log_entries(events)
@@ -22,8 +22,8 @@
 #  MA 02110-1301, USA.
 
 from compysition import Actor
-from compysition.errors import InvalidEventDataModification, MalformedEventData, ResourceNotFound
-from compysition.event import HttpEvent, JSONHttpEvent, XMLHttpEvent
+from compysition.errors import InvalidEventDataModification, MalformedEventData, ResourceNotFound, ServiceUnavailable
+from compysition.event import HttpEvent, JSONHttpEvent, XMLHttpEvent, RawData, StreamData
 from gevent import pywsgi
 import json
 from functools import wraps
@@ -90,6 +90,24 @@ class HTTPServer(Actor, Bottle):
             | Special values:
             |    id(Optional[str]): Used to identify this route in the json object
             |    base_path(Optional[str]): Used to identify a route that this route extends, using the referenced id
+            |    priority(Optional[int]): The Event.priority assigned to events created by this route
+            |    defer_parsing(Optional[bool]): Overrides 'defer_parsing' for this route
+            |    stream_bodies(Optional[bool]): Overrides 'stream_bodies' for this route
+        shed_load(Optional[bool]):
+            | If True, requests for a queue that has reached its high watermark are immediately rejected with a 503.
+            | If False, the request blocks until the queue has drained
+            | Default: True
+        defer_parsing(Optional[bool]):
+            | If True, request bodies are passed on as RawData, which is only parsed once an actor accesses event.data and is
+            | forwarded verbatim otherwise. Malformed bodies are then not rejected with a 400 by this actor, but raise once accessed.
+            | Useful for routes that only route on headers or service and pass the body on untouched
+            | Default: False
+        stream_bodies(Optional[bool]):
+            | If True, request bodies are passed on as StreamData, backed by the request body as buffered by bottle, which spools
+            | bodies larger than BaseRequest.MEMFILE_MAX (1MB) to a temporary file. XML bodies are parsed incrementally from that
+            | file once an actor accesses event.data, and TCP/ZMQ actors forward the body without reading it into memory.
+            | Malformed bodies are not rejected by this actor, as with 'defer_parsing'. Useful for large uploads
+            | Default: False
 
     Examples:
         Default:
@@ -179,15 +197,20 @@ class HTTPServer(Actor, Bottle):
 
         return path
 
-    def __init__(self, name, address="0.0.0.0", port=8080, keyfile=None, certfile=None, routes_config=None, *args, **kwargs):
+    def __init__(self, name, address="0.0.0.0", port=8080, keyfile=None, certfile=None, routes_config=None, shed_load=True,
+                 defer_parsing=False, stream_bodies=False, *args, **kwargs):
         Actor.__init__(self, name, *args, **kwargs)
         Bottle.__init__(self)
         self.blockdiag_config["shape"] = "cloud"
+        self.shed_load = shed_load
+        self.defer_parsing = defer_parsing
+        self.stream_bodies = stream_bodies
         self.address = address
         self.port = port
         self.keyfile = keyfile
         self.certfile = certfile
         self.responders = {}
+        self.__response_durations = {}
         routes_config = routes_config or self.DEFAULT_ROUTE
 
         if isinstance(routes_config, str):
@@ -248,6 +271,15 @@ class HTTPServer(Actor, Bottle):
 
         return response_data
 
+    def __get_response_histogram(self, status):
+        histogram = self.__response_durations.get(status, None)
+        if histogram is None:
+            histogram = self.metrics.histogram("compysition_http_response_duration_seconds", "Time from receiving a request to returning its response",
+                                               labels={"actor": self.name, "status": status})
+            self.__response_durations[status] = histogram
+
+        return histogram
+
     def consume(self, event, *args, **kwargs):
         # There is an error that results in responding with an empty list that will cause an internal server error
 
@@ -281,7 +313,9 @@ class HTTPServer(Actor, Bottle):
 
             response_queue.put(local_response)
             response_queue.put(StopIteration)
-            self.logger.info("[{status}] Returned in {time} ms".format(status=local_response.status, time=(datetime.now()-event.created).microseconds / 1000), event=event)
+            elapsed = (datetime.now() - event.created).total_seconds()
+            self.__get_response_histogram(status).observe(elapsed)
+            self.logger.info("[{status}] Returned in {time} ms".format(status=local_response.status, time=int(elapsed * 1000)), event=event)
         else:
             self.logger.warning("Received event response for an unknown event ID. The request might have already received a response", event=event)
 
@@ -307,7 +341,7 @@ class HTTPServer(Actor, Bottle):
             accept = mimeparse.best_match(self.CONTENT_TYPES, accept_header)
         except ValueError:
             accept = "*/*"
-            self.logger.warning("Invalid mimetype defined in client Accepts header. '{accept}' is not a valid mime type".format(accept=accept_header))
+            self.logger.warning("Invalid mimetype defined in client Accepts header. '{accept}' is not a valid mime type", accept=accept_header)
 
         if request.method in ["GET", "OPTIONS", "HEAD", "DELETE"]:
             for accept_type in accept_header:
@@ -328,6 +362,11 @@ class HTTPServer(Actor, Bottle):
                                                                                                                            queue_name=queue_name))
                 raise ResourceNotFound("Service '{0}' not found".format(queue_name))
 
+            if self.shed_load and queue.is_throttled():
+                self.logger.warning("Rejected {method} request for service {queue_name}. The service is saturated".format(method=request.method,
+                                                                                                                      queue_name=queue_name))
+                raise ServiceUnavailable("Service '{0}' is temporarily unavailable".format(queue_name))
+
             if ctype == self.X_WWW_FORM_URLENCODED:
                 if len(request.forms.items()) < 1:
                     raise MalformedEventData("Mismatched content type")
@@ -338,17 +377,26 @@ class HTTPServer(Actor, Bottle):
             else:
                 event_class = self.CONTENT_TYPE_MAP[ctype]
                 try:
-                    data = request.body.read()
+                    if request.route.config.get("stream_bodies", self.stream_bodies):
+                        data = StreamData(request.body)
+                    else:
+                        data = request.body.read()
                 except:
                     # A body is not required
                     data = None
 
-            if data == '':
+            if not data:
                 data = None
+            elif not isinstance(data, StreamData) and request.route.config.get("defer_parsing", self.defer_parsing):
+                data = RawData(data)
+
+            priority = request.route.config.get("priority", None)
+            if priority is not None:
+                kwargs['priority'] = priority
 
             event = event_class(environment=environment, service=queue_name, data=data, accept=accept, **kwargs)
 
-        except (ResourceNotFound, InvalidEventDataModification, MalformedEventData) as err:
+        except (ResourceNotFound, InvalidEventDataModification, MalformedEventData, ServiceUnavailable) as err:
             event_class = event_class or JSONHttpEvent
             event = event_class(environment=environment, service=queue_name, accept=accept, **kwargs)
             event.error = err
@@ -362,6 +410,10 @@ class HTTPServer(Actor, Bottle):
 
         return local_response
 
+    def stop_accepting(self):
+        self.__server.stop_accepting()
+        self.logger.info("Stopped accepting new connections")
+
     def post_hook(self):
         self.__server.stop()
         self.logger.info("Stopped serving")
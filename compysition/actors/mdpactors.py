@@ -29,7 +29,8 @@ from compysition import Actor
 from uuid import uuid4 as uuid
 import util.mdpdefinition as MDPDefinition
 import traceback
-import cPickle as pickle
+from compysition.codec import BinaryCodec
+from compysition.actors.zeromq import zmq_frames
 import abc
 
 """
@@ -45,7 +46,7 @@ class MDPActor(Actor):
     __metaclass__ = abc.ABCMeta
 
     """
-    Receive or send events over ZMQ
+    Receive or send events over ZMQ. Events are encoded with <codec> (Default: BinaryCodec()), which must match the codec of the peers
     """
 
     context = None
@@ -53,9 +54,10 @@ class MDPActor(Actor):
     socket_identity = None
     outbound_queue = None
 
-    def __init__(self, name, service_prefix="", service_postfix="", *args, **kwargs):
+    def __init__(self, name, service_prefix="", service_postfix="", codec=None, *args, **kwargs):
         super(MDPActor, self).__init__(name, *args, **kwargs)
         self.blockdiag_config["shape"] = "cloud"
+        self.codec = codec or BinaryCodec()
         self.socket_identity = uuid().get_hex()
         self.context = zmq.Context()
         self.outbound_queue = Queue()
@@ -82,7 +84,8 @@ class MDPActor(Actor):
                 broker = self.broker_manager.get_next_broker_in_queue()
                 if broker is None:
                     self.outbound_queue.put(event)
-                    self.logger.info("There are events waiting on the client queue, but no brokers are registered. Queue size is {0}".format(self.outbound_queue.qsize()))
+                    self.logger.info("There are events waiting on the client queue, but no brokers are registered. Queue size is {size}",
+                                     size=self.outbound_queue.qsize())
                     gevent.sleep(1)         # Place back on queue and wait for a broker
                 else:
                     self.send_outbound_message(broker.outbound_socket, event)
@@ -166,7 +169,7 @@ class MDPClient(MDPActor):
             request_id = event.meta_id                  # Set for broker logging so we can trace the path of an event easily
             service = b"{0}".format(self.service_prefix + event.service + self.service_postfix)
             self.logger.info("Sending event to service '{0}'".format(service), event=event)
-            message = [request_id, b"{0}".format(pickle.dumps(event))]
+            message = [request_id] + zmq_frames(self.codec.encode(event))
             self.send(service, message, broker_socket=socket)
         except Exception as err:
             self.logger.error("Unable to find necessary chains: {0}".format(traceback.format_exc()))
@@ -195,7 +198,7 @@ class MDPClient(MDPActor):
                 empty = message.pop(0)
                 request_identity = message.pop(0)
 
-                event = pickle.loads(message[0])
+                event = self.codec.decode(message)
 
                 self.logger.info("Received reply from broker", event=event)
                 self.send_event(event)
@@ -256,7 +259,7 @@ class MDPWorker(MDPActor):
                 return_address = message.pop(0)
                 empty = message.pop(0)
                 broker_event_logging_id = message.pop(0)
-                event = pickle.loads(message.pop(0))
+                event = self.codec.decode(message)
 
                 request_id = event.event_id
                 self.requests[request_id] = Request(return_address, origin_broker)
@@ -282,7 +285,7 @@ class MDPWorker(MDPActor):
             return_address = request.return_address
             broker_event_logging_id = event.meta_id
             try:
-                message = ['', MDPDefinition.W_WORKER, MDPDefinition.W_REPLY, return_address, '', str(broker_event_logging_id), b"{0}".format(pickle.dumps(event))]
+                message = ['', MDPDefinition.W_WORKER, MDPDefinition.W_REPLY, return_address, '', str(broker_event_logging_id)] + zmq_frames(self.codec.encode(event))
             except Exception as err:
                 self.logger.error(err, event=event)
 
@@ -28,7 +28,6 @@ from compysition import Actor
 import zmq.green as zmq
 import util.mdpdefinition as MDPDefinition
 from uuid import uuid4 as uuid
-import cPickle as pickle
 
 class Service(object):
     """a single Service"""
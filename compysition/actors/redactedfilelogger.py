@@ -23,8 +23,11 @@
 #
 
 from filelogger import FileLogger
+from sre_constants import LITERAL, GROUPREF, GROUPREF_EXISTS
+import sre_parse
 import re
 
+
 class RedactedFileLogger(FileLogger):
 
     """
@@ -36,6 +39,10 @@ class RedactedFileLogger(FileLogger):
     As an example, sending ['<first_name>(.*?)</first_name>'] as the patterns parameter, will replace whatever the group
     (.*?) finds, with REDACTED. The result would be <first_name>REDACTED</first_name> in the file log.
 
+    Patterns are compiled once, and are applied in order. A pattern is skipped when the message does not contain its longest
+    literal (such as '</first_name>'), which every match must include. Patterns without such a literal are checked together
+    with a single scan of their combined alternation, if they can be combined, and are skipped if none of them matches
+
     Parameters:
 
     - name (str):                       The instance name
@@ -48,10 +55,82 @@ class RedactedFileLogger(FileLogger):
     def __init__(self, name, patterns, *args, **kwargs):
         super(RedactedFileLogger, self).__init__(name, *args, **kwargs)
         self.patterns = patterns
+        self._redactions = [(re.compile(pattern), self._get_anchor(pattern)) for pattern in patterns]
+        self._combined = self._combine([pattern for pattern, (_, anchor) in zip(patterns, self._redactions) if anchor is None])
+
+    @staticmethod
+    def _get_anchor(pattern):
+        """
+        Returns the longest run of literal characters in the top level sequence of <pattern>, which is part of every match, or
+        None if there is none
+        """
+        if not isinstance(pattern, basestring):
+            return None
+
+        parsed = sre_parse.parse(pattern)
+        if parsed.pattern.flags & re.IGNORECASE:
+            return None
+
+        anchor, run = "", []
+        for op, av in list(parsed) + [(None, None)]:
+            if op is LITERAL and av < 128:
+                run.append(chr(av))
+            else:
+                if len(run) > len(anchor):
+                    anchor = "".join(run)
+                run = []
+
+        return anchor or None
+
+    @classmethod
+    def _combine(cls, patterns):
+        """
+        Returns the alternation of all patterns, or None if they can not be combined without changing what each of them
+        matches. This is the case if a pattern has flags, which would apply to all of them, or refers to groups by number
+        """
+        if not patterns:
+            return None
+
+        for pattern in patterns:
+            if not isinstance(pattern, basestring):
+                return None
+
+            parsed = sre_parse.parse(pattern)
+            if parsed.pattern.flags or cls._contains(parsed, (GROUPREF, GROUPREF_EXISTS)):
+                return None
+
+        try:
+            return re.compile("|".join("(?:{0})".format(pattern) for pattern in patterns))
+        except re.error:
+            return None
+
+    @classmethod
+    def _contains(cls, node, ops):
+        if isinstance(node, sre_parse.SubPattern):
+            return any(op in ops or cls._contains(av, ops) for op, av in node)
+        elif isinstance(node, (list, tuple)):
+            return any(cls._contains(item, ops) for item in node)
+        return False
 
     def _process_redaction(self, event):
-        for pattern in self.patterns:
-            event.message = re.sub(pattern, self._redact_message, event.message)
+        message = event.message
+        # Whether any pattern without an anchor matches the current message, once it has been scanned
+        unanchored_match = None
+        for pattern, anchor in self._redactions:
+            if anchor is not None:
+                if anchor not in message:
+                    continue
+            elif self._combined is not None:
+                if unanchored_match is None:
+                    unanchored_match = self._combined.search(message) is not None
+                if not unanchored_match:
+                    continue
+
+            message, count = pattern.subn(self._redact_message, message)
+            if count:
+                unanchored_match = None
+
+        event.message = message
         return event
 
     @staticmethod
@@ -60,4 +139,7 @@ class RedactedFileLogger(FileLogger):
 
     def consume(self, event, *args, **kwargs):
         event = self._process_redaction(event)
-        self._process_log_entry(event)
\ No newline at end of file
+        self._process_log_entry(event)
+
+    def consume_batch(self, events, *args, **kwargs):
+        self._process_log_entries([self._process_redaction(event) for event in events])
@@ -53,7 +53,10 @@ class SMTPOut(Actor):
 
         return address
 
-    def consume(self, event, *args, **kwargs):
+    def _build_message(self, event):
+        """
+        Returns a (msg, to, from_address) tuple for the email described by the event data, or None if no recipient was specified
+        """
         msg_xml = event.data
         to = msg_xml.find("To").text
         from_element = msg_xml.find("From")
@@ -65,19 +68,62 @@ class SMTPOut(Actor):
                 if element.tag != self.body_tag:
                     msg[element.tag] = element.text
 
+            return msg, to, from_address
+        else:
+            self.logger.info("No email recipient specified, notification was not sent", event=event)
+            return None
+
+    def _send_message(self, sender, message, event):
+        msg, to, from_address = message
+        try:
+            sender.sendmail(from_address, to.split(","), msg.as_string())
+        except Exception as err:
+            self.logger.error("Error sending message: {err}".format(err=traceback.format_exc()), event=event)
+        else:
+            self.logger.info("Email sent to {to} from {from_address} via smtp server {host}".format(to=to,
+                                                                                                    from_address=from_address,
+                                                                                                    host=self.host), event=event)
+
+    def consume(self, event, *args, **kwargs):
+        message = self._build_message(event)
+        if message:
             try:
-                self.send(msg, to, from_address)
+                self.send(*message)
             except Exception as err:
                 self.logger.error("Error sending message: {err}".format(err=traceback.format_exc()), event=event)
             else:
-                self.logger.info("Email sent to {to} from {from_address} via smtp server {host}".format(to=to,
-                                                                                                        from_address=from_address,
+                self.logger.info("Email sent to {to} from {from_address} via smtp server {host}".format(to=message[1],
+                                                                                                        from_address=message[2],
                                                                                                         host=self.host), event=event)
-        else:
-            self.logger.info("No email recipient specified, notification was not sent", event=event)
 
         self.send_event(event)
 
+    def consume_batch(self, events, *args, **kwargs):
+        """
+        Sends every email in the batch over a single SMTP connection
+        """
+        messages = [(event, self._build_message(event)) for event in events]
+        pending = [(event, message) for event, message in messages if message]
+
+        if len(pending) > 0:
+            try:
+                sender = smtplib.SMTP(self.host)
+            except Exception as err:
+                for event, message in pending:
+                    self.logger.error("Error sending message: {err}".format(err=traceback.format_exc()), event=event)
+            else:
+                try:
+                    for event, message in pending:
+                        self._send_message(sender, message, event)
+                finally:
+                    try:
+                        sender.quit()
+                    except Exception as err:
+                        self.logger.warn("Error closing smtp connection: {err}", err=err)
+
+        for event in events:
+            self.send_event(event)
+
     def send(self, msg, to, from_address):
         sender = smtplib.SMTP(self.host)
         sender.sendmail(from_address, to.split(","), msg.as_string())
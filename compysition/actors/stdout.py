@@ -25,6 +25,9 @@
 from compysition import Actor
 import sys
 import datetime
+import traceback
+import gevent
+from gevent.threadpool import ThreadPool
 
 class STDOUT(Actor):
 
@@ -33,14 +36,80 @@ class STDOUT(Actor):
     Prints incoming events to STDOUT. When <complete> is True,
     the complete event including headers is printed to STDOUT.
 
+    When <buffered> is True, lines are accumulated in memory and written in chunks by a dedicated thread, so a slow reader of
+    STDOUT (such as a container log driver) never blocks the gevent hub. Chunks are written in order once <flush_size> bytes are
+    buffered, at least every <flush_interval> seconds, and when the actor stops (See Director.stop). The file descriptor of
+    STDOUT is not switched to non-blocking mode, as it is shared with every other writer in the process.
 
+    Parameters:
+
+        name (str):
+            | The instance name
+        complete (Optional[bool]):
+            | If True, the complete event is printed, instead of event.data_string()
+            | (Default: False)
+        prefix (Optional[str]):
+            | A prefix for every printed line
+            | (Default: "")
+        timestamp (Optional[bool]):
+            | If True, every printed line is prefixed with the current time
+            | (Default: False)
+        buffered (Optional[bool]):
+            | If True, lines are buffered and written by a dedicated thread
+            | (Default: False)
+        flush_size (Optional[int]):
+            | The amount of buffered bytes that triggers a write in buffered mode
+            | (Default: 65536)
+        flush_interval (Optional[float]):
+            | The maximum time in seconds that lines are buffered in buffered mode
+            | (Default: 0.5)
     '''
 
-    def __init__(self, name, complete=False, prefix="", timestamp=False, *args, **kwargs):
+    def __init__(self, name, complete=False, prefix="", timestamp=False, buffered=False, flush_size=64 * 1024, flush_interval=0.5,
+                 *args, **kwargs):
         super(STDOUT, self).__init__(name, *args, **kwargs)
         self.complete = complete
         self.prefix = prefix
         self.timestamp = timestamp
+        self.buffered = buffered
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.__lines = []
+        self.__pending = 0
+        if self.buffered:
+            # A single thread writes all chunks, in the order they were flushed
+            self.__writer = ThreadPool(1)
+
+    def pre_hook(self):
+        if self.buffered:
+            self.threads.spawn(self.__flush_periodically)
+
+    def post_hook(self):
+        if self.buffered:
+            self.flush()
+            self.__writer.join()
+            self.__writer.kill()
+
+    def __flush_periodically(self):
+        while self.loop():
+            gevent.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        """Hands the buffered lines to the writer thread. Blocks the calling greenlet while the writer is busy"""
+        if self.__lines:
+            data = "\n".join(self.__lines) + "\n"
+            self.__lines = []
+            self.__pending = 0
+            self.__writer.spawn(self.__write, data)
+
+    @staticmethod
+    def __write(data):
+        try:
+            sys.stdout.write(data)
+            sys.stdout.flush()
+        except:
+            print traceback.format_exc()
 
     def consume(self, event, *args, **kwargs):
         if self.complete:
@@ -51,6 +120,13 @@ class STDOUT(Actor):
         if self.timestamp:
             data = "[{0}] {1}".format(datetime.datetime.now(), data)
 
-        print(data)
-        sys.stdout.flush()
+        if self.buffered:
+            self.__lines.append(data)
+            self.__pending += len(data) + 1
+            if self.__pending >= self.flush_size:
+                self.flush()
+        else:
+            print(data)
+            sys.stdout.flush()
+
         self.send_event(event)
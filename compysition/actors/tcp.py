@@ -25,7 +25,7 @@ from compysition import Actor
 import gevent.socket as socket
 from gevent.server import StreamServer
 import gevent
-import cPickle as pickle
+from compysition.codec import BinaryCodec
 
 """
 Implementation of a TCP in and out connection using gevent sockets
@@ -40,26 +40,33 @@ BUFFER_SIZE  = 1024
 class TCPOut(Actor):
 
     """
-    Send events over TCP
+    Send events over TCP. When created with a batch_size greater than 1, each batch is sent over a single connection.
+    Events are encoded with <codec> (Default: BinaryCodec()), which must match the codec of the receiving TCPIn
     """
 
 
-    def __init__(self, name, port=None, host=None, listen=True, *args, **kwargs):
+    def __init__(self, name, port=None, host=None, listen=True, codec=None, *args, **kwargs):
         super(TCPOut, self).__init__(name, *args, **kwargs)
 
         self.blockdiag_config["shape"] = "cloud"
+        self.codec = codec or BinaryCodec()
         self.port = port or DEFAULT_PORT
         self.host = host or socket.gethostbyname(socket.gethostname())
 
     def consume(self, event, *args, **kwargs):
-        self._send(event)
+        self.__send(event)
 
-    def _send(self, event):
+    def consume_batch(self, events, *args, **kwargs):
+        self.__send(events)
+
+    def __send(self, event):
         while True:
             try:
                 sock = socket.socket()
                 sock.connect((self.host, self.port))
-                sock.send((pickle.dumps(event)))
+                # Events holding StreamData are written in chunks, and are never read into memory as a whole
+                for part in self.codec.iter_dumps(event):
+                    sock.sendall(part)
                 sock.close()
                 break
             except Exception as err:
@@ -69,12 +76,13 @@ class TCPOut(Actor):
 class TCPIn(Actor):
 
     """
-    Receive Events over TCP
+    Receive Events over TCP. Events are decoded with <codec> (Default: BinaryCodec()), which must match the codec of the sending TCPOut
     """
 
-    def __init__(self, name, port=None, host=None, *args, **kwargs):
-        super(TCPIn, self)._init__(name, *args, **kwargs)
+    def __init__(self, name, port=None, host=None, codec=None, *args, **kwargs):
+        super(TCPIn, self).__init__(name, *args, **kwargs)
         self.blockdiag_config["shape"] = "cloud"
+        self.codec = codec or BinaryCodec()
         self.port = port or DEFAULT_PORT
         self.host = host or "0.0.0.0"
         self.server = StreamServer((self.host, self.port), self.connection_handler)
@@ -86,19 +94,20 @@ class TCPIn(Actor):
         self.logger.info("Connecting to {0} on {1}".format(self.host, self.port))
         self.server.start()
 
+    def stop_accepting(self):
+        self.server.stop_accepting()
+
     def post_hook(self):
         self.server.stop()
 
     def connection_handler(self, socket, address):
-        event_string = ""
-        for l in socket.makefile('r'):
-            event_string += l
-
         try:
-            event = pickle.loads(event_string)
-            self.send_event(event)
-        except:
-            self.logger.error("Received invalid event format: {0}".format(event_string))
+            events = self.codec.load(socket.makefile('rb'))
+        except Exception as err:
+            self.logger.error("Received invalid event format: {0}".format(err))
+        else:
+            for event in events:
+                self.send_event(event)
 
 
 
@@ -59,9 +59,9 @@ class XSLT(Actor):
 
     def consume(self, event, *args, **kwargs):
         try:
-            self.logger.debug("In: {data}".format(data=event.data_string().replace('\n', '')), event=event)
+            self.logger.debug("In: {data}", event=event, data=lambda: event.data_string().replace('\n', ''))
             event.data = self.transform(event.data)
-            self.logger.debug("Out: {data}".format(data=event.data_string().replace('\n', '')), event=event)
+            self.logger.debug("Out: {data}", event=event, data=lambda: event.data_string().replace('\n', ''))
             self.logger.info("Successfully transformed XML", event=event)
             self.send_event(event)
         except XSLTApplyError as err:
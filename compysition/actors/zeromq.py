@@ -25,11 +25,19 @@ from compysition import Actor
 import zmq.green as zmq
 from gevent.queue import Queue
 import socket
-import cPickle as pickle
+from compysition.codec import BinaryCodec
 import abc
 
 DEFAULT_PORT = 9000
 
+
+def zmq_frames(frames):
+    '''
+    Wraps codec frames that are not byte strings (such as a memory map of spooled StreamData) in zmq.Frame, which sends them
+    without copying them into memory. send_multipart only accepts byte strings and frames
+    '''
+    return [frame if frame.__class__ is str else zmq.Frame(frame) for frame in frames]
+
 #TODO: Will be simple to implement ZMQDealer, ZMQREQ, ZMQREP, but the abstract bases may morph during implementations
 
 
@@ -63,6 +71,9 @@ class _ZMQ(Actor):
         mode (Optional[str]):
             | The mode for the socket to use. (bind|connect)
             | Default: connect
+        codec (Optional[compysition.codec.EventCodec]):
+            | The codec events are encoded with. Both ends of the socket must use the same codec
+            | Default: BinaryCodec()
 
     Abstract Properties:
         protocol (zmq.PROTOCOL)
@@ -85,9 +96,10 @@ class _ZMQ(Actor):
     def protocol(self, protocol):
         self._protocol = protocol
 
-    def __init__(self, name, port=DEFAULT_PORT, transmission_protocol=TCP, socket_file=None, host=None, mode="connect", *args, **kwargs):
+    def __init__(self, name, port=DEFAULT_PORT, transmission_protocol=TCP, socket_file=None, host=None, mode="connect", codec=None, *args, **kwargs):
         super(_ZMQ, self).__init__(name, *args, **kwargs)
         self.blockdiag_config["shape"] = "cloud"
+        self.codec = codec or BinaryCodec()
         self.port = port
         self.host = host or socket.gethostbyname(socket.gethostname())
         self.mode = mode
@@ -137,6 +149,9 @@ class _ZMQOut(_ZMQ):
     def consume(self, event, *args, **kwargs):
         self.outbound_queue.put(event)
 
+    def consume_batch(self, events, *args, **kwargs):
+        self.outbound_queue.put(events)
+
     def pre_hook(self):
         self.threads.spawn(self.__consume_outbound_queue)
 
@@ -147,9 +162,14 @@ class _ZMQOut(_ZMQ):
             except:
                 event = None
 
-            if event is not None:
+            if isinstance(event, list):
                 try:
-                    self.socket.send(pickle.dumps(event))
+                    self.socket.send_multipart(zmq_frames(self.codec.encode_many(event)), copy=False)
+                except Exception as err:
+                    self.logger.error("Unable to send {count} events over ZMQ: {err}".format(count=len(event), err=err))
+            elif event is not None:
+                try:
+                    self.socket.send_multipart(zmq_frames(self.codec.encode(event)), copy=False)
                 except Exception as err:
                     self.logger.error("Unable to send event over ZMQ: {err}".format(err=err), event=event)
 
@@ -158,12 +178,18 @@ class _ZMQIn(_ZMQ):
 
     """
     **A still-abstract implementation of _ZMQ base that is designed for an event being RECEIVED over ZeroMQ**
+
+    Received events are sent with Actor.send_event, which blocks while an outbound queue is throttled. No further messages are
+    received in the meantime, so the ZeroMQ high water mark propagates the backpressure to the sending peer
     """
 
+    POLL_TIMEOUT = 1000
+
     def __init__(self, name, mode="bind", *args, **kwargs):
         super(_ZMQIn, self).__init__(name, mode=mode, *args, **kwargs)
         self.poller = zmq.Poller()
         self.poller.register(self.socket, zmq.POLLIN)
+        self.accepting = True
 
     def pre_hook(self):
         self.threads.spawn(self._listen)
@@ -171,17 +197,25 @@ class _ZMQIn(_ZMQ):
     def consume(self, event, *args, **kwargs):
         self.logger.warning("Received event on queue, but this actor does not consume. Event has been discarded", event=event)
 
+    def stop_accepting(self):
+        self.accepting = False
+
     def _listen(self):
-        while self.loop():
+        while self.loop() and self.accepting:
             try:
-                items = self.poller.poll()
+                items = self.poller.poll(self.POLL_TIMEOUT)
             except KeyboardInterrupt:
                 break
 
             if items:
-                event = self.socket.recv_multipart()
-                event = pickle.loads(event[0])
-                self.send_event(event)
+                try:
+                    events = self.codec.decode_many(self.socket.recv_multipart())
+                except Exception as err:
+                    self.logger.error("Received invalid event format: {err}".format(err=err))
+                    continue
+
+                for event in events:
+                    self.send_event(event)
 
 
 class ZMQPush(_ZMQOut):
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+#
+# -*- coding: utf-8 -*-
+#
+#  attributepath.py
+#
+#  Copyright 2014 Adam Fiebig <fiebig.adam@gmail.com>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+"""
+Compiled accessors for attribute paths, such as "data/header/http" or ("data", "header", "http").
+
+Every step of a path is either a dictionary key or an object attribute, depending on the value the previous step resolved to.
+Paths are compiled once into an AttributePath with a getter and a setter, and compiled paths are cached, so actors compile
+their paths at construction and event.lookup does not re-parse a path that it has seen before.
+"""
+
+__all__ = ["AttributePath", "compile_path"]
+
+_MISSING = object()
+_MAX_CACHED_PATHS = 1024
+_compiled_paths = {}
+
+
+class AttributePath(object):
+
+    '''**A compiled attribute path**
+
+    Parameters:
+
+        steps (tuple(str)):
+            | The dictionary keys or attribute names to follow, in order
+        attributes (Optional[bool]):
+            | If False, only dictionaries are followed and any other value along the path is treated as missing
+            | (Default: True)
+    '''
+
+    __slots__ = ("steps", "get", "set")
+
+    def __init__(self, steps, attributes=True):
+        self.steps = tuple(steps)
+        if not self.steps:
+            raise ValueError("An attribute path must have at least one step")
+
+        self.get = _compile_getter(self.steps, attributes)
+        self.set = _compile_setter(self.steps)
+
+    def __repr__(self):
+        return "AttributePath({0!r})".format(self.steps)
+
+
+def _compile_getter(steps, attributes):
+    def get(obj, default=None):
+        '''Returns the value at the end of the path in <obj>, or <default> if any step of the path is missing'''
+        for step in steps:
+            if isinstance(obj, dict):
+                obj = obj.get(step, _MISSING)
+            elif attributes:
+                obj = getattr(obj, step, _MISSING)
+            else:
+                return default
+
+            if obj is _MISSING:
+                return default
+        return obj
+
+    return get
+
+
+def _compile_setter(steps):
+    parents, last = steps[:-1], steps[-1]
+
+    def set(obj, value):
+        '''
+        Sets the value at the end of the path in <obj> to <value>. Missing dictionary keys along the path are created as new
+        dictionaries, as are object attributes that are missing or empty
+        '''
+        for step in parents:
+            if isinstance(obj, dict):
+                try:
+                    obj = obj[step]
+                except KeyError:
+                    obj[step] = obj = {}
+            else:
+                child = getattr(obj, step, None)
+                if not child:
+                    setattr(obj, step, {})
+                    # Property setters (such as event.data) may store a converted copy, so the stored value is read back
+                    child = getattr(obj, step)
+                obj = child
+
+        if isinstance(obj, dict):
+            obj[last] = value
+        else:
+            setattr(obj, last, value)
+
+    return set
+
+
+def compile_path(path, separator="/", attributes=True):
+    '''
+    Returns a cached AttributePath for <path>, which is either a <separator> delimited string or a sequence of steps.
+    See AttributePath for <attributes>
+    '''
+    key = (path, separator, attributes) if isinstance(path, basestring) else (tuple(path), attributes)
+    try:
+        return _compiled_paths[key]
+    except KeyError:
+        pass
+
+    if len(_compiled_paths) >= _MAX_CACHED_PATHS:
+        _compiled_paths.clear()
+
+    steps = path.split(separator) if isinstance(path, basestring) else path
+    compiled = _compiled_paths[key] = AttributePath(steps, attributes=attributes)
+    return compiled
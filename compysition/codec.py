@@ -0,0 +1,359 @@
+#!/usr/bin/env python
+#
+# -*- coding: utf-8 -*-
+#
+#  codec.py
+#
+#  Copyright 2014 Adam Fiebig <fiebig.adam@gmail.com>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+"""
+Codecs that encode events for network transports (ZMQPush/ZMQPull, TCPOut/TCPIn and the MDP actors).
+
+A codec encodes an event as a fixed number of frames. Message based transports send the frames of one or more events as a
+single multipart message, while stream based transports concatenate them with a length prefix per frame (See EventCodec.dumps).
+Stream based transports may also write and read that buffer incrementally (See EventCodec.iter_dumps and EventCodec.load), so
+that events holding StreamData are passed through without holding their data in memory.
+"""
+
+from compysition.errors import EventCodecError
+from compysition.event import built_classes, StreamData
+from datetime import datetime
+import cPickle as pickle
+import marshal
+import abc
+import struct
+import tempfile
+
+__all__ = ["EventCodec", "BinaryCodec", "PickleCodec"]
+
+_LENGTH = struct.Struct("!I")
+
+
+class EventCodec(object):
+
+    '''**Base class for event codecs**
+
+    Implementations encode an event as a list of exactly <frames_per_event> frames, and decode that list back into an event.
+    Frames are byte strings, or objects that support the buffer interface (such as a memory map of spooled StreamData)
+    '''
+
+    __metaclass__ = abc.ABCMeta
+
+    frames_per_event = 1
+
+    @abc.abstractmethod
+    def encode(self, event):
+        """Returns <event> as a list of <frames_per_event> frames"""
+        pass
+
+    @abc.abstractmethod
+    def decode(self, frames):
+        """Returns the event encoded in <frames>"""
+        pass
+
+    def encode_many(self, events):
+        frames = []
+        for event in events:
+            frames.extend(self.encode(event))
+        return frames
+
+    def decode_many(self, frames):
+        count = self.frames_per_event
+        if len(frames) % count != 0:
+            raise EventCodecError("Expected a multiple of {count} frames, received {received}".format(count=count, received=len(frames)))
+
+        return [self.decode(frames[index:index + count]) for index in xrange(0, len(frames), count)]
+
+    def dumps(self, events):
+        '''Returns one or more events as a single buffer of length prefixed frames'''
+        if not isinstance(events, list):
+            events = [events]
+
+        buffer = []
+        for frame in self.encode_many(events):
+            buffer.append(_LENGTH.pack(len(frame)))
+            buffer.append(frame)
+        return "".join(buffer)
+
+    def loads(self, buffer):
+        '''Returns the list of events in a buffer created by dumps'''
+        frames = []
+        offset = 0
+        while offset < len(buffer):
+            if offset + _LENGTH.size > len(buffer):
+                raise EventCodecError("Truncated frame length at offset {0}".format(offset))
+
+            length, = _LENGTH.unpack_from(buffer, offset)
+            offset += _LENGTH.size
+            if offset + length > len(buffer):
+                raise EventCodecError("Truncated frame at offset {0}".format(offset))
+
+            frames.append(buffer[offset:offset + length])
+            offset += length
+
+        return self.decode_many(frames)
+
+    def iter_dumps(self, events):
+        '''Yields the buffer created by dumps in one or more parts, which are meant to be written to a stream in order'''
+        yield self.dumps(events)
+
+    def load(self, file):
+        '''Returns the list of events read from a file-like object, up to its end, that holds a buffer created by dumps'''
+        return self.loads(file.read())
+
+
+class PickleCodec(EventCodec):
+
+    '''**Encodes every event as a single pickled frame**
+
+    This is the wire format used before BinaryCodec was introduced, and may be used to exchange events with peers running an
+    older version. Both ends must have identical event class definitions
+    '''
+
+    def encode(self, event):
+        return [pickle.dumps(event, pickle.HIGHEST_PROTOCOL)]
+
+    def decode(self, frames):
+        try:
+            return pickle.loads(frames[0])
+        except Exception as err:
+            raise EventCodecError("Unable to unpickle event: {0}".format(err))
+
+    def dumps(self, events):
+        return pickle.dumps(events, pickle.HIGHEST_PROTOCOL)
+
+    def loads(self, buffer):
+        events = self.decode([buffer])
+        if not isinstance(events, list):
+            events = [events]
+        return events
+
+
+class BinaryCodec(EventCodec):
+
+    '''**Encodes every event as a compact binary header frame and a payload frame**
+
+    The header frame holds a version byte, the event class name, the event_id, meta_id, service and created time in a fixed
+    binary layout, followed by all other event properties. The payload frame holds event.data_string() verbatim for XML and
+    JSON events, so data is never re-encoded. Decoded events hold that payload as RawData, so it is only parsed once
+    event.data is accessed.
+
+    Event classes are resolved by name from compysition.event.built_classes (See register_event_class), so both ends only need
+    to agree on class names. Properties and non-string data are encoded with marshal, and fall back to pickle for values
+    that marshal does not support (such as exceptions, datetimes and dict subclasses). Only decode events from trusted peers
+
+    The payload of an event holding StreamData is never read into memory: encode returns a memory map of its file as the
+    payload frame, and iter_dumps writes it in chunks. Likewise, load spools payloads larger than <spool_threshold> to a
+    temporary file and passes them on as StreamData.
+
+    Parameters:
+
+        spool_threshold (Optional[int]):
+            | The payload size in bytes above which load spools a payload to a temporary file
+            | (Default: 1048576)
+    '''
+
+    VERSION = 1
+    frames_per_event = 2
+
+    # version, flags, and the lengths of the class name, event_id, meta_id and service
+    _PREFIX = struct.Struct("!BBHHHH")
+    _CREATED = struct.Struct("!HBBBBBI")
+    # Fields that are held in the header if they are byte strings, in this order
+    _FIELDS = ("_event_id", "meta_id", "service")
+
+    # A field length that marks a field as held in the encoded properties, as it is not a byte string
+    _ABSENT = 0xFFFF
+
+    _RAW_PAYLOAD = 1
+    _CREATED_IN_HEADER = 2
+
+    _MARSHAL = "m"
+    _PICKLE = "p"
+
+    def __init__(self, spool_threshold=1024 * 1024):
+        self.__classes = {}
+        self.spool_threshold = spool_threshold
+
+    def encode(self, event):
+        stream = event.get_stream()
+        if stream is not None:
+            return [self.__encode_header(event, event.get_properties(), self._RAW_PAYLOAD), stream.buffer()]
+
+        state = event.__getstate__()
+        data = state.pop("_data", None)
+        if data.__class__ is str:
+            return [self.__encode_header(event, state, self._RAW_PAYLOAD), data]
+        return [self.__encode_header(event, state, 0), self.__dumps(data)]
+
+    def __encode_header(self, event, state, flags):
+        lengths = []
+        fields = []
+        for key in self._FIELDS:
+            value = state.get(key)
+            if value.__class__ is str and len(value) < self._ABSENT:
+                del state[key]
+                fields.append(value)
+                lengths.append(len(value))
+            else:
+                lengths.append(self._ABSENT)
+
+        created = state.get("created")
+        if created.__class__ is datetime and created.tzinfo is None:
+            del state["created"]
+            flags |= self._CREATED_IN_HEADER
+            fields.append(self._CREATED.pack(created.year, created.month, created.day, created.hour, created.minute,
+                                             created.second, created.microsecond))
+
+        name = event.__class__.__name__
+        header = [self._PREFIX.pack(self.VERSION, flags, len(name), *lengths), name]
+        header.extend(fields)
+        if state:
+            header.append(self.__dumps(state))
+
+        return "".join(header)
+
+    def decode(self, frames):
+        if len(frames) != self.frames_per_event:
+            raise EventCodecError("Expected {count} frames, received {received}".format(count=self.frames_per_event, received=len(frames)))
+
+        header, payload = frames
+        try:
+            version, flags, name_length, id_length, meta_id_length, service_length = self._PREFIX.unpack_from(header)
+            if version != self.VERSION:
+                raise EventCodecError("Unsupported event codec version {0}".format(version))
+
+            offset = self._PREFIX.size + name_length
+            event_class = self.__get_class(header[self._PREFIX.size:offset])
+
+            state = {}
+            if id_length != self._ABSENT:
+                state["_event_id"] = header[offset:offset + id_length]
+                offset += id_length
+            if meta_id_length != self._ABSENT:
+                state["meta_id"] = header[offset:offset + meta_id_length]
+                offset += meta_id_length
+            if service_length != self._ABSENT:
+                state["service"] = header[offset:offset + service_length]
+                offset += service_length
+
+            if flags & self._CREATED_IN_HEADER:
+                state["created"] = datetime(*self._CREATED.unpack_from(header, offset))
+                offset += self._CREATED.size
+
+            if offset < len(header):
+                state.update(self.__loads(header[offset:]))
+
+            state["_data"] = payload if flags & self._RAW_PAYLOAD else self.__loads(payload)
+        except EventCodecError:
+            raise
+        except Exception as err:
+            raise EventCodecError("Malformed event header: {0}".format(err))
+
+        event = event_class.__new__(event_class)
+        event.__setstate__(state)
+        return event
+
+    def dumps(self, events):
+        return "".join(self.iter_dumps(events))
+
+    def iter_dumps(self, events):
+        if not isinstance(events, list):
+            events = [events]
+
+        for event in events:
+            stream = event.get_stream()
+            if stream is None:
+                for frame in self.encode(event):
+                    yield _LENGTH.pack(len(frame))
+                    yield frame
+            else:
+                header = self.__encode_header(event, event.get_properties(), self._RAW_PAYLOAD)
+                yield _LENGTH.pack(len(header))
+                yield header
+                yield _LENGTH.pack(len(stream))
+                for chunk in stream.chunks():
+                    yield chunk
+
+    def load(self, file):
+        events = []
+        while True:
+            length = file.read(_LENGTH.size)
+            if not length:
+                break
+
+            header = self.__read(file, self.__read_length(file, length))
+            payload_length = self.__read_length(file)
+            if len(header) > 1 and ord(header[1]) & self._RAW_PAYLOAD and payload_length > self.spool_threshold:
+                payload = StreamData(self.__spool(file, payload_length))
+            else:
+                payload = self.__read(file, payload_length)
+
+            events.append(self.decode([header, payload]))
+
+        return events
+
+    def __read_length(self, file, length=None):
+        if length is None:
+            length = file.read(_LENGTH.size)
+        if len(length) != _LENGTH.size:
+            raise EventCodecError("Truncated frame length")
+        return _LENGTH.unpack(length)[0]
+
+    def __read(self, file, length):
+        frame = file.read(length)
+        if len(frame) != length:
+            raise EventCodecError("Truncated frame")
+        return frame
+
+    def __spool(self, file, length):
+        spool = tempfile.SpooledTemporaryFile(max_size=self.spool_threshold)
+        while length > 0:
+            chunk = file.read(min(length, StreamData.CHUNK_SIZE))
+            if not chunk:
+                spool.close()
+                raise EventCodecError("Truncated frame")
+            spool.write(chunk)
+            length -= len(chunk)
+        return spool
+
+    def __get_class(self, name):
+        try:
+            return self.__classes[name]
+        except KeyError:
+            self.__classes = dict((cls.__name__, cls) for cls in built_classes)
+            try:
+                return self.__classes[name]
+            except KeyError:
+                raise EventCodecError("Event class '{0}' is not registered".format(name))
+
+    def __dumps(self, value):
+        try:
+            return self._MARSHAL + marshal.dumps(value, 2)
+        except ValueError:
+            return self._PICKLE + pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    def __loads(self, encoded):
+        if encoded[0] == self._MARSHAL:
+            return marshal.loads(encoded[1:])
+        elif encoded[0] == self._PICKLE:
+            return pickle.loads(encoded[1:])
+
+        raise EventCodecError("Unknown value encoding '{0}'".format(encoded[0]))
@@ -0,0 +1,294 @@
+#!/usr/bin/env python
+#
+# -*- coding: utf-8 -*-
+#
+#  conversion.py
+#
+#  Copyright 2014 Adam Fiebig <fiebig.adam@gmail.com>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+"""
+Direct conversion between lxml trees and dict/list data.
+
+These functions walk the tree (or the dict) once and build the other representation in place, rather than serializing to a
+string and parsing it again. The output matches what xmltodict.parse and xmltodict.unparse (using the unescaped XML generator
+of compysition.event) produce for the same input:
+
+    - Attributes are keyed as '@name' and precede child elements. Text is keyed as '#text' and follows them
+    - Repeated child elements become a list, and an element without attributes or children becomes its stripped text (or None)
+    - Namespace prefixes are kept in keys ('prefix:tag'), and namespace declarations appear as '@xmlns' and '@xmlns:prefix'
+    - A text value that contains a single XML element is embedded as that element rather than being escaped
+
+The only difference is that several namespace declarations on the same element may be ordered differently, as lxml does not
+expose the order in which they were declared.
+"""
+
+from collections import OrderedDict
+from lxml import etree
+import json
+
+__all__ = ["element_to_dict", "dict_to_element", "normalize_json"]
+
+_XML_NAMESPACE = "http://www.w3.org/XML/1998/namespace"
+_ATTR_PREFIX = "@"
+_TEXT_KEY = "#text"
+
+
+def _unicode(value):
+    if value.__class__ is unicode:
+        return value
+    return value.decode("utf-8")
+
+
+def _qualified_name(name, prefix):
+    """Converts an lxml '{uri}local' name into 'prefix:local'"""
+    if name[0] != "{":
+        return _unicode(name)
+
+    local = name.split("}", 1)[1]
+    if prefix:
+        return u"{0}:{1}".format(prefix, local)
+    return _unicode(local)
+
+
+def _push(item, key, value):
+    try:
+        current = item[key]
+    except KeyError:
+        item[key] = value
+    else:
+        if isinstance(current, list):
+            current.append(value)
+        else:
+            item[key] = [current, value]
+
+
+def _element_to_value(element, parent_nsmap):
+    item = None
+    nsmap = element.nsmap
+    if nsmap != parent_nsmap:
+        for prefix, uri in nsmap.iteritems():
+            if parent_nsmap.get(prefix) != uri:
+                if item is None:
+                    item = OrderedDict()
+                item[u"@xmlns:{0}".format(prefix) if prefix else u"@xmlns"] = _unicode(uri)
+
+    attrib = element.attrib
+    if attrib:
+        prefixes = None
+        if item is None:
+            item = OrderedDict()
+        for name, value in attrib.iteritems():
+            if name[0] == "{":
+                if prefixes is None:
+                    prefixes = dict((uri, prefix) for prefix, uri in nsmap.iteritems() if prefix)
+                    prefixes[_XML_NAMESPACE] = "xml"
+                name = _qualified_name(name, prefixes.get(name[1:].split("}", 1)[0]))
+            item[_ATTR_PREFIX + _unicode(name)] = _unicode(value)
+
+    text = element.text
+    data = [text] if text else []
+    for child in element:
+        tag = child.tag
+        if tag.__class__ is str or tag.__class__ is unicode:
+            # Comments and processing instructions are skipped, but their tails are kept
+            if item is None:
+                item = OrderedDict()
+            _push(item, _qualified_name(tag, child.prefix), _element_to_value(child, nsmap))
+        if child.tail:
+            data.append(child.tail)
+
+    if data:
+        data = _unicode("".join(data)).strip() or None
+    else:
+        data = None
+
+    if item is None:
+        return data
+
+    if data:
+        _push(item, _TEXT_KEY, data)
+    return item
+
+
+def element_to_dict(element):
+    """
+    Returns an OrderedDict of {root tag: value} for an lxml element or element tree, equivalent to xmltodict.parse(etree.tostring(element))
+    """
+    if not isinstance(element, etree._Element):
+        element = element.getroot()
+        if element is None:
+            raise ValueError("Unable to convert a tree without a root element")
+
+    return OrderedDict(((_qualified_name(element.tag, element.prefix), _element_to_value(element, {})), ))
+
+
+def _resolve(name, scope, is_attribute=False):
+    """Converts 'prefix:local' into an lxml '{uri}local' name using the namespace declarations in <scope>"""
+    if ":" in name:
+        prefix, local = name.split(":", 1)
+        try:
+            return "{{{0}}}{1}".format(scope[prefix], local)
+        except KeyError:
+            raise ValueError("Namespace prefix '{0}' is not defined for '{1}'".format(prefix, name))
+    elif not is_attribute and None in scope:
+        return "{{{0}}}{1}".format(scope[None], name)
+
+    return name
+
+
+def _set_text(parent, text):
+    """Sets <text> after the last child of <parent>. Text that contains a single XML element is embedded as that element"""
+    stripped = text.lstrip()
+    element = None
+    if stripped.startswith("<"):
+        try:
+            element = etree.fromstring(stripped)
+        except (etree.XMLSyntaxError, ValueError):
+            element = None
+
+    if element is not None:
+        _append_text(parent, text[:len(text) - len(stripped)])
+        element.tail = stripped[len(stripped.rstrip()):] or None
+        parent.append(element)
+    else:
+        _append_text(parent, text)
+
+
+def _append_text(parent, text):
+    if not text:
+        return
+
+    if len(parent):
+        last = parent[-1]
+        last.tail = (last.tail or "") + text
+    else:
+        parent.text = (parent.text or "") + text
+
+
+def _emit(parent, key, value, scope):
+    if not hasattr(value, "__iter__") or isinstance(value, (basestring, dict)):
+        value = (value, )
+
+    for item in value:
+        if item is None:
+            item = ()
+        elif item is True:
+            item = ((_TEXT_KEY, u"true"), )
+        elif item is False:
+            item = ((_TEXT_KEY, u"false"), )
+        elif isinstance(item, basestring):
+            item = ((_TEXT_KEY, item), )
+        elif not isinstance(item, dict):
+            item = ((_TEXT_KEY, unicode(item)), )
+        else:
+            item = item.iteritems()
+
+        text = None
+        attributes = []
+        children = []
+        nsmap = None
+        for child_key, child_value in item:
+            if child_key == _TEXT_KEY:
+                text = child_value
+            elif child_key.startswith(_ATTR_PREFIX):
+                name = child_key[1:]
+                if name == "xmlns" and isinstance(child_value, dict):
+                    nsmap = nsmap or {}
+                    for prefix, uri in child_value.iteritems():
+                        nsmap[prefix or None] = _unicode(uri)
+                elif name == "xmlns" or name.startswith("xmlns:"):
+                    nsmap = nsmap or {}
+                    nsmap[name[6:] or None] = _unicode(child_value if isinstance(child_value, basestring) else unicode(child_value))
+                else:
+                    attributes.append((name, child_value if isinstance(child_value, basestring) else unicode(child_value)))
+            else:
+                children.append((child_key, child_value))
+
+        element_scope = scope
+        if nsmap:
+            element_scope = dict(scope)
+            element_scope.update(nsmap)
+            if nsmap.get(None) == u"":
+                # xmlns="" undeclares the default namespace
+                del nsmap[None], element_scope[None]
+
+        tag = _resolve(key, element_scope)
+        if parent is None:
+            element = etree.Element(tag, nsmap=nsmap)
+        else:
+            element = etree.SubElement(parent, tag, nsmap=nsmap)
+
+        for name, attribute in attributes:
+            element.set(_resolve(name, element_scope, is_attribute=True), _unicode(attribute))
+
+        for child_key, child_value in children:
+            _emit(element, child_key, child_value, element_scope)
+
+        if text is not None:
+            _set_text(element, _unicode(text) if isinstance(text, basestring) else unicode(text))
+
+        if parent is None:
+            return element
+
+
+def dict_to_element(data):
+    """
+    Returns an lxml element built from a dict with a single root key, equivalent to etree.fromstring(xmltodict.unparse(data))
+    """
+    if len(data) != 1:
+        raise ValueError("Document must have exactly one root.")
+
+    key, value = data.items()[0]
+    if hasattr(value, "__iter__") and not isinstance(value, (basestring, dict)):
+        value = list(value)
+        if len(value) != 1:
+            raise ValueError("document with multiple roots")
+
+    return _emit(None, key, value, {"xml": _XML_NAMESPACE})
+
+
+def _normalize_key(key):
+    if isinstance(key, basestring):
+        return _unicode(key)
+    elif key is None or isinstance(key, (bool, int, long, float)):
+        return unicode(json.dumps(key))
+
+    raise TypeError("key {0!r} is not a string".format(key))
+
+
+def normalize_json(data):
+    """
+    Returns a deep copy of <data> that consists only of JSON types, equivalent to json.loads(json.dumps(data)):
+    dicts become plain dicts with unicode keys, tuples become lists and strings become unicode
+    """
+    if isinstance(data, dict):
+        return dict((_normalize_key(key), normalize_json(value)) for key, value in data.iteritems())
+    elif isinstance(data, (list, tuple)):
+        return [normalize_json(value) for value in data]
+    elif isinstance(data, basestring):
+        return data.decode("utf-8") if isinstance(data, str) else unicode(data)
+    elif data is None or data is True or data is False:
+        return data
+    elif isinstance(data, (int, long)):
+        return int(data)
+    elif isinstance(data, float):
+        return float(data)
+
+    raise TypeError("{0!r} is not JSON serializable".format(data))
@@ -23,7 +23,14 @@
 
 from compysition.actors import Null, STDOUT, EventLogger
 from compysition.errors import ActorInitFailure
-from gevent import signal as gsignal, event
+from compysition.scheduler import RetryScheduler
+from compysition.metrics import MetricsRegistry, MetricsServer
+from gevent import event, sleep
+try:
+    from gevent import signal_handler as gsignal
+except ImportError:
+    from gevent import signal as gsignal
+from time import time
 import signal
 import os
 import traceback
@@ -31,12 +38,28 @@ from compysition.actor import Actor
 
 class Director(object):
 
-    def __init__(self, size=500, name="default", generate_blockdiag=True, blockdiag_dir="./build/blockdiag"):
+    DRAIN_POLL_INTERVAL = 0.05
+    LOG_FLUSH_TIMEOUT = 1
+
+    def __init__(self, size=500, name="default", generate_blockdiag=True, blockdiag_dir="./build/blockdiag", high_watermark=None, low_watermark=None,
+                 drain_timeout=30, metrics_port=None, tracer=None, flight_recorder=None,
+                 log_rate_limiter=None):
         gsignal(signal.SIGINT, self.stop)
         gsignal(signal.SIGTERM, self.stop)
         self.name = name
         self.actors = {}
         self.size = size
+        self.high_watermark = high_watermark
+        self.low_watermark = low_watermark
+        self.retry_scheduler = RetryScheduler()
+        self.drain_timeout = drain_timeout
+        self.dropped_events = {}
+        self.metrics = MetricsRegistry()
+        self.metrics_port = metrics_port
+        self.metrics_server = None
+        self.tracer = tracer
+        self.flight_recorder = flight_recorder
+        self.log_rate_limiter = log_rate_limiter
 
         self.log_actor = self.__create_actor(STDOUT, "default_stdout")
         self.error_actor = self.__create_actor(EventLogger, "default_error_logger")
@@ -84,6 +107,12 @@ class Director(object):
 
         Both syntaxes may be used interchangeably, such as in:
             director.connect_queue(test_event, (stdout, "custom_inbox_name"))
+
+        The class of a newly created queue may be selected per connection with 'queue_class' and 'queue_kwargs'. For example,
+        to spill events to disk if std_out stalls:
+            director.connect_queue(test_event, std_out, queue_class=SpillQueue, queue_kwargs={"memory_size": 1000})
+        or to consume events from std_out's inbox according to Event.priority, using 3 weighted lanes:
+            director.connect_queue(test_event, std_out, queue_class=PriorityLaneQueue, queue_kwargs={"lanes": 3, "weights": [6, 3, 1]})
         '''
         #TODO: This is currently unsupported (weird formatting to hook into pycharm 'TODO' tracker)
         '''
@@ -178,6 +207,13 @@ class Director(object):
         return self.error_actor
 
     def __create_actor(self, actor, name, *args, **kwargs):
+        kwargs.setdefault("high_watermark", self.high_watermark)
+        kwargs.setdefault("low_watermark", self.low_watermark)
+        kwargs.setdefault("retry_scheduler", self.retry_scheduler)
+        kwargs.setdefault("metrics", self.metrics)
+        kwargs.setdefault("tracer", self.tracer)
+        kwargs.setdefault("flight_recorder", self.flight_recorder)
+        kwargs.setdefault("log_rate_limiter", self.log_rate_limiter)
         return actor(name, size=self.size, *args, **kwargs)
 
     def _setup_default_connections(self):
@@ -199,6 +235,10 @@ class Director(object):
     def is_running(self):
         return self.__running
 
+    def pending_retries(self):
+        '''Returns a dict of the amount of rescued events waiting for re-delivery, keyed by actor name'''
+        return dict((name, self.retry_scheduler.pending(owner=name)) for name in self.actors.iterkeys())
+
     def start(self, block=True):
         '''Starts all registered actors.'''
         self.__running = True
@@ -210,6 +250,10 @@ class Director(object):
         self.log_actor.start()
         self.error_actor.start()
 
+        if self.metrics_port:
+            self.metrics_server = MetricsServer(self.metrics, self.metrics_port)
+            self.metrics_server.start()
+
         if self.generate_blockdiag:
             self.finalize_blockdiag()
         if block:
@@ -219,12 +263,100 @@ class Director(object):
         '''Blocks until stop() is called.'''
         self.__block.wait()
 
-    def stop(self):
-        '''Stops all input actors.'''
+    def stop(self, drain_timeout=None):
+        '''Stops all actors.
+        Unless <drain_timeout> (Default: Director.drain_timeout) is 0, the actor graph is drained first (See Director.drain)'''
+
+        if drain_timeout is None:
+            drain_timeout = self.drain_timeout
+
+        if drain_timeout > 0:
+            self.drain(drain_timeout)
 
         for actor in self.actors.values():
             actor.stop()
 
+        self.error_actor.stop()
         self.log_actor.stop()
+        self.retry_scheduler.stop()
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+            self.metrics_server = None
+        if self.tracer is not None:
+            self.tracer.close()
         self.__running = False
-        self.__block.set()
\ No newline at end of file
+        self.__block.set()
+
+    def drain(self, timeout):
+        '''Gracefully drains the actor graph.
+        Producers stop accepting new events first (See Actor.stop_accepting). Actors are then drained in topological order, so that
+        an actor is only waited on once the actors upstream of it are empty. Draining ends when every actor is drained, or once
+        <timeout> seconds have passed.
+        Returns the amount of events that were left unprocessed. These are counted per actor name in Director.dropped_events'''
+
+        actors = self.__get_drain_order()
+        for actor in actors:
+            actor.stop_accepting()
+
+        deadline = time() + timeout
+        while not self.__drain_pass(actors, deadline) and time() < deadline:
+            pass
+
+        self.dropped_events = dict((actor.name, actor.pending_events()) for actor in actors if not actor.is_drained())
+        dropped = sum(self.dropped_events.values())
+        if dropped > 0:
+            self.log_actor.logger.warning("Drain deadline of {timeout} seconds passed. Dropped {dropped} unprocessed events: {actors}".format(
+                timeout=timeout, dropped=dropped, actors=self.dropped_events))
+        else:
+            self.log_actor.logger.info("Drained all actors")
+
+        self.__drain_pass([self.log_actor], time() + self.LOG_FLUSH_TIMEOUT)
+        return dropped
+
+    def __drain_pass(self, actors, deadline):
+        '''Waits for each of <actors> in turn to drain, until <deadline>. Returns True if all actors are drained afterwards'''
+        for actor in actors:
+            while not actor.is_drained() and time() < deadline:
+                sleep(self.DRAIN_POLL_INTERVAL)
+
+        return all(actor.is_drained() for actor in actors)
+
+    def __get_drain_order(self):
+        '''Returns all actors ordered so that every actor precedes the actors it sends events to. Cycles are broken arbitrarily'''
+        actors = list(self.actors.values())
+        for actor in (self.error_actor, self.log_actor):
+            if actor not in actors:
+                actors.append(actor)
+
+        consumers = {}
+        for actor in actors:
+            for queue in actor.pool.inbound.values():
+                consumers[id(queue)] = actor
+
+        destinations = {}
+        has_source = set()
+        for actor in actors:
+            destinations[actor] = []
+            for pool in (actor.pool.outbound, actor.pool.error, actor.pool.logs):
+                for queue in pool.values():
+                    consumer = consumers.get(id(queue), None)
+                    if consumer is not None and consumer is not actor:
+                        destinations[actor].append(consumer)
+                        has_source.add(consumer)
+
+        visited = set()
+        order = []
+
+        def visit(actor):
+            visited.add(actor)
+            for destination in destinations[actor]:
+                if destination not in visited:
+                    visit(destination)
+            order.append(actor)
+
+        for actor in [actor for actor in actors if actor not in has_source] + actors:
+            if actor not in visited:
+                visit(actor)
+
+        order.reverse()
+        return order
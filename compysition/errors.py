@@ -142,4 +142,8 @@ class ServiceUnavailable(CompysitionException):
 
 class EventAttributeError(CompysitionException):
     """**An event attribute necessary to the proper processing of the event was missing**"""
-    pass
\ No newline at end of file
+    pass
+
+class EventCodecError(CompysitionException):
+    """**An event could not be encoded for, or decoded from, a network transport**"""
+    pass
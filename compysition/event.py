@@ -21,17 +21,21 @@
 #  MA 02110-1301, USA.
 #
 from types import NoneType
-from uuid import uuid4 as uuid
 from .errors import *
+from .conversion import element_to_dict, dict_to_element, normalize_json
+from .attributepath import compile_path
+from itertools import count
+import os
 import json
 from lxml import etree
 import xmltodict
 from collections import OrderedDict, defaultdict
-from xml.parsers import expat
 import traceback
 from xml.sax.saxutils import XMLGenerator
 import re
+import weakref
 from copy import deepcopy
+import mmap
 from datetime import datetime
 
 """
@@ -41,6 +45,39 @@ Compysition event is created and passed by reference among actors
 DEFAULT_EVENT_SERVICE = "default"
 DEFAULT = object()
 
+# IDs are handed out in blocks. The process ID is checked once per block, so that a process forked without a fork hook
+# regenerates its prefix
+_ID_BLOCK_SIZE = 4096
+_id_counter = count()
+_id_block_end = 0
+_id_pid = None
+_id_prefix = None
+
+
+def _reset_id_prefix():
+    global _id_pid, _id_prefix
+    _id_pid, _id_prefix = os.getpid(), os.urandom(8).encode("hex")
+
+
+_reset_id_prefix()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_id_prefix)
+
+
+def generate_id():
+    """
+    Generates a unique 32 character hexadecimal event ID. IDs consist of a random per-process prefix and an increasing counter,
+    which is far cheaper than a uuid4 per event. The prefix is regenerated in the child of a fork
+    """
+    global _id_block_end
+    index = next(_id_counter)
+    if index >= _id_block_end:
+        _id_block_end = index + _ID_BLOCK_SIZE
+        if os.getpid() != _id_pid:
+            _reset_id_prefix()
+
+    return "{0}{1:016x}".format(_id_prefix, index)
+
 
 def internal_xmlify(_json):
     if isinstance(_json, list) or len(_json) > 1:
@@ -61,12 +98,6 @@ def remove_internal_xmlify(_json):
     return _json
 
 
-class NullLookupValue(object):
-
-    def get(self, key, value=None):
-        return self
-
-
 class UnescapedDictXMLGenerator(XMLGenerator):
     """
     Simple class designed to enable the use of an unescaped functionality
@@ -88,6 +119,82 @@ _XML_TYPES = [etree._Element, etree._ElementTree, etree._XSLTResultTree]
 _JSON_TYPES = [dict, list, OrderedDict]
 
 
+class RawData(str):
+    """
+    Serialized event data that has not been parsed yet. Data of this type is accepted by every event type, but is only parsed
+    into the native data format of the event once event.data is accessed. Until then, the event is serialized (See data_string
+    and __getstate__) by emitting the raw data verbatim, so events that are only routed and forwarded are never parsed
+    """
+    pass
+
+
+class StreamData(object):
+    """
+    Serialized event data that is held in a seekable file-like object, such as a spooled HTTP request body, and has not been
+    parsed yet. Like RawData, it is accepted by every event type and only parsed once event.data is accessed. XML events parse it
+    incrementally from the file, so a large body is never held in memory as a string. Readers never depend on the current
+    position of the file, so events that share the same StreamData (e.g. clones) may read it independently
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def __len__(self):
+        self.stream.seek(0, os.SEEK_END)
+        return self.stream.tell()
+
+    def __str__(self):
+        return self.read()
+
+    def open(self):
+        """Returns the underlying file, positioned at its start. It must be read before yielding to other greenlets"""
+        self.stream.seek(0)
+        return self.stream
+
+    def read(self):
+        return self.open().read()
+
+    def chunks(self, size=CHUNK_SIZE):
+        """Yields the data in chunks of <size> bytes"""
+        offset = 0
+        while True:
+            self.stream.seek(offset)
+            chunk = self.stream.read(size)
+            if not chunk:
+                break
+            offset += len(chunk)
+            yield chunk
+
+    def buffer(self):
+        """
+        Returns the data as an object that supports the buffer interface. If the data is held in a file on disk, this is a
+        read-only memory map of that file, which can be sent (e.g. with zmq copy=False) without reading it into memory
+        """
+        try:
+            return mmap.mmap(self.stream.fileno(), 0, access=mmap.ACCESS_READ)
+        except (AttributeError, EnvironmentError, ValueError):
+            return self.read()
+
+
+_UNPARSED_TYPES = (RawData, StreamData)
+
+# Data of these types is always converted into a new object that no caller holds a reference to
+_FRESH_DATA_TYPES = (NoneType, str, RawData, StreamData)
+
+
+class _SharedPayload(object):
+    """
+    Tracks every event that currently shares a single 'data' reference after a copy-on-write fan-out.
+    Holders are weakly referenced, so an event that has been dropped (e.g. by an actor that has finished sending it)
+    no longer forces a copy on the remaining holders
+    """
+
+    def __init__(self, *events):
+        self.holders = weakref.WeakSet(events)
+
+
 class DataFormatInterface(object):
     """
     Interface used as an identifier for data format classes. Used during event type conversion
@@ -104,20 +211,64 @@ class Event(object):
         - meta_id:  The ID associated with other unique event data flows. This ID is used in logging
         - service:  (default: default) Used for compatability with the ZeroMQ MajorDomo configuration. Scope this to specific types of interprocess routing
         - data:     <The data passed and worked on from event to event. Mutable and variable>
+        - priority: (default: None) The priority lane this event is placed in on actor inboxes connected with a PriorityLaneQueue.
+                        0 is the highest priority. None places the event in the default lane of the queue
+        - trace:    (default: None) A list of hop records if this event was sampled for tracing, False if it was not sampled,
+                        or None if no sampling decision was made yet. See compysition.tracing
+        - rescue_attempts: (default: None) A dict of the amount of times this event was rescued, keyed by actor name
         - kwargs:   All other kwargs passed upon Event instantiation will be added to the event dictionary
 
     """
 
+    # Properties every event has are held in fixed slots. All other properties are held in the instance __dict__
+    __slots__ = ("_event_id", "meta_id", "service", "created", "_error", "_data", "__dict__", "__weakref__")
+    _HEADER = ("_event_id", "meta_id", "service", "created", "_error", "_data")
+    # Internal state that is never copied to a converted event, pickled or reported as a property
+    _TRANSIENT = ("_cow", "_serialized")
+    # Bookkeeping that is carried with the event but is not reported as a property
+    _UNREPORTED = ("data", "_data", "trace", "rescue_attempts")
+
     _content_type = "text/plain"
+    _cow = None
+    # A dict of serialized forms of event.data keyed by format, None if nothing was cached yet, or False if event.data was
+    # handed out (and may have been modified in place) since it was last assigned
+    _serialized = None
+    priority = None
+    trace = None
+    rescue_attempts = None
 
     def __init__(self, meta_id=None, service=None, data=None, *args, **kwargs):
-        self.event_id = uuid().get_hex()
-        self.meta_id = meta_id if meta_id else self.event_id
+        self._event_id = generate_id()
+        self.meta_id = meta_id or self._event_id
         self.service = service or DEFAULT_EVENT_SERVICE
         self.data = data
-        self.error = None
+        self._error = None
         self.created = datetime.now()
-        self.__dict__.update(kwargs)
+        if kwargs:
+            self._set_state(kwargs)
+
+    def _get_state(self):
+        """
+        Returns a dictionary of all properties of this event, including those held in slots
+        """
+        state = dict(self.__dict__)
+        for key in self._HEADER:
+            try:
+                state[key] = getattr(self, key)
+            except AttributeError:
+                pass
+
+        return state
+
+    def _set_state(self, state):
+        """
+        Sets the properties in <state> directly, without passing through property setters
+        """
+        for key, value in state.iteritems():
+            if key in self._HEADER:
+                setattr(self, key, value)
+            else:
+                self.__dict__[key] = value
 
     def set(self, key, value):
         try:
@@ -134,12 +285,46 @@ class Event(object):
 
     @property
     def data(self):
+        if self._data.__class__ is RawData:
+            # Parsing creates a new object, which also detaches this event from any copy-on-write sharing
+            self.data = str(self._data)
+        elif self._data.__class__ is StreamData:
+            self.data = self._parse_stream(self._data)
+        elif self._cow is not None:
+            self._detach_payload()
+
+        if self._serialized is not False:
+            self._serialized = False
         return self._data
 
+    def is_raw(self):
+        """True if event.data holds RawData or StreamData that has not been parsed yet"""
+        return self._data.__class__ in _UNPARSED_TYPES
+
+    def get_stream(self):
+        """Returns the StreamData held by this event without parsing it, or None if event.data is not StreamData"""
+        return self._data if self._data.__class__ is StreamData else None
+
+    def _parse_stream(self, stream):
+        """Returns the data of <stream> in a form that can be assigned to event.data"""
+        return stream.read()
+
     @data.setter
     def data(self, data):
+        self._set_data(data)
+
+    def _set_data(self, data, conversion=None):
+        """Assigns <data> using <conversion>, or the conversion method of this event class for the type of <data> if None"""
+        if self._cow is not None:
+            self._cow.holders.discard(self)
+            self._cow = None
+        if data.__class__ not in _FRESH_DATA_TYPES:
+            self._serialized = False
+        elif self._serialized is not None:
+            self._serialized = None
+
         try:
-            self._data = self.conversion_methods[data.__class__](data)
+            self._data = (conversion or self.conversion_methods[data.__class__])(data)
         except KeyError:
             raise InvalidEventDataModification("Data of type '{_type}' was not valid for event type {cls}: {err}".format(_type=type(data),
                                                                                           cls=self.__class__, err=traceback.format_exc()))
@@ -161,29 +346,34 @@ class Event(object):
 
     def lookup(self, path):
         """
+        Returns the value at <path>, a property name or a list of steps that are each a dictionary key or an object attribute,
+        or None if any step is missing. See compysition.attributepath
         TODO: Account for list objects in the lookup path and generate multiple results if found
         """
         if isinstance(path, str):
-            path = [path]
+            path = (path, )
 
-        value = reduce(lambda obj, key: obj.get(key, NullLookupValue()) if isinstance(obj, dict) else getattr(obj, key, NullLookupValue()), [self] + path)
-        if isinstance(value, NullLookupValue):
-            value = None
-        return value
+        return compile_path(path).get(self)
 
     def get_properties(self):
         """
         Gets a dictionary of all event properties except for event.data
         Useful when event data is too large to copy in a performant manner
         """
-        return {k: v for k, v in self.__dict__.items() if k != "data" and k != "_data"}
+        return {k: v for k, v in self._get_state().items() if k not in self._UNREPORTED and k not in self._TRANSIENT}
 
     def __getstate__(self):
-        return dict(self.__dict__)
+        state = self._get_state()
+        for key in self._TRANSIENT:
+            state.pop(key, None)
+        if state.get('_data').__class__ in _UNPARSED_TYPES:
+            state['_data'] = str(state['_data'])
+        return state
 
     def __setstate__(self, state):
-        self.__dict__ = state
-        self.data = state['_data']
+        self._set_state(state)
+        data = state['_data']
+        self.data = RawData(data) if isinstance(data, str) else data
         self.error = state.get('_error', None)
 
     def __str__(self):
@@ -223,33 +413,89 @@ class Event(object):
             return None
 
     def data_string(self):
-        return str(self.data)
+        return str(self._data)
 
-    def convert(self, convert_to):
-        if issubclass(convert_to, self.__class__):
-            # Widening conversion
-            new_class = convert_to
-        else:
-            if not issubclass(self.__class__, convert_to):
-                # A complex widening conversion
-                bases = tuple([convert_to] + filter(lambda cls: not issubclass(cls, DataFormatInterface) and not issubclass(convert_to, cls), list(self.__class__.__bases__) + [self.__class__]))
-                if len(bases) == 1:
-                    new_class = bases[0]
-                else:
-                    new_class = filter(lambda cls: cls.__bases__ == bases, built_classes)[0]
-            else:
-                # This is an attempted narrowing conversion
-                raise InvalidEventConversion("Narrowing event conversion attempted, this is not allowed <Attempted {old} -> {new}>".format(
-                        old=self.__class__, new=convert_to))
+    def _serialize(self, format, serializer):
+        """
+        Returns <serializer>(event.data), which is cached under <format> until event.data is reassigned or handed out
+        """
+        cache = self._serialized
+        if cache is False:
+            return serializer(self._data)
+        elif cache is None:
+            cache = self._serialized = {}
 
-        new_class = new_class.__new__(new_class)
-        new_class.__dict__.update(self.__dict__)
-        new_class.data = self.data
-        return new_class
+        try:
+            return cache[format]
+        except KeyError:
+            serialized = cache[format] = serializer(self._data)
+            return serialized
+
+    def convert(self, convert_to):
+        """
+        Returns a copy of this event as an instance of <convert_to>. event.data is only parsed or copied if the data format of
+        <convert_to> differs from the format of this event. Otherwise unparsed data stays unparsed, and copy-on-write shared data
+        stays shared with the converted event
+        """
+        data = self._data
+        new_class, conversion = _get_conversion_plan(self.__class__, convert_to, data.__class__)
+        if conversion is not _keep_data and data.__class__ in _UNPARSED_TYPES:
+            data = self.data
+            new_class, conversion = _get_conversion_plan(self.__class__, convert_to, data.__class__)
+
+        new_event = new_class.__new__(new_class)
+        state = self._get_state()
+        for key in self._TRANSIENT:
+            state.pop(key, None)
+        new_event._set_state(state)
+        new_event._set_data(data, conversion)
+        if self._cow is not None and new_event._data is self._data:
+            self._cow.holders.add(new_event)
+            new_event._cow = self._cow
+        return new_event
 
     def clone(self):
         return deepcopy(self)
 
+    def cow_clone(self):
+        """
+        Creates a copy of this event that shares event.data with the original (copy-on-write).
+        All other properties are copied eagerly, as they are typically small. Header properties are immutable and are shared.
+        The shared data is only copied once a holder accesses event.data while other holders are still alive, and is never
+        copied if it is reassigned instead
+        """
+        clone = self.__class__.__new__(self.__class__)
+        for key in self._HEADER:
+            try:
+                setattr(clone, key, getattr(self, key))
+            except AttributeError:
+                pass
+
+        state = dict(self.__dict__)
+        for key in self._TRANSIENT:
+            state.pop(key, None)
+        clone.__dict__.update(deepcopy(state))
+
+        if self._serialized:
+            clone._serialized = self._serialized
+
+        if self._cow is None:
+            self._cow = _SharedPayload(self)
+
+        self._cow.holders.add(clone)
+        clone._cow = self._cow
+        return clone
+
+    def _detach_payload(self):
+        """
+        Takes private ownership of a copy-on-write shared event.data. The data is only copied if other holders still exist
+        """
+        shared = self._cow
+        self._cow = None
+        shared.holders.discard(self)
+        if len(shared.holders) > 0:
+            self._data = deepcopy(self._data)
+
 
 class HttpEvent(Event):
 
@@ -288,18 +534,28 @@ class _XMLFormatInterface(DataFormatInterface):
 
     content_type = "application/xml"
 
-    conversion_methods = {str: lambda data: etree.fromstring(data)}
+    conversion_methods = {str: lambda data: etree.fromstring(data),
+                          RawData: lambda data: data,
+                          StreamData: lambda data: data}
     conversion_methods.update(dict.fromkeys(_XML_TYPES, lambda data: data))
-    conversion_methods.update(dict.fromkeys(_JSON_TYPES, lambda data: etree.fromstring(xmltodict.unparse(internal_xmlify(data)).encode('utf-8'))))
+    conversion_methods.update(dict.fromkeys(_JSON_TYPES, lambda data: dict_to_element(internal_xmlify(data))))
     conversion_methods.update({None.__class__: lambda data: etree.fromstring("<root/>")})
 
+    def _parse_stream(self, stream):
+        try:
+            return etree.parse(stream.open()).getroot()
+        except etree.XMLSyntaxError as err:
+            raise InvalidEventDataModification("Malformed data: {err}".format(err=err))
+
     def __getstate__(self):
         state = super(_XMLFormatInterface, self).__getstate__()
-        state['_data'] = etree.tostring(self.data)
+        state['_data'] = self.data_string()
         return state
 
     def data_string(self):
-        return etree.tostring(self.data)
+        if self._data.__class__ in _UNPARSED_TYPES:
+            return str(self._data)
+        return self._serialize("xml", etree.tostring)
 
     def format_error(self):
         errors = super(_XMLFormatInterface, self).format_error()
@@ -329,18 +585,22 @@ class _JSONFormatInterface(DataFormatInterface):
 
     content_type = "application/json"
 
-    conversion_methods = {str: lambda data: json.loads(data)}
-    conversion_methods.update(dict.fromkeys(_JSON_TYPES, lambda data: json.loads(json.dumps(data))))
-    conversion_methods.update(dict.fromkeys(_XML_TYPES, lambda data: remove_internal_xmlify(xmltodict.parse(etree.tostring(data), expat=expat))))
+    conversion_methods = {str: lambda data: json.loads(data),
+                          RawData: lambda data: data,
+                          StreamData: lambda data: data}
+    conversion_methods.update(dict.fromkeys(_JSON_TYPES, normalize_json))
+    conversion_methods.update(dict.fromkeys(_XML_TYPES, lambda data: remove_internal_xmlify(element_to_dict(data))))
     conversion_methods.update({None.__class__: lambda data: {}})
 
     def __getstate__(self):
         state = super(_JSONFormatInterface, self).__getstate__()
-        state['_data'] = json.dumps(self.data)
+        state['_data'] = self.data_string()
         return state
 
     def data_string(self):
-        return json.dumps(self.data)
+        if self._data.__class__ in _UNPARSED_TYPES:
+            return str(self._data)
+        return self._serialize("json", json.dumps)
 
     def error_string(self):
         error = self.format_error()
@@ -372,21 +632,120 @@ class LogEvent(Event):
 
     def __init__(self, level, origin_actor, message, id=None):
         self.id = id
-        self.event_id = uuid().get_hex()
-        self.meta_id = id or self.event_id
+        self._event_id = generate_id()
+        self.meta_id = id or self._event_id
+        self.service = DEFAULT_EVENT_SERVICE
         self.level = level
-        self.time = datetime.now().strftime('%Y-%m-%d %H:%M:%S,%f')[:-3]
+        self.created = datetime.now()
         self.origin_actor = origin_actor
         self.message = message
-        self.data = {"id":              self.id,
-                    "level":            self.level,
-                    "time":             self.time,
-                    "origin_actor":     self.origin_actor,
-                    "message":          self.message}
+        self._data = None
+        self._error = None
+
+    @property
+    def time(self):
+        """The formatted creation time. Only formatted once it is used, as many log events are never written"""
+        time = self.__dict__.get("time", None)
+        if time is None:
+            time = self.__dict__["time"] = "{0},{1:03d}".format(self.created.strftime('%Y-%m-%d %H:%M:%S'), self.created.microsecond / 1000)
+        return time
+
+    @time.setter
+    def time(self, time):
+        self.__dict__["time"] = time
+
+    @property
+    def data(self):
+        data = Event.data.fget(self)
+        if data is None:
+            data = self._data = {"id":              self.id,
+                                 "level":           self.level,
+                                 "time":            self.time,
+                                 "origin_actor":    self.origin_actor,
+                                 "message":         self.message}
+        return data
+
+    @data.setter
+    def data(self, data):
+        Event.data.fset(self, data)
+
+    def data_string(self):
+        return str(self.data)
 
 built_classes = [Event, XMLEvent, JSONEvent, HttpEvent, JSONHttpEvent, XMLHttpEvent, LogEvent]
 __all__ = map(lambda cls: cls.__name__, built_classes)
 
+# The resolved event class and data conversion method of every (source class, target class, data class) conversion that has
+# been performed
+_conversion_plans = {}
+
+
+def _keep_data(data):
+    """The conversion method of a plan that keeps the data format, under which event.data is valid for the new class as it is"""
+    return data
+
+
+def _get_conversion_plan(source, target, data_class):
+    plan_key = (source, target, data_class)
+    try:
+        return _conversion_plans[plan_key]
+    except KeyError:
+        new_class = _resolve_conversion(source, target)
+        if new_class.conversion_methods is source.conversion_methods:
+            conversion = _keep_data
+        else:
+            # None if the new class has no conversion for this data, so that assigning it raises as usual
+            conversion = new_class.conversion_methods.get(data_class, None)
+
+        plan = _conversion_plans[plan_key] = new_class, conversion
+        return plan
+
+
+def _resolve_conversion(source, target):
+    if issubclass(target, source):
+        # Widening conversion
+        return target
+
+    if issubclass(source, target):
+        # This is an attempted narrowing conversion
+        raise InvalidEventConversion("Narrowing event conversion attempted, this is not allowed <Attempted {old} -> {new}>".format(
+                old=source, new=target))
+
+    # A complex widening conversion
+    bases = tuple([target] + filter(lambda cls: not issubclass(cls, DataFormatInterface) and not issubclass(target, cls), list(source.__bases__) + [source]))
+    if len(bases) == 1:
+        return bases[0]
+
+    for cls in built_classes:
+        if cls.__bases__ == bases:
+            return cls
+
+    raise InvalidEventConversion("No event class is registered for this conversion <Attempted {old} -> {new}>. "
+                                 "Register a class that inherits from {bases} with register_event_class".format(
+                                    old=source, new=target, bases=", ".join(cls.__name__ for cls in bases)))
+
+
+def register_event_class(cls):
+    """
+    Makes <cls> resolvable as the result of Event.convert. This is required for event classes that combine a custom
+    DataFormatInterface with another event class, such as HttpEvent. Returns <cls>, so it can be used as a class decorator
+
+    Example:
+        class YAMLEvent(_YAMLFormatInterface, Event):
+            pass
+
+        @register_event_class
+        class YAMLHttpEvent(YAMLEvent, HttpEvent):
+            pass
+
+        HttpEvent().convert(YAMLEvent)  # -> YAMLHttpEvent
+    """
+    if cls not in built_classes:
+        built_classes.append(cls)
+        _conversion_plans.clear()
+
+    return cls
+
 http_code_map = defaultdict(lambda: {"status": ((500, "Internal Server Error"))},
                             {
                                 ResourceNotModified:    {"status": (304, "Not Modified")},
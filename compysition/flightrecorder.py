@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+#
+# -*- coding: utf-8 -*-
+#
+#  flightrecorder.py
+#
+#  Copyright 2014 Adam Fiebig <fiebig.adam@gmail.com>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+"""
+In-memory flight recorder for log records.
+
+Records below a level are held in a ring buffer per meta_id (or per actor, for records that do not belong to an event) instead of
+being sent to the log actors. The buffered records of a meta_id are only written once something goes wrong for it: when an ERROR
+record is logged for it, or when an event with that meta_id is sent to the error queues of an actor. Successful events therefore
+cost no log I/O, but failures are logged with their full context.
+"""
+
+from collections import deque
+from datetime import datetime
+import logging
+
+__all__ = ["FlightRecorder"]
+
+
+class FlightRecorder(object):
+
+    '''**Holds recent log records per meta_id, and releases them once that meta_id fails**
+
+    A Director shares one FlightRecorder between the loggers of all of its actors, so a failure releases the records that every
+    actor logged for the failed meta_id. Records are held as tuples, and are only turned into LogEvents by the logger that
+    releases them. Released records keep the time they were logged at
+
+    Parameters:
+
+        capacity (Optional[int]):
+            | The amount of records held per meta_id. Older records are discarded
+            | (Default: 100)
+        max_keys (Optional[int]):
+            | The amount of meta_ids (and actors) that records are held for. The records of the oldest meta_id are discarded
+            | (Default: 10000)
+        level (Optional[int]):
+            | Records below this level are held. Other records are logged as usual
+            | (Default: logging.WARNING)
+        release_level (Optional[int]):
+            | Records of at least this level release the held records of their meta_id before they are logged
+            | (Default: logging.ERROR)
+    '''
+
+    def __init__(self, capacity=100, max_keys=10000, level=logging.WARNING, release_level=logging.ERROR):
+        self.capacity = capacity
+        self.max_keys = max_keys
+        self.level = level
+        self.release_level = release_level
+        self.__records = {}
+        # (key, records) in the order that keys were added. Entries of released keys are skipped when they are reached
+        self.__keys = deque()
+
+    def __len__(self):
+        return sum(len(records) for records in self.__records.itervalues())
+
+    def record(self, level, origin_actor, message, id=None):
+        key = id or origin_actor
+        records = self.__records.get(key, None)
+        if records is None:
+            records = self.__add(key)
+        records.append((datetime.now(), level, origin_actor, message, id))
+
+    def __add(self, key):
+        while len(self.__records) >= self.max_keys:
+            oldest, records = self.__keys.popleft()
+            if self.__records.get(oldest) is records:
+                del self.__records[oldest]
+
+        if len(self.__keys) > 2 * self.max_keys:
+            self.__keys = deque(entry for entry in self.__keys if self.__records.get(entry[0]) is entry[1])
+
+        records = self.__records[key] = deque(maxlen=self.capacity)
+        self.__keys.append((key, records))
+        return records
+
+    def release(self, key):
+        '''
+        Removes the records held for <key> (a meta_id or actor name), and returns them in the order they were logged, as
+        (created, level, origin_actor, message, id) tuples
+        '''
+        return list(self.__records.pop(key, ()))
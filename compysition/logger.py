@@ -24,9 +24,102 @@
 #
 
 from compysition.event import LogEvent
-from compysition.errors import QueueFull
 import logging
+import gevent
+from time import time
 from compysition.queue import _InternalQueuePool
+from compysition.errors import QueueFull
+
+
+class _TokenBucket(object):
+
+    __slots__ = ("tokens", "updated", "exceeded", "suppressed")
+
+    def __init__(self, tokens, updated):
+        self.tokens = tokens
+        self.updated = updated
+        self.exceeded = 0
+        self.suppressed = 0
+
+
+class LogRateLimiter(object):
+
+    """**Limits the rate of log records per actor, level and message template**
+
+    Every combination of logger, level and template (the message before lazy formatting, see Logger) has a token bucket of <burst>
+    records, which refills at <rate> records per second. Records that find their bucket empty are suppressed, except for every
+    <sample_every>th of them. The amount of suppressed records is logged once per <report_interval> seconds by the logger that
+    suppressed them, at the level of the suppressed records. A Director shares one limiter between all of its actors
+
+    Args:
+        - rate(Optional[float]):
+            | The amount of records per second that are logged per template, once the burst is used up
+            | Default: 10
+        - burst(Optional[int]):
+            | The amount of records per template that are logged before records are limited
+            | Default: 50
+        - sample_every(Optional[int]):
+            | If defined, every <sample_every>th record that exceeds the rate is logged nonetheless
+            | Default: None
+        - report_interval(Optional[float]):
+            | The interval in seconds at which suppressed records are reported
+            | Default: 60
+        - max_templates(Optional[int]):
+            | The amount of templates that buckets are kept for. Idle buckets are discarded once it is reached
+            | Default: 10000
+    """
+
+    def __init__(self, rate=10, burst=50, sample_every=None, report_interval=60, max_templates=10000):
+        self.rate = rate
+        self.burst = burst
+        self.sample_every = sample_every
+        self.report_interval = report_interval
+        self.max_templates = max_templates
+        self.__buckets = {}
+        self.__report = None
+
+    def allow(self, logger, level, template):
+        """Returns True if a record of <logger> with <level> and <template> should be logged"""
+        if not isinstance(template, basestring):
+            template = type(template).__name__
+
+        key = (logger, level, template)
+        now = time()
+        bucket = self.__buckets.get(key, None)
+        if bucket is None:
+            if len(self.__buckets) >= self.max_templates:
+                self.__discard_idle(now)
+            bucket = self.__buckets[key] = _TokenBucket(self.burst, now)
+        else:
+            bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * self.rate)
+            bucket.updated = now
+
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+            return True
+
+        bucket.exceeded += 1
+        if self.sample_every and bucket.exceeded % self.sample_every == 0:
+            return True
+
+        bucket.suppressed += 1
+        if self.__report is None:
+            self.__report = gevent.spawn_later(self.report_interval, self.report)
+        return False
+
+    def __discard_idle(self, now):
+        """Discards the buckets that have no unreported suppressed records, and would be full again by now"""
+        for key, bucket in self.__buckets.items():
+            if not bucket.suppressed and bucket.tokens + (now - bucket.updated) * self.rate >= self.burst:
+                del self.__buckets[key]
+
+    def report(self):
+        """Logs the amount of suppressed records per logger, level and template, and resets these counts"""
+        self.__report = None
+        for (logger, level, template), bucket in self.__buckets.items():
+            if bucket.suppressed:
+                logger.report_suppressed(level, template, bucket.suppressed)
+                bucket.suppressed = 0
 
 class Logger(object):
 
@@ -35,58 +128,148 @@ class Logger(object):
     We use a pool in order to support multiple logging types per process. For example, sending to a third party log
     aggregator as WELL as using a filelogger
 
+    Log actors that the pool is connected to push the lowest level they write to this logger (See Actor.set_log_level), and
+    records below the lowest level of all of them are discarded before a LogEvent is created. Until a log actor is connected,
+    every record is kept.
+
+    Messages may be formatted lazily by passing their format arguments as keyword arguments, which are only applied with
+    str.format if the record is kept. Callable arguments are called at that point, so that expensive values are only computed
+    when they are logged. For example:
+        logger.debug("Received {data}", event=event, data=event.data_string)
+
+    If a LogRateLimiter is given, records that exceed its rate for their level and template are suppressed. Messages of records
+    that may be logged at a high rate should therefore be formatted lazily, so that their template does not vary.
+
+    If a FlightRecorder is given, records below its level are held by the recorder instead of being sent, until they are released
+    by a record of its release level for the same meta_id, or by Logger.release (See compysition.flightrecorder)
+
     Args:
         - name(str):
             | The name to use when sending log events
         - queue_pool(_InternalQueuePool):
             | The pool to use when sending log events
+        - recorder(Optional[FlightRecorder]):
+            | The flight recorder that holds low level records
+            | Default: None
+        - limiter(Optional[LogRateLimiter]):
+            | The rate limiter that records of this logger are subject to
+            | Default: None
     """
 
-    def __init__(self, name, queue_pool):
+    def __init__(self, name, queue_pool, recorder=None, limiter=None):
         self.name = name
         if not isinstance(queue_pool, _InternalQueuePool):
             raise TypeError("Logger queue_pool must be of type '_InternalQueuePool'")
 
         self.__pool = queue_pool
+        self.__sink_levels = {}
+        self.level = logging.NOTSET
+        self.recorder = recorder
+        self.limiter = limiter
+        # The amount of records dropped per log queue since it was last found throttled
+        self.__dropped = {}
+        self.dropped = 0
 
-    def log(self, level, message, event=None, log_entry_id=None):
+    def set_sink_level(self, sink, level):
+        """
+        Sets the lowest level that the log actor named <sink> writes. The effective level of this logger is the lowest level of
+        all of its sinks
+        """
+        self.__sink_levels[sink] = level
+        self.level = min(self.__sink_levels.itervalues())
+
+    def is_enabled_for(self, level):
+        """True if a record of <level> would be logged. Useful to guard expensive logging that can not be expressed lazily"""
+        return level >= self.level
+
+    def log(self, level, message, event=None, log_entry_id=None, **kwargs):
         """
         Uses log_entry_id explicitely as the logged ID, if defined. Otherwise, will attempt to ascertain the ID from 'event', if passed
+        Any other keyword arguments are used to format <message>, once it is known that the record is kept
         """
+        if level < self.level:
+            return
+
+        if self.limiter is not None and not self.limiter.allow(self, level, message):
+            return
+
+        if kwargs:
+            for key, value in kwargs.iteritems():
+                if callable(value):
+                    kwargs[key] = value()
+            message = message.format(**kwargs)
+
         if not log_entry_id:
             if event:
                 log_entry_id = event.meta_id
 
-        for key in self.__pool.keys():
-            try:
-                log_event = LogEvent(level, self.name, message, id=log_entry_id)
-                self.__pool[key].put(log_event)
-            except QueueFull:
-                self.__pool.wait_until_free()
-                self.__pool[key].put(log_event)
+        if self.recorder is not None:
+            if level < self.recorder.level:
+                self.recorder.record(level, self.name, message, id=log_entry_id)
+                return
+            elif level >= self.recorder.release_level:
+                self.release(log_entry_id or self.name)
+
+        self.__send(level, self.name, message, log_entry_id)
+
+    def report_suppressed(self, level, template, count):
+        """Sends a record of <level> that reports that <count> records with <template> were suppressed by the rate limiter"""
+        self.__send(level, self.name, "Suppressed {count} log records like: {template}".format(count=count, template=template), None)
+
+    def release(self, key):
+        """Sends the records that the flight recorder holds for <key> (a meta_id or actor name), if any"""
+        if self.recorder is not None:
+            for created, level, origin_actor, message, id in self.recorder.release(key):
+                self.__send(level, origin_actor, message, id, created=created)
+
+    def __send(self, level, origin_actor, message, id, created=None):
+        """
+        Puts a record on every log queue. Records are never waited on, as log actors log through the same queues: a record for a
+        throttled or full queue is dropped and counted, and the count is reported once the queue accepts records again
+        """
+        for queue in self.__pool.values():
+            if queue.is_throttled() or not self.__put(queue, level, origin_actor, message, id, created):
+                self.__dropped[queue.name] = self.__dropped.get(queue.name, 0) + 1
+                self.dropped += 1
+                continue
+
+            dropped = self.__dropped.pop(queue.name, 0)
+            if dropped:
+                self.__put(queue, logging.WARNING, self.name, "Dropped {0} log records while log queue '{1}' was saturated".format(
+                    dropped, queue.name), None)
+
+    def __put(self, queue, level, origin_actor, message, id, created=None):
+        log_event = LogEvent(level, origin_actor, message, id=id)
+        if created is not None:
+            log_event.created = created
+        try:
+            queue.put(log_event, block=False)
+        except QueueFull:
+            return False
+        return True
 
-    def critical(self, message, event=None, log_entry_id=None):
+    def critical(self, message, event=None, log_entry_id=None, **kwargs):
         """Generates a log message with priority logging.CRITICAL
         """
-        self.log(logging.CRITICAL, message, event=event, log_entry_id=log_entry_id)
+        self.log(logging.CRITICAL, message, event=event, log_entry_id=log_entry_id, **kwargs)
 
-    def error(self, message, event=None, log_entry_id=None):
+    def error(self, message, event=None, log_entry_id=None, **kwargs):
         """Generates a log message with priority error(3).
         """
-        self.log(logging.ERROR, message, event=event, log_entry_id=log_entry_id)
+        self.log(logging.ERROR, message, event=event, log_entry_id=log_entry_id, **kwargs)
 
-    def warn(self, message, event=None, log_entry_id=None):
+    def warn(self, message, event=None, log_entry_id=None, **kwargs):
         """Generates a log message with priority logging.WARN
         """
-        self.log(logging.WARN, message, event=event, log_entry_id=log_entry_id)
+        self.log(logging.WARN, message, event=event, log_entry_id=log_entry_id, **kwargs)
     warning=warn
 
-    def info(self, message, event=None, log_entry_id=None):
+    def info(self, message, event=None, log_entry_id=None, **kwargs):
         """Generates a log message with priority logging.INFO.
         """
-        self.log(logging.INFO, message, event=event, log_entry_id=log_entry_id)
+        self.log(logging.INFO, message, event=event, log_entry_id=log_entry_id, **kwargs)
 
-    def debug(self, message, event=None, log_entry_id=None):
+    def debug(self, message, event=None, log_entry_id=None, **kwargs):
         """Generates a log message with priority logging.DEBUG
         """
-        self.log(logging.DEBUG, message, event=event, log_entry_id=log_entry_id)
\ No newline at end of file
+        self.log(logging.DEBUG, message, event=event, log_entry_id=log_entry_id, **kwargs)
@@ -0,0 +1,249 @@
+#!/usr/bin/env python
+#
+# -*- coding: utf-8 -*-
+#
+#  metrics.py
+#
+#  Copyright 2014 Adam Fiebig <fiebig.adam@gmail.com>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+from gevent.pywsgi import WSGIServer
+from bisect import bisect_left
+
+
+class _Metric(object):
+
+    type = None
+
+    def __init__(self, name, labels=None, function=None):
+        self.name = name
+        self.labels = labels or {}
+        self.function = function
+        self.value = 0
+
+    def get(self):
+        if self.function is not None:
+            return self.function()
+
+        return self.value
+
+    def samples(self):
+        '''Returns a list of (name suffix, extra labels, value) tuples that represent this metric'''
+        return [("", None, self.get())]
+
+
+class Counter(_Metric):
+
+    '''A monotonically increasing value. If <function> is provided, the value is read from it when collected'''
+
+    type = "counter"
+
+    def inc(self, amount=1):
+        self.value += amount
+
+
+class Gauge(_Metric):
+
+    '''A value that may go up and down. If <function> is provided, the value is read from it when collected'''
+
+    type = "gauge"
+
+    def set(self, value):
+        self.value = value
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def dec(self, amount=1):
+        self.value -= amount
+
+
+class Histogram(_Metric):
+
+    '''Counts observed values in fixed, upper-inclusive buckets, and tracks their sum and count'''
+
+    type = "histogram"
+    DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    def __init__(self, name, labels=None, buckets=DEFAULT_BUCKETS):
+        super(Histogram, self).__init__(name, labels=labels)
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def get(self):
+        return sum(self.counts)
+
+    def samples(self):
+        samples = []
+        cumulative = 0
+        for bucket, count in zip(self.buckets + ("+Inf", ), self.counts):
+            cumulative += count
+            samples.append(("_bucket", {"le": str(bucket)}, cumulative))
+
+        samples.append(("_sum", None, self.sum))
+        samples.append(("_count", None, cumulative))
+        return samples
+
+
+class _NullMetric(object):
+
+    '''Returned by a disabled MetricsRegistry. Discards all updates'''
+
+    def inc(self, amount=1):
+        pass
+
+    def dec(self, amount=1):
+        pass
+
+    def set(self, value):
+        pass
+
+    def observe(self, value):
+        pass
+
+
+class MetricsRegistry(object):
+
+    '''**A registry of counters, gauges and histograms, exposed in the Prometheus text format**
+
+    Metrics are identified by their name and labels. Requesting a metric that is already registered returns the existing metric,
+    so callers should retrieve metrics once and keep a reference to them rather than looking them up on every update.
+
+    A Director shares one MetricsRegistry between all of its actors.
+
+    Parameters:
+
+        enabled (Optional[bool]):
+            | If False, every requested metric discards its updates and nothing is exposed
+            | (Default: True)
+    '''
+
+    NULL_METRIC = _NullMetric()
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.__metrics = {}
+        self.__help = {}
+
+    def counter(self, name, help=None, labels=None, function=None):
+        return self.__get_metric(Counter, name, help, labels, function=function)
+
+    def gauge(self, name, help=None, labels=None, function=None):
+        return self.__get_metric(Gauge, name, help, labels, function=function)
+
+    def histogram(self, name, help=None, labels=None, buckets=Histogram.DEFAULT_BUCKETS):
+        return self.__get_metric(Histogram, name, help, labels, buckets=buckets)
+
+    def unregister(self, name, labels=None):
+        self.__metrics.pop((name, self.__key(labels)), None)
+
+    def metrics(self):
+        return self.__metrics.values()
+
+    def __key(self, labels):
+        return tuple(sorted((labels or {}).items()))
+
+    def __get_metric(self, metric_class, name, help, labels, **kwargs):
+        if not self.enabled:
+            return self.NULL_METRIC
+
+        key = (name, self.__key(labels))
+        metric = self.__metrics.get(key, None)
+        if metric is None:
+            metric = metric_class(name, labels=labels, **kwargs)
+            self.__metrics[key] = metric
+        elif not isinstance(metric, metric_class):
+            raise TypeError("Metric '{name}' is already registered as a {type}".format(name=name, type=metric.type))
+
+        if help:
+            self.__help[name] = help
+
+        return metric
+
+    def expose(self):
+        '''Returns all metrics in the Prometheus text exposition format'''
+        by_name = {}
+        for metric in self.__metrics.values():
+            by_name.setdefault(metric.name, []).append(metric)
+
+        lines = []
+        for name in sorted(by_name.iterkeys()):
+            metrics = by_name[name]
+            if name in self.__help:
+                lines.append("# HELP {name} {help}".format(name=name, help=self.__help[name]))
+            lines.append("# TYPE {name} {type}".format(name=name, type=metrics[0].type))
+            for metric in metrics:
+                for suffix, extra_labels, value in metric.samples():
+                    labels = dict(metric.labels)
+                    labels.update(extra_labels or {})
+                    lines.append("{name}{suffix}{labels} {value}".format(name=name, suffix=suffix, labels=self.__format_labels(labels),
+                                                                        value=repr(float(value))))
+
+        return "\n".join(lines) + "\n"
+
+    def __format_labels(self, labels):
+        if not labels:
+            return ""
+
+        return "{" + ",".join('{0}="{1}"'.format(key, self.__escape(value)) for key, value in sorted(labels.items())) + "}"
+
+    def __escape(self, value):
+        return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class MetricsServer(object):
+
+    '''**Serves the metrics of a MetricsRegistry in the Prometheus text format**
+
+    Parameters:
+
+        registry (MetricsRegistry):
+            | The registry to expose
+        port (int):
+            | The port to listen on
+        address (Optional[str]):
+            | The address to listen on
+            | (Default: 127.0.0.1)
+    '''
+
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self, registry, port, address="127.0.0.1"):
+        self.registry = registry
+        self.server = WSGIServer((address, port), self.application, log=None)
+
+    def application(self, environ, start_response):
+        if environ.get("PATH_INFO", "/") not in ("/", "/metrics"):
+            start_response("404 Not Found", [("Content-Type", "text/plain")])
+            return ["Not Found"]
+
+        body = self.registry.expose()
+        start_response("200 OK", [("Content-Type", self.CONTENT_TYPE), ("Content-Length", str(len(body)))])
+        return [body]
+
+    def start(self):
+        self.server.start()
+
+    def stop(self):
+        self.server.stop()
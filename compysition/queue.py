@@ -24,10 +24,15 @@
 
 
 from compysition.errors import QueueEmpty, QueueFull
-from gevent import sleep
 from gevent.event import Event
 import gevent.queue as gqueue
 from uuid import uuid4 as uuid
+from collections import deque
+import cPickle as pickle
+import tempfile
+import struct
+import mmap
+import os
 
 
 class _InternalQueuePool(dict):
@@ -42,18 +47,31 @@ class _InternalQueuePool(dict):
         size (Optional[int]):
             | The maxsize of each queue in this pool. A value of 0 represents an unlimited size
             | Default: 0
+        high_watermark (Optional[int]):
+            | The high watermark of each queue in this pool. See Queue
+            | Default: None
+        low_watermark (Optional[int]):
+            | The low watermark of each queue in this pool. See Queue
+            | Default: None
     """
 
-    def __init__(self, placeholder=None, size=0, *args, **kwargs):
+    def __init__(self, placeholder=None, size=0, high_watermark=None, low_watermark=None, *args, **kwargs):
         self.__size = size
+        self.__high_watermark = high_watermark
+        self.__low_watermark = low_watermark
         self.placeholder = placeholder
         super(_InternalQueuePool, self).__init__(*args, **kwargs)
         if self.placeholder:
-            self[self.placeholder] = Queue(self.placeholder, maxsize=size)
+            self[self.placeholder] = self._create_queue(self.placeholder)
+
+    def _create_queue(self, name, queue_class=None, queue_kwargs=None):
+        kwargs = {"maxsize": self.__size, "high_watermark": self.__high_watermark, "low_watermark": self.__low_watermark}
+        kwargs.update(queue_kwargs or {})
+        return (queue_class or Queue)(name, **kwargs)
 
-    def add(self, name, queue=None):
+    def add(self, name, queue=None, queue_class=None, queue_kwargs=None):
         if not queue:
-            queue = Queue(name, maxsize=self.__size)
+            queue = self._create_queue(name, queue_class=queue_class, queue_kwargs=queue_kwargs)
 
         if self.placeholder:
             if self.get(self.placeholder, None):
@@ -66,12 +84,13 @@ class _InternalQueuePool(dict):
 
 class QueuePool(object):
 
-    def __init__(self, size=0):
+    def __init__(self, size=0, high_watermark=None, low_watermark=None):
         self.__size = size
-        self.inbound = _InternalQueuePool(size=size)
-        self.outbound = _InternalQueuePool(size=size)
-        self.error = _InternalQueuePool(size=size)
-        self.logs = _InternalQueuePool(size=size, placeholder=uuid().get_hex())
+        watermarks = {"high_watermark": high_watermark, "low_watermark": low_watermark}
+        self.inbound = _InternalQueuePool(size=size, **watermarks)
+        self.outbound = _InternalQueuePool(size=size, **watermarks)
+        self.error = _InternalQueuePool(size=size, **watermarks)
+        self.logs = _InternalQueuePool(size=size, placeholder=uuid().get_hex(), **watermarks)
 
     def list_all_queues(self):
         queue_list = self.inbound.values() + self.outbound.values() + self.error.values() + self.logs.values()
@@ -84,59 +103,392 @@ class QueuePool(object):
 
 
 class Queue(gqueue.Queue):
-        
+
     '''A subclass of gevent.queue.Queue used to organize communication messaging between Compysition Actors.
 
+    'get' and 'put' block by default, using the same greenlet wakeup mechanism as gevent.queue.Queue. A blocked consumer
+    costs no CPU, and a 'put' hands the element directly to a waiting consumer.
+
+    A queue becomes 'throttled' once it holds high_watermark elements, and stays throttled until it has been drained down to
+    low_watermark elements. Producers are expected to check 'is_throttled' or call 'wait_until_free' before putting.
+
     Parameters:
 
         name (str):
             | The name of this queue. Used in certain actors to determine origin faster than reverse key-value lookup
+        maxsize (Optional[int]):
+            | The max amount of elements this queue may contain. A value of None or 0 represents an infinite size
+            | Default: None
+        high_watermark (Optional[int]):
+            | The size at which this queue becomes throttled. A value of None or 0 disables throttling
+            | Default: maxsize
+        low_watermark (Optional[int]):
+            | The size this queue must be drained to before it is no longer throttled
+            | Default: high_watermark / 2
 
     '''
 
-    def __init__(self, name, *args, **kwargs):
-        super(Queue, self).__init__(*args, **kwargs)
+    def __init__(self, name, maxsize=None, high_watermark=None, low_watermark=None, *args, **kwargs):
+        super(Queue, self).__init__(maxsize or None, *args, **kwargs)
         self.name = name
-        self.__has_content = Event()
-        self.__has_content.clear()
+        self.put_count = 0
+        self.get_count = 0
+        self.__empty = Event()
+        self.__empty.set()
+        self.__free = Event()
+        self.__free.set()
+        self._set_watermarks(high_watermark or maxsize or None, low_watermark)
+
+    def _set_watermarks(self, high_watermark, low_watermark=None):
+        self.high_watermark = high_watermark
+        if self.high_watermark:
+            self.low_watermark = min(low_watermark if low_watermark is not None else self.high_watermark / 2, self.high_watermark - 1)
+        else:
+            self.low_watermark = None
+
+        self._update_state()
 
-    def get(self, block=False, *args, **kwargs):
-        '''Gets an element from the queue.'''
+    def _update_state(self):
+        """
+        Updates the empty and throttled state of this queue. Must be called after every change in size
+        """
+        size = self._total_size()
+        if size == 0:
+            self.__empty.set()
+        else:
+            self.__empty.clear()
+
+        if not self.high_watermark:
+            self.__free.set()
+        elif size >= self.high_watermark:
+            self.__free.clear()
+        elif size <= self.low_watermark:
+            self.__free.set()
+
+    def get(self, block=True, timeout=None):
+        '''Gets an element from the queue, raising QueueEmpty if none was available (within <timeout> if blocking)'''
 
         try:
-            element = super(Queue, self).get(block=block, *args, **kwargs)
+            element = super(Queue, self).get(block=block, timeout=timeout)
         except gqueue.Empty:
-            self.__has_content.clear()
             raise QueueEmpty("Queue {0} has no waiting events".format(self.name))
 
-        if self.qsize == 0:
-            self.__has_content.clear()
-
+        self.get_count += 1
+        self._update_state()
         return element
 
-    def put(self, element, *args, **kwargs):
-        '''Puts element in queue.'''
+    def put(self, element, block=True, timeout=None):
+        '''Puts element in queue, raising QueueFull if no slot was available (within <timeout> if blocking)'''
+
         try:
-            super(Queue, self).put(element, *args, **kwargs)
-            self.__has_content.set()
+            super(Queue, self).put(element, block=block, timeout=timeout)
         except gqueue.Full:
-            raise QueueFull("Queue {0} is full".format(self.name))
+            raise QueueFull("Queue {0} is full".format(self.name), queue_name=self.name)
+
+        self.put_count += 1
+        self._update_state()
+
+    def _total_size(self):
+        """The amount of elements held by this queue, used for empty and watermark tracking"""
+        return self.qsize()
 
-    def wait_until_content(self):
+    def is_throttled(self):
+        '''Returns True if this queue has reached its high watermark and has not yet been drained to its low watermark'''
+        return not self.__free.is_set()
+
+    def wait_until_content(self, timeout=None):
         '''Blocks until at least 1 slot is taken.'''
-        self.__has_content.wait()
+        try:
+            self.peek(block=True, timeout=timeout)
+        except gqueue.Empty:
+            pass
 
-    def wait_until_empty(self):
+    def wait_until_empty(self, timeout=None):
         '''Blocks until the queue is completely empty.'''
+        self.__empty.wait(timeout=timeout)
 
-        while not self.__has_content.is_set():
-            sleep(0)
+    def wait_until_free(self, timeout=None):
+        '''Blocks until this queue is no longer throttled. Returns False if <timeout> expired first'''
+        return self.__free.wait(timeout=timeout)
 
     def dump(self, other_queue):
         """**Dump all items on this queue to another queue**"""
-        try:
-            while True:
-                other_queue.put(self.next())
-        except:
-            pass
+        while True:
+            try:
+                other_queue.put(self.get(block=False))
+            except QueueEmpty:
+                break
+
+
+class _SpillSegment(object):
+    """
+    An append-only, memory-mapped segment file of length-prefixed records
+    """
+
+    RECORD_HEADER = struct.Struct(">I")
+
+    def __init__(self, path, size):
+        self.path = path
+        self.size = size
+        self.write_offset = 0
+        self.read_offset = 0
+        self.__file = open(path, "w+b")
+        self.__file.truncate(size)
+        self.__map = mmap.mmap(self.__file.fileno(), size)
+
+    def append(self, record):
+        """Appends <record> to this segment. Returns False if the segment does not have enough space left"""
+        end = self.write_offset + self.RECORD_HEADER.size + len(record)
+        if end > self.size:
+            return False
+
+        self.RECORD_HEADER.pack_into(self.__map, self.write_offset, len(record))
+        self.__map[self.write_offset + self.RECORD_HEADER.size:end] = record
+        self.write_offset = end
+        return True
+
+    def read(self):
+        """Reads the next record from this segment, in the order they were appended. Returns None if all records have been read"""
+        if self.read_offset >= self.write_offset:
+            return None
+
+        length, = self.RECORD_HEADER.unpack_from(self.__map, self.read_offset)
+        start = self.read_offset + self.RECORD_HEADER.size
+        self.read_offset = start + length
+        return self.__map[start:self.read_offset]
+
+    def close(self):
+        self.__map.close()
+        self.__file.close()
+        os.remove(self.path)
+
+
+class SpillQueue(Queue):
+
+    '''A Queue that keeps a bounded amount of elements in memory, and spills the overflow to append-only memory-mapped segment
+    files on disk. Elements are serialized with pickle (using Event.__getstate__) when spilled, and are always returned in FIFO order.
+
+    Intended for connections to actors that may stall for long periods of time (e.g. an MDPClient without brokers), where an
+    in-memory queue would grow without bound.
+
+    Parameters:
+
+        name (str):
+            | The name of this queue
+        maxsize (Optional[int]):
+            | Used as the default for memory_size
+        memory_size (Optional[int]):
+            | The max amount of elements to hold in memory before spilling to disk
+            | Default: maxsize or SpillQueue.DEFAULT_MEMORY_SIZE
+        segment_size (Optional[int]):
+            | The size in bytes of each segment file. Elements larger than this are written to their own segment
+            | Default: 64MB
+        directory (Optional[str]):
+            | The directory to create segment files in
+            | Default: A new temporary directory
+        high_watermark (Optional[int]):
+            | The total amount of elements (in memory and on disk) at which this queue becomes throttled. A value of None disables throttling
+            | Default: None
+        low_watermark (Optional[int]):
+            | See Queue
+    '''
+
+    DEFAULT_MEMORY_SIZE = 1000
+    DEFAULT_SEGMENT_SIZE = 64 * 1024 * 1024
+
+    def __init__(self, name, maxsize=None, memory_size=None, segment_size=DEFAULT_SEGMENT_SIZE, directory=None,
+                 high_watermark=None, low_watermark=None, *args, **kwargs):
+        self.memory_size = memory_size or maxsize or self.DEFAULT_MEMORY_SIZE
+        self.segment_size = segment_size
+        self.directory = directory
+        self.__segments = deque()
+        self.__spilled = 0
+        self.__segment_count = 0
+        self.__temporary_directory = False
+        super(SpillQueue, self).__init__(name, maxsize=self.memory_size, *args, **kwargs)
+        self._set_watermarks(high_watermark, low_watermark)
+
+    def _total_size(self):
+        return self.qsize() + self.__spilled
+
+    def spilled(self):
+        '''Returns the amount of elements currently held on disk. qsize only reflects the elements held in memory'''
+        return self.__spilled
+
+    def empty(self):
+        return self._total_size() == 0
+
+    def full(self):
+        return False
+
+    def get(self, block=True, timeout=None):
+        element = super(SpillQueue, self).get(block=block, timeout=timeout)
+        if self.__spilled > 0:
+            gqueue.Queue.put(self, self.__unspill(), block=False)
+
+        return element
+
+    def put(self, element, block=True, timeout=None):
+        '''Puts element in memory, or on disk if memory is full or elements are already waiting on disk'''
+        if self.__spilled > 0 or self.qsize() >= self.memory_size:
+            self.__spill(element)
+            self.put_count += 1
+            self._update_state()
+        else:
+            super(SpillQueue, self).put(element, block=False)
+
+    def close(self):
+        '''Deletes all segment files. Any elements still on disk are lost'''
+        while self.__segments:
+            self.__segments.popleft().close()
+        self.__spilled = 0
+        self._update_state()
+
+        if self.__temporary_directory:
+            os.rmdir(self.directory)
+            self.directory = None
+            self.__temporary_directory = False
+
+    def __spill(self, element):
+        record = pickle.dumps(element, pickle.HIGHEST_PROTOCOL)
+        if not self.__segments or not self.__segments[-1].append(record):
+            segment = self.__create_segment(max(self.segment_size, len(record) + _SpillSegment.RECORD_HEADER.size))
+            segment.append(record)
+            self.__segments.append(segment)
+
+        self.__spilled += 1
+
+    def __unspill(self):
+        segment = self.__segments[0]
+        record = segment.read()
+        while record is None:
+            # Only segments that have been filled are followed by another segment, so an exhausted head segment is never written to again
+            self.__segments.popleft().close()
+            segment = self.__segments[0]
+            record = segment.read()
+
+        self.__spilled -= 1
+        if self.__spilled == 0:
+            self.__segments.popleft().close()
+
+        return pickle.loads(record)
+
+    def __create_segment(self, size):
+        if self.directory is None:
+            self.directory = tempfile.mkdtemp(prefix="compysition-spill-")
+            self.__temporary_directory = True
+        elif not os.path.exists(self.directory):
+            os.makedirs(self.directory)
+
+        self.__segment_count += 1
+        path = os.path.join(self.directory, "{name}-{id}-{count}.segment".format(name=self.name, id=id(self), count=self.__segment_count))
+        return _SpillSegment(path, size)
+
+
+class _Lanes(object):
+    """
+    A set of FIFO lanes that is dequeued using smooth weighted round robin across the lanes that currently hold elements.
+    Implements the subset of the deque interface used by gevent.queue.Queue
+    """
+
+    def __init__(self, weights, lane_function):
+        self.weights = weights
+        self.lane_function = lane_function
+        self.lanes = [deque() for weight in weights]
+        self.credits = [0] * len(weights)
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def append(self, element):
+        self.lanes[self.lane_function(element)].append(element)
+        self.size += 1
+
+    def popleft(self):
+        lane = self.__next_lane()
+        self.size -= 1
+        return self.lanes[lane].popleft()
+
+    def peek(self):
+        return self.lanes[self.__next_lane(peek=True)][0]
+
+    def __next_lane(self, peek=False):
+        selected = None
+        total_weight = 0
+        credits = list(self.credits) if peek else self.credits
+        for index, lane in enumerate(self.lanes):
+            if lane:
+                credits[index] += self.weights[index]
+                total_weight += self.weights[index]
+                if selected is None or credits[index] > credits[selected]:
+                    selected = index
+
+        if selected is None:
+            raise IndexError("No lane holds any elements")
+
+        credits[selected] -= total_weight
+        return selected
+
+
+class PriorityLaneQueue(Queue):
+
+    '''A Queue that holds elements in multiple FIFO priority lanes. Lanes are dequeued with a weighted-fair policy, so a lower
+    priority lane is never starved, but higher priority lanes receive proportionally more of the consumer throughput.
+
+    Elements are assigned to a lane using their 'priority' attribute (See Event.priority). Priority 0 is the highest priority lane.
+    Elements without a priority are placed in default_lane, and out of range priorities are clamped to the available lanes.
+
+    Parameters:
+
+        name (str):
+            | The name of this queue
+        lanes (Optional[int]):
+            | The number of priority lanes
+            | Default: 3
+        weights (Optional[list[int]]):
+            | The relative share of dequeues for each lane, highest priority lane first
+            | Default: Each lane has twice the weight of the next lower priority lane
+        default_lane (Optional[int]):
+            | The lane used for elements without a priority
+            | Default: lanes / 2
+    '''
+
+    DEFAULT_LANES = 3
+
+    def __init__(self, name, lanes=DEFAULT_LANES, weights=None, default_lane=None, *args, **kwargs):
+        self.lanes = int(lanes)
+        self.weights = weights or [2 ** (self.lanes - lane - 1) for lane in xrange(self.lanes)]
+        if len(self.weights) != self.lanes:
+            raise ValueError("Expected {lanes} lane weights, got {weights}".format(lanes=self.lanes, weights=self.weights))
+
+        self.default_lane = self.lanes / 2 if default_lane is None else default_lane
+        super(PriorityLaneQueue, self).__init__(name, *args, **kwargs)
+
+    def lane(self, element):
+        '''Returns the lane index <element> is assigned to'''
+        priority = getattr(element, "priority", None)
+        if priority is None:
+            return self.default_lane
+
+        return min(max(int(priority), 0), self.lanes - 1)
+
+    def lane_sizes(self):
+        '''Returns the amount of elements currently held in each lane'''
+        return [len(lane) for lane in self.queue.lanes]
+
+    def _create_queue(self, items=()):
+        lanes = _Lanes(self.weights, self.lane)
+        for item in items:
+            lanes.append(item)
+
+        return lanes
+
+    def _put(self, item):
+        self.queue.append(item)
+
+    def _get(self):
+        return self.queue.popleft()
 
+    def _peek(self):
+        return self.queue.peek()
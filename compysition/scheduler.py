@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+#
+# -*- coding: utf-8 -*-
+#
+#  scheduler.py
+#
+#  Copyright 2014 Adam Fiebig <fiebig.adam@gmail.com>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+from gevent.event import Event
+from time import time
+import gevent
+import math
+
+
+class _Timer(object):
+
+    __slots__ = ["owner", "deadline", "rounds", "function", "args"]
+
+    def __init__(self, owner, deadline, rounds, function, args):
+        self.owner = owner
+        self.deadline = deadline
+        self.rounds = rounds
+        self.function = function
+        self.args = args
+
+
+class RetryScheduler(object):
+
+    '''**A hashed timer wheel that executes delayed calls without holding a greenlet per call**
+
+    Timers are placed in one of <slots> buckets, which are advanced every <tick> seconds by a single greenlet.
+    Scheduling and expiring a timer is O(1). A timer fires within one tick after its delay has passed, at which point its
+    function is spawned in a new greenlet. The wheel greenlet only runs while timers are pending.
+
+    A Director shares one RetryScheduler between all of its actors, which is used to re-deliver rescued events.
+
+    Parameters:
+
+        tick (Optional[float]):
+            | The resolution of the wheel in seconds
+            | (Default: 0.1)
+        slots (Optional[int]):
+            | The amount of buckets in the wheel. Delays longer than tick * slots wrap around the wheel
+            | (Default: 512)
+    '''
+
+    DEFAULT_TICK = 0.1
+    DEFAULT_SLOTS = 512
+
+    def __init__(self, tick=DEFAULT_TICK, slots=DEFAULT_SLOTS):
+        self.tick = tick
+        self.slots = int(slots)
+        self.__wheel = [[] for slot in xrange(self.slots)]
+        self.__cursor = 0
+        self.__pending = {}
+        self.__wake = Event()
+        self.__runner = None
+        # The time at which the wheel advances next, or None if the wheel is not advancing
+        self.__next_tick = None
+
+    def __len__(self):
+        return sum(self.__pending.itervalues())
+
+    def pending(self, owner=None):
+        '''Returns the amount of pending timers scheduled by <owner>, or all pending timers if <owner> is None'''
+        if owner is None:
+            return len(self)
+
+        return self.__pending.get(owner, 0)
+
+    def timers(self, owner=None):
+        '''Returns a list of (owner, seconds remaining, args) for every pending timer, optionally filtered by <owner>'''
+        now = time()
+        return [(timer.owner, max(timer.deadline - now, 0), timer.args) for slot in self.__wheel for timer in slot
+                if owner is None or timer.owner == owner]
+
+    def schedule(self, delay, function, args=(), owner=None):
+        '''Executes <function>(*<args>) in a new greenlet after <delay> seconds'''
+        now = time()
+        if self.__next_tick is None:
+            # The wheel starts a full tick from now
+            ticks = int(math.ceil(delay / float(self.tick)))
+        else:
+            # The current tick is partially elapsed. Count from the next advance, so the timer never fires early
+            ticks = int(math.ceil((now + delay - self.__next_tick) / float(self.tick))) + 1
+        ticks = max(ticks, 1)
+        timer = _Timer(owner, now + delay, (ticks - 1) // self.slots, function, args)
+        self.__wheel[(self.__cursor + ticks) % self.slots].append(timer)
+        self.__pending[owner] = self.__pending.get(owner, 0) + 1
+
+        if self.__runner is None or self.__runner.dead:
+            self.__runner = gevent.spawn(self.__run)
+        self.__wake.set()
+        return timer
+
+    def stop(self):
+        '''Stops advancing the wheel. Pending timers are kept, and resume if another timer is scheduled'''
+        if self.__runner is not None:
+            self.__runner.kill()
+            self.__runner = None
+            self.__next_tick = None
+
+    def __run(self):
+        self.__next_tick = time() + self.tick
+        while True:
+            if len(self) == 0:
+                self.__next_tick = None
+                self.__wake.clear()
+                self.__wake.wait()
+                self.__next_tick = time() + self.tick
+
+            gevent.sleep(max(self.__next_tick - time(), 0))
+            while self.__next_tick <= time():
+                self.__next_tick += self.tick
+                self.__advance()
+
+    def __advance(self):
+        self.__cursor = (self.__cursor + 1) % self.slots
+        slot = self.__wheel[self.__cursor]
+        if len(slot) == 0:
+            return
+
+        remaining = []
+        for timer in slot:
+            if timer.rounds > 0:
+                timer.rounds -= 1
+                remaining.append(timer)
+            else:
+                self.__pending[timer.owner] -= 1
+                if self.__pending[timer.owner] == 0:
+                    del self.__pending[timer.owner]
+                gevent.spawn(timer.function, *timer.args)
+
+        self.__wheel[self.__cursor] = remaining
@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+#
+# -*- coding: utf-8 -*-
+#
+#  tracing.py
+#
+#  Copyright 2014 Adam Fiebig <fiebig.adam@gmail.com>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+"""
+Per-hop event tracing.
+
+A sampled event carries a list of hop records in Event.trace. Every hop is stamped with a monotonic clock when the event is put on
+a queue (enqueued), when an actor starts consuming it (started) and when that actor passes it on or finishes consuming it (finished).
+Traces are exported as JSON lines once an event reaches an actor that does not send it any further.
+
+Summarize an exported trace file with:
+
+    python -m compysition.tracing <trace file>
+"""
+
+from collections import defaultdict
+import argparse
+import ctypes
+import ctypes.util
+import random
+import json
+import sys
+import time
+
+try:
+    from time import monotonic
+except ImportError:
+    class _timespec(ctypes.Structure):
+        _fields_ = [("tv_sec", ctypes.c_long), ("tv_nsec", ctypes.c_long)]
+
+    # The value of CLOCK_MONOTONIC differs per platform
+    _CLOCK_MONOTONIC = {"linux": 1, "darwin": 6, "freebsd": 4, "openbsd": 3, "netbsd": 3}
+
+    def _time_monotonic():
+        """Returns a monotonic clock using clock_gettime, or time.time if it is unavailable on this platform"""
+        clocks = [clock for platform, clock in _CLOCK_MONOTONIC.iteritems() if sys.platform.startswith(platform)]
+        try:
+            clock_gettime = ctypes.CDLL(ctypes.util.find_library("rt") or ctypes.util.find_library("c")).clock_gettime
+        except (OSError, AttributeError, TypeError):
+            return time.time
+
+        if len(clocks) == 0 or clock_gettime(clocks[0], ctypes.byref(_timespec())) != 0:
+            return time.time
+
+        clock = clocks[0]
+
+        def monotonic():
+            timespec = _timespec()
+            clock_gettime(clock, ctypes.byref(timespec))
+            return timespec.tv_sec + timespec.tv_nsec * 1e-9
+
+        return monotonic
+
+    monotonic = _time_monotonic()
+
+
+class FileTraceExporter(object):
+
+    '''Appends every exported trace to <path> as a line of JSON'''
+
+    def __init__(self, path):
+        self.path = path
+        self.__file = None
+
+    def export(self, record):
+        if self.__file is None:
+            self.__file = open(self.path, "a")
+
+        self.__file.write(json.dumps(record) + "\n")
+
+    def close(self):
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+
+
+class Tracer(object):
+
+    '''**Samples events for per-hop tracing and exports their traces**
+
+    A Director shares one Tracer between all of its actors. The sampling decision is made once per event, by the first actor that
+    sends it, and is inherited by all events cloned from it.
+
+    Parameters:
+
+        sample_rate (Optional[float]):
+            | The fraction of events, between 0 and 1, that are traced
+            | (Default: 0.01)
+        exporter (Optional[object]):
+            | An object with an 'export' method that receives every finished trace as a dict
+            | (Default: None, traces are not exported)
+    '''
+
+    DEFAULT_SAMPLE_RATE = 0.01
+
+    def __init__(self, sample_rate=DEFAULT_SAMPLE_RATE, exporter=None):
+        self.sample_rate = sample_rate
+        self.exporter = exporter
+
+    def sample(self, event):
+        '''Decides whether <event> is traced, if this has not been decided yet'''
+        if event.trace is None:
+            event.trace = [] if random.random() < self.sample_rate else False
+
+    def enqueued(self, event, queue):
+        event.trace.append({"queue": queue.name, "enqueued": monotonic()})
+
+    def started(self, event, actor):
+        '''Stamps the start of consuming <event> on the current hop, and returns the hop'''
+        if event.trace:
+            hop = event.trace[-1]
+        else:
+            hop = {"queue": None, "enqueued": monotonic()}
+            event.trace.append(hop)
+
+        hop["actor"] = actor.name
+        hop["started"] = monotonic()
+        return hop
+
+    def forwarded(self, event):
+        '''Stamps the end of the current hop when <event> is sent on, before it is cloned to the next queues'''
+        hop = event.trace[-1] if event.trace else None
+        if hop is not None and "started" in hop and "finished" not in hop:
+            hop["finished"] = monotonic()
+
+    def finished(self, event, hop):
+        '''Called after consuming <event>. If it was not sent on, the trace of <event> is complete and is exported'''
+        if "finished" not in hop:
+            hop["finished"] = monotonic()
+            self.export(event)
+
+    def export(self, event):
+        if self.exporter is not None:
+            self.exporter.export({"event_id": event.event_id, "meta_id": event.meta_id, "created": str(event.created), "hops": event.trace})
+
+    def close(self):
+        if self.exporter is not None and hasattr(self.exporter, "close"):
+            self.exporter.close()
+
+
+def summarize(records):
+    '''Returns a list of per-actor summaries of queue wait and service time, ordered by share of the total critical path time'''
+    actors = defaultdict(lambda: {"hops": 0, "wait": 0.0, "service": 0.0})
+    total = 0.0
+    for record in records:
+        hops = [hop for hop in record["hops"] if "started" in hop and "finished" in hop]
+        if not hops:
+            continue
+
+        total += hops[-1]["finished"] - hops[0]["enqueued"]
+        for hop in hops:
+            summary = actors[hop["actor"]]
+            summary["hops"] += 1
+            summary["wait"] += hop["started"] - hop["enqueued"]
+            summary["service"] += hop["finished"] - hop["started"]
+
+    summaries = []
+    for actor, summary in actors.iteritems():
+        summary["actor"] = actor
+        summary["share"] = (summary["wait"] + summary["service"]) / total if total else 0
+        summaries.append(summary)
+
+    return sorted(summaries, key=lambda summary: summary["share"], reverse=True)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Summarize per-actor critical path time of exported compysition traces")
+    parser.add_argument("path", help="A trace file written by FileTraceExporter")
+    args = parser.parse_args(args)
+
+    with open(args.path) as trace_file:
+        summaries = summarize(json.loads(line) for line in trace_file if line.strip())
+
+    print("{0:<30} {1:>8} {2:>14} {3:>14} {4:>8}".format("actor", "hops", "avg wait ms", "avg service ms", "share"))
+    for summary in summaries:
+        print("{actor:<30} {hops:>8} {wait:>14.3f} {service:>14.3f} {share:>7.1%}".format(
+            actor=summary["actor"], hops=summary["hops"], wait=summary["wait"] / summary["hops"] * 1000,
+            service=summary["service"] / summary["hops"] * 1000, share=summary["share"]))
+
+
+if __name__ == "__main__":
+    main()
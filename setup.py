@@ -75,5 +75,6 @@ setup(
     namespace_packages=[],
     test_suite="tests",
     packages=find_packages(),
+    entry_points={'console_scripts': ['compysition-trace = compysition.tracing:main']},
     package_data={'': ['*.txt', '*.rst', '*.xml', '*.xsl', '*.conf']},
     zip_safe=False)
@@ -0,0 +1,89 @@
+import unittest
+import logging
+import os
+import shutil
+import tempfile
+
+from compysition.actors import *
+from compysition.event import LogEvent
+
+
+class TestBufferedFileLogger(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def read(self, filename="compysition.log"):
+        with open(os.path.join(self.directory, filename)) as log_file:
+            return log_file.read()
+
+    def events(self, count):
+        return [LogEvent(logging.INFO, "actor", "message {0}".format(index), id="id") for index in xrange(count)]
+
+    def test_output_matches_unbuffered(self):
+        events = self.events(5) + [LogEvent(logging.DEBUG, "actor", "discarded")]
+        buffered = FileLogger("buffered", directory=self.directory, default_filename="buffered.log", buffered=True)
+        unbuffered = FileLogger("unbuffered", directory=self.directory, default_filename="unbuffered.log")
+        for event in events:
+            buffered.consume(event)
+            unbuffered.consume(event)
+        buffered.consume_batch(events)
+        unbuffered.consume_batch(events)
+
+        buffered.post_hook()
+        self.assertEqual(self.read("buffered.log"), self.read("unbuffered.log"))
+
+    def test_flush_size(self):
+        actor = FileLogger("buffered", directory=self.directory, buffered=True, flush_size=1)
+        actor.consume(self.events(1)[0])
+        actor.post_hook()
+        self.assertIn("actor=actor, id=id :: message 0\n", self.read())
+
+    def test_rotation(self):
+        actor = FileLogger("buffered", directory=self.directory, buffered=True, flush_size=1, maxBytes=200, backupCount=2)
+        for event in self.events(20):
+            actor.consume(event)
+        actor.post_hook()
+
+        self.assertEqual(sorted(os.listdir(self.directory)), ["compysition.log", "compysition.log.1", "compysition.log.2"])
+        for filename in os.listdir(self.directory):
+            self.assertLessEqual(len(self.read(filename)), 200)
+        self.assertTrue(self.read().endswith("message 19\n"))
+
+
+class _RecordLevels(logging.Handler):
+
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.levels = []
+
+    def emit(self, record):
+        self.levels.append(record.levelno)
+
+
+class TestFileLoggerBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_entries_keep_their_level(self):
+        actor = FileLogger("logger", directory=self.directory)
+        handler = _RecordLevels()
+        logging.getLogger("{0}/compysition.log".format(self.directory)).addHandler(handler)
+        levels = [logging.INFO, logging.ERROR, logging.DEBUG, logging.WARNING]
+        actor.consume_batch([LogEvent(level, "actor", "message") for level in levels])
+        self.assertEqual(handler.levels, [logging.INFO, logging.ERROR, logging.WARNING])
+
+    def test_batch_rotates_per_entry(self):
+        actor = FileLogger("logger", directory=self.directory, maxBytes=200, backupCount=2)
+        actor.consume_batch([LogEvent(logging.INFO, "actor", "message {0}".format(index), id="id") for index in xrange(20)])
+        self.assertEqual(sorted(os.listdir(self.directory)), ["compysition.log", "compysition.log.1", "compysition.log.2"])
+        for filename in os.listdir(self.directory):
+            with open(os.path.join(self.directory, filename)) as log_file:
+                self.assertLessEqual(len(log_file.read()), 200)
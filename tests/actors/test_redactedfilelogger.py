@@ -0,0 +1,60 @@
+import unittest
+import logging
+import random
+import re
+
+from compysition.actors import *
+from compysition.event import LogEvent
+
+
+class TestRedactedFileLogger(unittest.TestCase):
+
+    PATTERNS = ['<first_name>(.*?)</first_name>', '"ssn": "([0-9-]+)"', 'card=(\\d{4})\\d+', '(?i)password=(\\w+)',
+                '<(a)>', 'x(y)?z', '(R)EDACTED', '(["\'])(.*?)\\1', 'name:(\\w*)', '^id=(\\d+)',
+                '([0-9]{9})', '\\b(\\w+@\\w+\\.com)\\b']
+
+    def redact(self, patterns, message):
+        # The redaction as it was implemented before patterns were compiled and prefiltered
+        def redact_message(match_object):
+            return match_object.group(0).replace(match_object.group(1), 'REDACTED')
+
+        for pattern in patterns:
+            message = re.sub(pattern, redact_message, message)
+        return message
+
+    def assertRedacts(self, patterns, message):
+        actor = RedactedFileLogger("redacted", patterns)
+        try:
+            expected = self.redact(patterns, message)
+        except Exception as err:
+            self.assertRaises(type(err), actor._process_redaction, LogEvent(logging.INFO, "actor", message))
+        else:
+            self.assertEqual(actor._process_redaction(LogEvent(logging.INFO, "actor", message)).message, expected)
+
+    def test_redaction(self):
+        actor = RedactedFileLogger("redacted", ['<first_name>(.*?)</first_name>'])
+        event = LogEvent(logging.INFO, "actor", "<person><first_name>John</first_name></person>")
+        self.assertEqual(actor._process_redaction(event).message, "<person><first_name>REDACTED</first_name></person>")
+
+    def test_anchors(self):
+        self.assertEqual(RedactedFileLogger._get_anchor('<first_name>(.*?)</first_name>'), "</first_name>")
+        self.assertEqual(RedactedFileLogger._get_anchor('ab*c'), "a")
+        self.assertIsNone(RedactedFileLogger._get_anchor('(?i)password=(\\w+)'))
+        self.assertIsNone(RedactedFileLogger._get_anchor('foo|bar'))
+
+    def test_output_matches_sequential_substitution(self):
+        fragments = ['<first_name>', 'John', '</first_name>', '"ssn": "', '123-45', '"', 'card=', '4111111111', 'PassWord=',
+                     'secret', '<a>', 'xz', 'xyz', 'REDACTED', "'", 'name:', 'id=', '42', ' ', 'a', 'j@example.com', '123456789']
+        combinable = [pattern for pattern in self.PATTERNS if RedactedFileLogger._combine([pattern])]
+        self.assertEqual(len(combinable), len(self.PATTERNS) - 2)
+        self.assertIsNotNone(RedactedFileLogger("redacted", combinable)._combined)
+        generator = random.Random(0)
+        for _ in xrange(600):
+            candidates = generator.choice((self.PATTERNS, combinable))
+            patterns = generator.sample(candidates, generator.randint(1, len(candidates)))
+            message = "".join(generator.choice(fragments) for _ in xrange(generator.randint(0, 12)))
+            self.assertRedacts(patterns, message)
+
+    def test_messages_without_matches_are_unchanged(self):
+        self.assertRedacts(self.PATTERNS, "Received POST request for service orders")
+        self.assertRedacts(['x(y)?z', 'card=(\\d{4})'], "nothing to see")
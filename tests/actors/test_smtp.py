@@ -0,0 +1,41 @@
+import unittest
+import smtplib
+
+from compysition.actors.smtp import SMTPOut
+from compysition.event import XMLEvent
+
+
+class _DroppedConnectionSMTP(object):
+
+    sent = []
+
+    def __init__(self, host):
+        pass
+
+    def sendmail(self, from_address, to, msg):
+        self.sent.append(to)
+
+    def quit(self):
+        raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+
+
+class TestSMTPOutBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.smtp = smtplib.SMTP
+        smtplib.SMTP = _DroppedConnectionSMTP
+        _DroppedConnectionSMTP.sent = []
+
+    def tearDown(self):
+        smtplib.SMTP = self.smtp
+
+    def test_events_are_forwarded_when_quit_fails(self):
+        actor = SMTPOut("smtp", from_address="sender@example.com")
+        forwarded = []
+        actor.send_event = forwarded.append
+        events = [XMLEvent(data="<email><To>user{0}@example.com</To><From>sender</From><Body>body</Body></email>".format(index))
+                  for index in xrange(3)]
+
+        actor.consume_batch(events)
+        self.assertEqual(len(_DroppedConnectionSMTP.sent), 3)
+        self.assertEqual(forwarded, events)
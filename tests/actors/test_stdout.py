@@ -0,0 +1,40 @@
+import unittest
+import sys
+from StringIO import StringIO
+
+from compysition.actors import *
+from compysition.director import Director
+from compysition.event import *
+
+
+class TestBufferedSTDOUT(unittest.TestCase):
+
+    def setUp(self):
+        self.stdout = sys.stdout
+        sys.stdout = StringIO()
+
+    def tearDown(self):
+        sys.stdout = self.stdout
+
+    def test_lines_are_written_in_order_on_stop(self):
+        actor = STDOUT("stdout", buffered=True, prefix="> ")
+        for index in xrange(100):
+            actor.consume(Event(data=str(index)))
+        self.assertEqual(sys.stdout.getvalue(), "")
+
+        actor.post_hook()
+        self.assertEqual(sys.stdout.getvalue(), "".join("> {0}\n".format(index) for index in xrange(100)))
+
+    def test_flush_size(self):
+        actor = STDOUT("stdout", buffered=True, flush_size=10)
+        for index in xrange(3):
+            actor.consume(Event(data="line {0}".format(index)))
+        actor.post_hook()
+        self.assertEqual(sys.stdout.getvalue(), "line 0\nline 1\nline 2\n")
+
+    def test_director_stop_flushes_logs(self):
+        director = Director(generate_blockdiag=False)
+        director.register_log_actor(STDOUT, "stdout", buffered=True, flush_interval=60)
+        director.start(block=False)
+        director.stop(drain_timeout=1)
+        self.assertIn("Drained all actors", sys.stdout.getvalue())
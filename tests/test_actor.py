@@ -0,0 +1,176 @@
+import unittest
+import json
+import cPickle as pickle
+
+import gevent
+
+from compysition.actor import Actor
+from compysition.errors import QueueFull
+from compysition.event import Event, JSONEvent
+from compysition.queue import Queue
+from compysition.scheduler import RetryScheduler
+
+from compysition.testutils.test_actor import TestActorWrapper
+
+
+class InFlightActor(Actor):
+
+    def __init__(self, name, *args, **kwargs):
+        super(InFlightActor, self).__init__(name, *args, **kwargs)
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def consume(self, event, *args, **kwargs):
+        self.in_flight += 1
+        self.max_in_flight = max(self.in_flight, self.max_in_flight)
+        gevent.sleep(0.01)
+        self.in_flight -= 1
+        self.send_event(event)
+
+
+class TestActorConcurrency(unittest.TestCase):
+
+    def _run_events(self, count, **actor_kwargs):
+        actor = TestActorWrapper(InFlightActor("inflight", **actor_kwargs))
+        for i in xrange(count):
+            actor.input = Event(data=str(i))
+
+        outputs = [actor.output for i in xrange(count)]
+        return actor.actor, outputs
+
+    def test_concurrency_bounds_in_flight_events(self):
+        actor, outputs = self._run_events(20, concurrency=4)
+        self.assertEqual(len(outputs), 20)
+        self.assertEqual(actor.max_in_flight, 4)
+
+    def test_workers_are_added_on_demand(self):
+        actor = TestActorWrapper(InFlightActor("inflight"))
+        group = actor.actor._Actor__worker_groups.values()[0]
+        self.assertEqual(group.size, 1)
+        for i in xrange(20):
+            actor.input = Event(data=str(i))
+
+        outputs = [actor.output for i in xrange(20)]
+        self.assertEqual(len(outputs), 20)
+        self.assertEqual(actor.actor.max_in_flight, 20)
+        self.assertLessEqual(group.size, 21)
+
+    def test_blocking_consume_preserves_order(self):
+        actor, outputs = self._run_events(10, blocking_consume=True, concurrency=4)
+        self.assertEqual(actor.concurrency, 1)
+        self.assertEqual(actor.max_in_flight, 1)
+        self.assertEqual([output.data for output in outputs], [str(i) for i in xrange(10)])
+
+
+class BatchActor(Actor):
+
+    def __init__(self, name, *args, **kwargs):
+        super(BatchActor, self).__init__(name, *args, **kwargs)
+        self.batches = []
+
+    def consume(self, event, *args, **kwargs):
+        raise AssertionError("consume should not be called when batching")
+
+    def consume_batch(self, events, *args, **kwargs):
+        self.batches.append(len(events))
+        for event in events:
+            self.send_event(event)
+
+
+class TestActorBatchConsume(unittest.TestCase):
+
+    def test_batch_size_limit(self):
+        actor = TestActorWrapper(BatchActor("batch", batch_size=5, max_linger_ms=50, concurrency=1))
+        for i in xrange(12):
+            actor.input = Event(data=str(i))
+
+        outputs = [actor.output for i in xrange(12)]
+        self.assertEqual([output.data for output in outputs], [str(i) for i in xrange(12)])
+        self.assertTrue(max(actor.actor.batches) <= 5)
+        self.assertTrue(len(actor.actor.batches) < 12)
+
+    def test_linger_dispatches_partial_batch(self):
+        actor = TestActorWrapper(BatchActor("batch", batch_size=100, max_linger_ms=10, concurrency=1))
+        actor.input = Event(data="one")
+        self.assertEqual(actor.output.data, "one")
+        self.assertEqual(actor.actor.batches, [1])
+
+
+class TestActorStop(unittest.TestCase):
+
+    def test_stop_releases_idle_workers(self):
+        actor = TestActorWrapper(InFlightActor("inflight", concurrency=3))
+        gevent.sleep(0.01)
+        actor.stop()
+        gevent.sleep(0.01)
+        self.assertEqual(len(actor.actor.threads), 0)
+
+
+class FlakyActor(Actor):
+
+    def __init__(self, name, failures=0, *args, **kwargs):
+        super(FlakyActor, self).__init__(name, *args, **kwargs)
+        self.failures = failures
+        self.attempts = 0
+
+    def consume(self, event, *args, **kwargs):
+        self.attempts += 1
+        if self.attempts <= self.failures:
+            raise Exception("Failure {0}".format(self.attempts))
+        self.send_event(event)
+
+
+class TestActorRescue(unittest.TestCase):
+
+    def _create_actor(self, failures, **kwargs):
+        kwargs.setdefault("retry_scheduler", RetryScheduler(tick=0.01))
+        return TestActorWrapper(FlakyActor("flaky", failures=failures, rescue=True, rescue_delay=0.02, **kwargs), output_timeout=1)
+
+    def test_rescued_event_is_redelivered(self):
+        actor = self._create_actor(failures=2)
+        actor.input = Event(data="foo")
+        gevent.sleep(0)
+        self.assertEqual(actor.actor.pending_retries, 1)
+        self.assertEqual(actor.output.data, "foo")
+        self.assertEqual(actor.actor.attempts, 3)
+        self.assertEqual(actor.actor.pending_retries, 0)
+
+    def test_exhausted_rescue_sends_error(self):
+        actor = self._create_actor(failures=10, max_rescue=2)
+        actor.input = Event(data="foo")
+        error = actor.error
+        self.assertEqual(error.data, "foo")
+        self.assertEqual(actor.actor.attempts, 3)
+        self.assertFalse(hasattr(error, "flaky_rescue_num"))
+
+    def test_rescue_attempts_survive_pickling(self):
+        actor = self._create_actor(failures=10, max_rescue=2)
+        event = Event(data="foo")
+        event.rescue_attempts = {"flaky": 2}
+        actor.input = pickle.loads(pickle.dumps(event, pickle.HIGHEST_PROTOCOL))
+        self.assertEqual(actor.error.data, "foo")
+        self.assertEqual(actor.actor.attempts, 1)
+        self.assertNotIn("rescue_attempts", event.get_properties())
+
+    def test_queue_full_is_not_requeued(self):
+        class FullActor(FlakyActor):
+            def consume(self, event, *args, **kwargs):
+                self.attempts += 1
+                queue = Queue("outbox", maxsize=1)
+                queue.put(event)
+                queue.put(event, block=False)
+
+        actor = TestActorWrapper(FullActor("full", rescue=True), output_timeout=1)
+        actor.input = JSONEvent(data={"foo": "bar"})
+        error = actor.error
+        self.assertIsInstance(error.error, QueueFull)
+        self.assertEqual(json.loads(error.error_string())[0]["queue_name"], "outbox")
+        self.assertEqual(pickle.loads(pickle.dumps(error, pickle.HIGHEST_PROTOCOL)).error.queue_name, "outbox")
+        gevent.sleep(0.05)
+        self.assertEqual(actor.actor.attempts, 1)
+
+    def test_rescue_delay_backoff(self):
+        actor = FlakyActor("flaky", rescue=True, rescue_delay=1, max_rescue_delay=3)
+        delays = [actor._Actor__get_rescue_delay(attempt) for attempt in xrange(1, 5)]
+        for delay, backoff in zip(delays, [1, 2, 3, 3]):
+            self.assertTrue(backoff * (1 - Actor.RESCUE_JITTER) <= delay <= backoff)
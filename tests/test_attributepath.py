@@ -0,0 +1,41 @@
+import unittest
+from compysition.attributepath import AttributePath, compile_path
+from compysition.event import Event, JSONEvent
+
+
+class TestAttributePath(unittest.TestCase):
+
+    def test_paths_are_cached(self):
+        self.assertIs(compile_path("data/header/http"), compile_path("data/header/http"))
+        self.assertEqual(compile_path("data/header/http").steps, compile_path(("data", "header", "http")).steps)
+
+    def test_get(self):
+        event = Event(data={"header": {"http": "value"}}, service="test")
+        self.assertEqual(compile_path("data/header/http").get(event), "value")
+        self.assertEqual(compile_path("service").get(event), "test")
+        self.assertIsNone(compile_path("data/missing/http").get(event))
+        self.assertEqual(compile_path("data/header/missing").get(event, "default"), "default")
+
+    def test_get_dictionaries_only(self):
+        path = compile_path("foo/upper", attributes=False)
+        self.assertIsNone(path.get({"foo": "bar"}))
+        self.assertEqual(path.get({"foo": {"upper": 1}}), 1)
+
+    def test_set_creates_missing_dictionaries(self):
+        event = JSONEvent(data={"foo": "bar"})
+        compile_path("data/header/http").set(event, "value")
+        self.assertEqual(event.data, {"foo": "bar", "header": {"http": "value"}})
+
+    def test_set_replaces_empty_attribute(self):
+        event = JSONEvent()
+        compile_path("data/header").set(event, "value")
+        self.assertEqual(event.data, {"header": "value"})
+
+    def test_empty_path(self):
+        self.assertRaises(ValueError, AttributePath, ())
+
+    def test_event_lookup(self):
+        event = Event(data={"foo": {"bar": 1}})
+        self.assertEqual(event.lookup(["data", "foo", "bar"]), 1)
+        self.assertIsNone(event.lookup(["data", "bar"]))
+        self.assertEqual(event.lookup("data"), {"foo": {"bar": 1}})
@@ -0,0 +1,106 @@
+import unittest
+from datetime import datetime
+from StringIO import StringIO
+import tempfile
+from compysition.codec import EventCodec, BinaryCodec, PickleCodec
+from compysition.errors import EventCodecError, MalformedEventData
+from compysition.event import *
+from compysition.event import StreamData
+
+
+class TestBinaryCodec(unittest.TestCase):
+
+    def setUp(self):
+        self.codec = BinaryCodec()
+
+    def round_trip(self, event):
+        frames = self.codec.encode(event)
+        self.assertEqual(len(frames), 2)
+        return self.codec.decode(frames)
+
+    def test_json_event(self):
+        event = JSONEvent(data={"foo": ["bar", 1]}, service="test", custom="value")
+        output = self.round_trip(event)
+        self.assertIs(output.__class__, JSONEvent)
+        self.assertTrue(output.is_raw())
+        self.assertEqual(output.data, {"foo": ["bar", 1]})
+        for key in ("event_id", "meta_id", "service", "created", "custom"):
+            self.assertEqual(getattr(output, key), getattr(event, key))
+
+    def test_payload_is_serialized_data(self):
+        event = XMLEvent(data="<foo>bar</foo>")
+        self.assertEqual(self.codec.encode(event)[1], event.data_string())
+        self.assertEqual(self.round_trip(event).data_string(), event.data_string())
+
+    def test_http_event_error(self):
+        event = JSONHttpEvent(data={"foo": "bar"}, headers={"X-Test": "1"})
+        event.error = MalformedEventData("bad")
+        output = self.round_trip(event)
+        self.assertEqual(output.status, (400, "Bad Request"))
+        self.assertEqual(output.headers, event.headers)
+        self.assertIsInstance(output.error, MalformedEventData)
+
+    def test_non_string_properties(self):
+        event = Event(data={"foo": "bar"}, meta_id=12, timestamp=datetime(2015, 1, 1))
+        output = self.round_trip(event)
+        self.assertEqual(output.meta_id, 12)
+        self.assertEqual(output.timestamp, datetime(2015, 1, 1))
+        self.assertEqual(output.data, {"foo": "bar"})
+
+    def test_dumps_many(self):
+        events = [JSONEvent(data={"index": index}) for index in xrange(3)]
+        output = self.codec.loads(self.codec.dumps(events))
+        self.assertEqual([event.data for event in output], [{"index": index} for index in xrange(3)])
+
+    def test_truncated_buffer(self):
+        self.assertRaises(EventCodecError, self.codec.loads, self.codec.dumps(JSONEvent())[:-1])
+
+    def test_unsupported_version(self):
+        header, payload = self.codec.encode(JSONEvent())
+        self.assertRaises(EventCodecError, self.codec.decode, [chr(99) + header[1:], payload])
+
+    def test_unregistered_class(self):
+        class UnknownEvent(JSONEvent):
+            pass
+
+        self.assertRaises(EventCodecError, self.codec.decode, self.codec.encode(UnknownEvent()))
+
+    def test_load_spools_large_payloads(self):
+        codec = BinaryCodec(spool_threshold=16)
+        events = [XMLEvent(data="<root>{0}</root>".format("x" * 64)), JSONEvent(data={"foo": "bar"})]
+        output = codec.load(StringIO(codec.dumps(events)))
+        self.assertIsNotNone(output[0].get_stream())
+        self.assertEqual(output[0].data_string(), events[0].data_string())
+        self.assertIsNone(output[1].get_stream())
+        self.assertEqual(output[1].data, {"foo": "bar"})
+
+    def test_stream_pass_through(self):
+        stream = tempfile.TemporaryFile()
+        stream.write("<root>bar</root>")
+        event = XMLEvent(data=StreamData(stream), service="test")
+        self.assertEqual(list(self.codec.iter_dumps(event))[-1], "<root>bar</root>")
+        self.assertEqual(self.codec.encode(event)[1][:], "<root>bar</root>")
+
+        output = self.codec.load(StringIO(self.codec.dumps(event)))[0]
+        self.assertTrue(event.is_raw())
+        self.assertEqual(output.service, "test")
+        self.assertEqual(output.data.text, "bar")
+
+    def test_load_truncated_stream(self):
+        self.assertRaises(EventCodecError, self.codec.load, StringIO(self.codec.dumps(JSONEvent())[:-1]))
+
+
+class TestEventCodec(unittest.TestCase):
+
+    def test_abstract_interface(self):
+        self.assertRaises(TypeError, EventCodec)
+
+
+class TestPickleCodec(unittest.TestCase):
+
+    def test_legacy_stream(self):
+        codec = PickleCodec()
+        event = JSONEvent(data={"foo": "bar"})
+        output = codec.loads(codec.dumps(event))
+        self.assertEqual(len(output), 1)
+        self.assertEqual(output[0].event_id, event.event_id)
@@ -0,0 +1,80 @@
+import unittest
+import json
+import xmltodict
+from lxml import etree
+from compysition.conversion import element_to_dict, dict_to_element, normalize_json
+from compysition.event import JSONEvent, XMLEvent, internal_xmlify
+
+
+def parse(element):
+    return xmltodict.parse(etree.tostring(element))
+
+
+def unparse(data):
+    return etree.fromstring(xmltodict.unparse(data).encode("utf-8"))
+
+
+class TestElementToDict(unittest.TestCase):
+
+    documents = ["<a/>",
+                 "<a x='1'>text</a>",
+                 "<a><b>1</b><b>2</b><c/></a>",
+                 "<a> one <b/> two <!-- comment --> three<?pi data?>four</a>",
+                 "<p:a xmlns:p='http://p' p:x='1' xml:lang='en'><p:b/><c xmlns='http://c'><d/></c></p:a>",
+                 "<a><![CDATA[<b>]]>&amp;</a>",
+                 "<a>\n  <b x='1'>1<c/>2</b>\n  <b/>\n</a>"]
+
+    def test_matches_xmltodict(self):
+        for document in self.documents:
+            element = etree.fromstring(document)
+            self.assertEqual(element_to_dict(element), parse(element))
+            self.assertEqual(element_to_dict(element.getroottree()), parse(element))
+
+    def test_subelement_declares_inherited_namespaces(self):
+        element = etree.fromstring("<p:a xmlns:p='http://p'><p:b/></p:a>")[0]
+        self.assertEqual(element_to_dict(element), {"p:b": {"@xmlns:p": "http://p"}})
+
+
+class TestDictToElement(unittest.TestCase):
+
+    data = [{"a": None},
+            {"a": {"@x": 1, "b": [{"c": "1"}, "2", True, None], "#text": "text"}},
+            {"a": {"b": "<c x='1'>embedded</c>", "d": "  <e/>  ", "f": "<not xml"}},
+            {"a": {"b": "<c/> trailing text", "d": "&<>"}},
+            {"p:a": {"@xmlns:p": "http://p", "@p:x": "1", "p:b": 2.5, "c": {"@xmlns": "http://c", "d": None}}},
+            [{"a": 1}, {"b": [1, 2]}]]
+
+    def test_matches_xmltodict(self):
+        for data in self.data:
+            data = internal_xmlify(data)
+            self.assertEqual(etree.tostring(dict_to_element(data), method="c14n"), etree.tostring(unparse(data), method="c14n"))
+
+    def test_undefined_prefix(self):
+        self.assertRaises(ValueError, dict_to_element, {"p:a": None})
+
+    def test_multiple_roots(self):
+        self.assertRaises(ValueError, dict_to_element, {"a": [1, 2]})
+
+
+class TestNormalizeJSON(unittest.TestCase):
+
+    def test_matches_json_round_trip(self):
+        data = {"a": (1, 2), 1: "one", None: [{"b": {"c": None}}], True: 1.5, "d": "\xc3\xa9"}
+        self.assertEqual(normalize_json(data), json.loads(json.dumps(data)))
+
+    def test_result_is_a_copy(self):
+        data = {"a": [1]}
+        normalize_json(data)["a"].append(2)
+        self.assertEqual(data, {"a": [1]})
+
+    def test_unsupported_type(self):
+        self.assertRaises(TypeError, normalize_json, {"a": object()})
+
+
+class TestEventConversion(unittest.TestCase):
+
+    def test_round_trip(self):
+        data = {"foo": [{"bar": "1"}, {"bar": "2"}]}
+        event = JSONEvent(data=data).convert(XMLEvent)
+        self.assertEqual(event.data.tag, "jsonified_envelope")
+        self.assertEqual(event.convert(JSONEvent).data, data)
@@ -0,0 +1,85 @@
+import unittest
+
+import gevent
+
+from compysition.actor import Actor
+from compysition.director import Director
+from compysition.event import Event
+from compysition.queue import SpillQueue
+
+
+class Source(Actor):
+
+    def __init__(self, name, count=0, *args, **kwargs):
+        super(Source, self).__init__(name, *args, **kwargs)
+        self.count = count
+        self.accepting = True
+
+    def pre_hook(self):
+        for i in xrange(self.count):
+            self.send_event(Event(data=str(i)))
+
+    def stop_accepting(self):
+        self.accepting = False
+
+    def consume(self, event, *args, **kwargs):
+        pass
+
+
+class Sink(Actor):
+
+    def __init__(self, name, delay=0, *args, **kwargs):
+        super(Sink, self).__init__(name, *args, **kwargs)
+        self.delay = delay
+        self.consumed = 0
+
+    def consume(self, event, *args, **kwargs):
+        gevent.sleep(self.delay)
+        self.consumed += 1
+        self.send_event(event)
+
+
+class TestDirectorDrain(unittest.TestCase):
+
+    def _create_director(self, count, delay, **queue_options):
+        director = Director(generate_blockdiag=False)
+        source = director.register_actor(Source, "source", count=count)
+        middle = director.register_actor(Sink, "middle", delay=delay, concurrency=1)
+        sink = director.register_actor(Sink, "sink")
+        director.connect_queue(source, middle, **queue_options)
+        director.connect_queue(middle, sink)
+        director.start(block=False)
+        return director, source, middle, sink
+
+    def test_stop_drains_in_flight_events(self):
+        director, source, middle, sink = self._create_director(count=10, delay=0.01)
+        director.stop(drain_timeout=5)
+        self.assertFalse(source.accepting)
+        self.assertEqual(sink.consumed, 10)
+        self.assertEqual(director.dropped_events, {})
+
+    def test_drain_deadline_reports_dropped_events(self):
+        director, source, middle, sink = self._create_director(count=10, delay=1)
+        director.stop(drain_timeout=0.1)
+        self.assertEqual(sink.consumed, 0)
+        self.assertEqual(director.dropped_events, {"middle": 10})
+
+    def test_drain_waits_for_spilled_events(self):
+        director, source, middle, sink = self._create_director(count=10, delay=0.01, queue_class=SpillQueue,
+                                                               queue_kwargs={"memory_size": 2})
+        self.assertFalse(middle.is_drained())
+        director.stop(drain_timeout=5)
+        self.assertEqual(sink.consumed, 10)
+        self.assertEqual(director.dropped_events, {})
+
+    def test_drain_deadline_reports_spilled_events(self):
+        director, source, middle, sink = self._create_director(count=10, delay=1, queue_class=SpillQueue,
+                                                               queue_kwargs={"memory_size": 2})
+        director.stop(drain_timeout=0.1)
+        self.assertEqual(director.dropped_events, {"middle": 10})
+
+    def test_drain_order_is_topological(self):
+        director, source, middle, sink = self._create_director(count=0, delay=0)
+        order = director._Director__get_drain_order()
+        self.assertTrue(order.index(source) < order.index(middle) < order.index(sink) < order.index(director.log_actor))
+        director.stop(drain_timeout=0)
@@ -1,6 +1,11 @@
 import unittest
+import cPickle as pickle
+import tempfile
+import os
 from compysition.event import *
-from compysition.errors import InvalidEventDataModification
+from compysition.event import RawData, StreamData, DataFormatInterface, register_event_class, built_classes, _conversion_plans
+from compysition.errors import InvalidEventDataModification, InvalidEventConversion
+import compysition.event as event_module
 
 
 class TestEvent(unittest.TestCase):
@@ -42,4 +47,257 @@ class TestJSONHttpEvent(unittest.TestCase):
         self.event = JSONHttpEvent(data={'cat': 'fat'})
 
     def test_json_event_content_type(self):
-        self.assertEqual(self.event.headers.get('Content-Type'), 'application/json')
\ No newline at end of file
+        self.assertEqual(self.event.headers.get('Content-Type'), 'application/json')
+
+class TestCopyOnWriteClone(unittest.TestCase):
+
+    def setUp(self):
+        self.event = JSONEvent(data={'cat': 'fat'}, headers={'foo': 'bar'})
+
+    def test_clone_shares_data_until_accessed(self):
+        clone = self.event.cow_clone()
+        self.assertIs(clone._data, self.event._data)
+        clone.data['cat'] = 'thin'
+        self.assertEqual(self.event.data, {'cat': 'fat'})
+        self.assertEqual(clone.data, {'cat': 'thin'})
+
+    def test_clone_properties_are_independent(self):
+        clone = self.event.cow_clone()
+        clone.headers['foo'] = 'baz'
+        self.assertEqual(self.event.headers['foo'], 'bar')
+
+    def test_last_holder_takes_data_without_copy(self):
+        data = self.event._data
+        clone = self.event.cow_clone()
+        del self.event
+        self.assertIs(clone.data, data)
+
+    def test_serialization_does_not_copy(self):
+        clone = self.event.cow_clone()
+        self.assertEqual(clone.data_string(), self.event.data_string())
+        self.assertIs(clone._data, self.event._data)
+
+
+class TestEventCore(unittest.TestCase):
+
+    def test_generated_ids_are_unique(self):
+        ids = set(Event().event_id for i in xrange(1000))
+        self.assertEqual(len(ids), 1000)
+        self.assertEqual(len(ids.pop()), 32)
+
+    def test_id_prefix_is_regenerated_in_a_new_process(self):
+        prefix = Event().event_id[:16]
+        event_module._id_pid, event_module._id_block_end = -1, 0
+        self.assertNotEqual(Event().event_id[:16], prefix)
+        self.assertEqual(event_module._id_pid, os.getpid())
+
+    def test_dynamic_properties(self):
+        event = JSONEvent(data={"foo": {"bar": "baz"}}, custom="value")
+        self.assertEqual(event.get("custom"), "value")
+        self.assertTrue(event.set("other", 1))
+        self.assertEqual(event.other, 1)
+        self.assertEqual(event.lookup(["data", "foo", "bar"]), "baz")
+        self.assertEqual(event.lookup("service"), "default")
+        self.assertEqual(event.get_properties()["custom"], "value")
+        self.assertEqual(event.get_properties()["meta_id"], event.meta_id)
+        with self.assertRaises(AttributeError):
+            event.get("missing")
+
+    def test_trace_is_not_a_property(self):
+        event = Event()
+        event.trace = [{"queue": "inbox", "enqueued": 0}]
+        self.assertNotIn("trace", event.get_properties())
+        self.assertEqual(event.convert(Event).trace, event.trace)
+
+    def test_event_id_is_immutable(self):
+        event = Event()
+        with self.assertRaises(InvalidEventDataModification):
+            event.event_id = "other"
+
+    def test_pickle_round_trip(self):
+        event = XMLHttpEvent(data="<root><foo>bar</foo></root>", custom="value")
+        restored = pickle.loads(pickle.dumps(event, pickle.HIGHEST_PROTOCOL))
+        self.assertEqual(restored.event_id, event.event_id)
+        self.assertEqual(restored.created, event.created)
+        self.assertEqual(restored.custom, "value")
+        self.assertEqual(restored.status, (200, "OK"))
+        self.assertEqual(restored.data_string(), event.data_string())
+
+    def test_convert_keeps_properties(self):
+        event = JSONEvent(data={"foo": "bar"}, custom="value")
+        converted = event.convert(XMLEvent)
+        self.assertEqual(converted.event_id, event.event_id)
+        self.assertEqual(converted.custom, "value")
+        self.assertEqual(converted.data.tag, "foo")
+
+    def test_log_event_formats_lazily(self):
+        event = LogEvent(20, "actor", "message", id="id")
+        self.assertNotIn("time", event.__dict__)
+        self.assertEqual(event.data["message"], "message")
+        self.assertEqual(event.data["time"], event.created.strftime('%Y-%m-%d %H:%M:%S,%f')[:-3])
+
+
+class TestDeferredParsing(unittest.TestCase):
+
+    RAW_JSON = '{"b": 1,   "a": [1, 2]}'
+    RAW_XML = '<root><foo   attr="1">bar</foo></root>'
+
+    def test_raw_data_is_emitted_verbatim(self):
+        for event in (JSONEvent(data=RawData(self.RAW_JSON)), XMLEvent(data=RawData(self.RAW_XML))):
+            self.assertTrue(event.is_raw())
+            self.assertEqual(event.data_string(), str(event._data))
+            self.assertEqual(event.__getstate__()['_data'], str(event._data))
+            self.assertTrue(event.is_raw())
+
+    def test_raw_data_is_parsed_on_access(self):
+        event = JSONEvent(data=RawData(self.RAW_JSON))
+        self.assertEqual(event.data, {"b": 1, "a": [1, 2]})
+        self.assertFalse(event.is_raw())
+        self.assertEqual(XMLEvent(data=RawData(self.RAW_XML)).data.find("foo").text, "bar")
+
+    def test_malformed_raw_data_raises_on_access(self):
+        event = JSONEvent(data=RawData("{not json"))
+        with self.assertRaises(InvalidEventDataModification):
+            event.data
+
+    def test_unpickled_data_is_deferred(self):
+        event = pickle.loads(pickle.dumps(JSONEvent(data={"foo": "bar"}), pickle.HIGHEST_PROTOCOL))
+        self.assertTrue(event.is_raw())
+        self.assertEqual(event.data, {"foo": "bar"})
+
+    def test_clones_share_raw_data(self):
+        event = JSONEvent(data=RawData(self.RAW_JSON))
+        clone = event.cow_clone()
+        clone.data["b"] = 2
+        self.assertTrue(event.is_raw())
+        self.assertEqual(event.data["b"], 1)
+
+
+class TestStreamData(unittest.TestCase):
+
+    RAW_XML = '<root><foo attr="1">bar</foo></root>'
+
+    def stream(self, data):
+        stream = tempfile.TemporaryFile()
+        stream.write(data)
+        return StreamData(stream)
+
+    def test_stream_is_emitted_verbatim(self):
+        event = XMLEvent(data=self.stream(self.RAW_XML))
+        self.assertTrue(event.is_raw())
+        self.assertIs(event.get_stream(), event._data)
+        self.assertEqual(event.data_string(), self.RAW_XML)
+        self.assertEqual(event.__getstate__()['_data'], self.RAW_XML)
+        self.assertTrue(event.is_raw())
+
+    def test_stream_is_parsed_on_access(self):
+        event = XMLEvent(data=self.stream(self.RAW_XML))
+        self.assertEqual(event.data.find("foo").get("attr"), "1")
+        self.assertIsNone(event.get_stream())
+        self.assertEqual(JSONEvent(data=self.stream('{"foo": "bar"}')).data, {"foo": "bar"})
+
+    def test_malformed_stream_raises_on_access(self):
+        event = XMLEvent(data=self.stream("<root>"))
+        with self.assertRaises(InvalidEventDataModification):
+            event.data
+
+    def test_chunks_are_independent_of_position(self):
+        stream = self.stream(self.RAW_XML)
+        chunks = stream.chunks(size=4)
+        first = next(chunks)
+        self.assertEqual(stream.read(), self.RAW_XML)
+        self.assertEqual(first + "".join(chunks), self.RAW_XML)
+        self.assertEqual(len(stream), len(self.RAW_XML))
+        self.assertEqual(stream.buffer()[:], self.RAW_XML)
+
+    def test_clones_share_stream(self):
+        event = XMLEvent(data=self.stream(self.RAW_XML))
+        clone = event.cow_clone()
+        clone.data.find("foo").text = "baz"
+        self.assertTrue(event.is_raw())
+        self.assertEqual(event.data.find("foo").text, "bar")
+
+
+class TestSerializationCache(unittest.TestCase):
+
+    def test_repeated_serialization_is_cached(self):
+        event = JSONEvent(data='{"foo": "bar"}')
+        first = event.data_string()
+        self.assertIs(event.data_string(), first)
+        self.assertEqual(event.__getstate__()['_data'], first)
+        self.assertIs(event.cow_clone().data_string(), first)
+
+    def test_cache_is_invalidated_by_assignment(self):
+        event = XMLEvent(data="<foo>bar</foo>")
+        event.data_string()
+        event.data = "<foo>baz</foo>"
+        self.assertEqual(event.data_string(), "<foo>baz</foo>")
+
+    def test_accessed_data_is_not_cached(self):
+        event = JSONEvent(data='{"foo": "bar"}')
+        data = event.data
+        self.assertEqual(event.data_string(), '{"foo": "bar"}')
+        data["foo"] = "baz"
+        self.assertEqual(event.data_string(), '{"foo": "baz"}')
+
+    def test_cache_is_not_pickled(self):
+        event = JSONEvent(data='{"foo": "bar"}')
+        event.data_string()
+        self.assertNotIn("_serialized", event.__getstate__())
+        self.assertNotIn("_serialized", event.get_properties())
+
+
+class _TextFormatInterface(DataFormatInterface):
+    conversion_methods = {str: lambda data: data, RawData: lambda data: data}
+
+
+class TextEvent(_TextFormatInterface, Event):
+    pass
+
+
+class TextHttpEvent(TextEvent, HttpEvent):
+    pass
+
+
+class TestEventConversion(unittest.TestCase):
+
+    def test_conversion_plan_is_cached(self):
+        event = JSONEvent(data={"foo": "bar"}).convert(XMLHttpEvent)
+        new_class, conversion = _conversion_plans[(JSONEvent, XMLHttpEvent, dict)]
+        self.assertIs(new_class, XMLHttpEvent)
+        self.assertIs(conversion, XMLHttpEvent.conversion_methods[dict])
+        self.assertEqual(JSONEvent(data={"foo": "baz"}).convert(XMLHttpEvent).data_string(), event.data_string().replace("bar", "baz"))
+        self.assertIsInstance(HttpEvent().convert(JSONEvent), JSONHttpEvent)
+
+    def test_conversion_keeps_raw_data_of_the_same_format(self):
+        event = JSONEvent(data=RawData('{"foo": "bar"}')).convert(JSONHttpEvent)
+        self.assertTrue(event.is_raw())
+        self.assertEqual(event.data, {"foo": "bar"})
+
+        event = JSONEvent(data=RawData('{"foo": "bar"}')).convert(XMLHttpEvent)
+        self.assertFalse(event.is_raw())
+        self.assertEqual(event.data.tag, "foo")
+
+    def test_conversion_keeps_shared_data_shared(self):
+        event = XMLEvent(data="<root><foo>bar</foo></root>")
+        converted = event.cow_clone().convert(XMLHttpEvent)
+        self.assertIs(converted._data, event._data)
+        converted.data.find("foo").text = "baz"
+        self.assertEqual(event.data.find("foo").text, "bar")
+        self.assertEqual(converted.data.find("foo").text, "baz")
+
+    def test_narrowing_conversion(self):
+        self.assertRaises(InvalidEventConversion, JSONHttpEvent().convert, HttpEvent)
+
+    def test_unregistered_class(self):
+        self.assertRaises(InvalidEventConversion, HttpEvent().convert, TextEvent)
+
+    def test_registered_class(self):
+        register_event_class(TextHttpEvent)
+        try:
+            event = HttpEvent(data="text").convert(TextEvent)
+            self.assertIsInstance(event, TextHttpEvent)
+            self.assertEqual(event.data, "text")
+        finally:
+            built_classes.remove(TextHttpEvent)
+            _conversion_plans.clear()
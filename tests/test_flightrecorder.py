@@ -0,0 +1,69 @@
+import unittest
+import logging
+
+from compysition.actors.null import Null
+from compysition.event import Event
+from compysition.flightrecorder import FlightRecorder
+from compysition.logger import Logger
+from compysition.queue import QueuePool
+
+
+class TestFlightRecorder(unittest.TestCase):
+
+    def setUp(self):
+        self.recorder = FlightRecorder(capacity=3, max_keys=2)
+        self.pool = QueuePool().logs
+        self.logger = Logger("actor", self.pool, recorder=self.recorder)
+
+    def sent(self):
+        queue = self.pool.values()[0]
+        return [queue.get() for _ in xrange(queue.qsize())]
+
+    def test_records_are_held_until_error(self):
+        self.logger.info("first", log_entry_id="a")
+        self.logger.debug("second", log_entry_id="a")
+        self.logger.info("other", log_entry_id="b")
+        self.logger.warning("warning", log_entry_id="a")
+        self.assertEqual([event.message for event in self.sent()], ["warning"])
+        self.assertEqual(len(self.recorder), 3)
+
+        self.logger.error("failed", log_entry_id="a")
+        sent = self.sent()
+        self.assertEqual([event.message for event in sent], ["first", "second", "failed"])
+        self.assertEqual([event.id for event in sent], ["a", "a", "a"])
+        self.assertTrue(sent[0].created <= sent[1].created <= sent[2].created)
+        self.assertEqual(len(self.recorder), 1)
+
+    def test_records_without_id_are_held_per_actor(self):
+        self.logger.info("started")
+        self.logger.error("failed")
+        self.assertEqual([event.message for event in self.sent()], ["started", "failed"])
+
+    def test_capacity(self):
+        for index in xrange(5):
+            self.logger.info(str(index), log_entry_id="a")
+        self.logger.release("a")
+        self.assertEqual([event.message for event in self.sent()], ["2", "3", "4"])
+
+    def test_oldest_id_is_discarded(self):
+        self.logger.info("a1", log_entry_id="a")
+        self.logger.info("b1", log_entry_id="b")
+        self.logger.release("a")
+        self.assertEqual([event.message for event in self.sent()], ["a1"])
+
+        # "b" is now the oldest id, as "a" was added again after it was released
+        self.logger.info("a2", log_entry_id="a")
+        self.logger.info("c1", log_entry_id="c")
+        for key in ("a", "b", "c"):
+            self.logger.release(key)
+        self.assertEqual([event.message for event in self.sent()], ["a2", "c1"])
+
+    def test_send_error_releases_records(self):
+        actor = Null("actor", flight_recorder=self.recorder)
+        event = Event(meta_id="a")
+        actor.logger.info("consumed", event=event)
+        queue = actor.pool.logs.values()[0]
+        self.assertEqual(queue.qsize(), 0)
+
+        actor.send_error(event)
+        self.assertEqual(queue.get().message, "consumed")
@@ -0,0 +1,130 @@
+import unittest
+import logging
+
+import gevent
+
+from compysition.actors.filelogger import FileLogger
+from compysition.actors.null import Null
+from compysition.logger import Logger, LogRateLimiter
+from compysition.queue import QueuePool
+
+
+class TestLogger(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = QueuePool().logs
+        self.logger = Logger("test", self.pool)
+
+    def messages(self):
+        queue = self.pool.values()[0]
+        return [queue.get().message for _ in xrange(queue.qsize())]
+
+    def test_records_below_sink_level_are_discarded(self):
+        self.logger.debug("kept")
+        self.logger.set_sink_level("sink", logging.INFO)
+        self.logger.debug("discarded")
+        self.logger.info("kept")
+        self.assertFalse(self.logger.is_enabled_for(logging.DEBUG))
+        self.assertTrue(self.logger.is_enabled_for(logging.ERROR))
+        self.assertEqual(self.messages(), ["kept", "kept"])
+
+    def test_effective_level_is_lowest_sink_level(self):
+        self.logger.set_sink_level("files", logging.WARNING)
+        self.logger.set_sink_level("stdout", logging.INFO)
+        self.assertEqual(self.logger.level, logging.INFO)
+        self.logger.set_sink_level("stdout", logging.ERROR)
+        self.assertEqual(self.logger.level, logging.WARNING)
+
+    def test_lazy_formatting(self):
+        calls = []
+
+        def expensive():
+            calls.append(True)
+            return "value"
+
+        self.logger.set_sink_level("sink", logging.INFO)
+        self.logger.debug("Discarded {data}", data=expensive)
+        self.assertEqual(calls, [])
+        self.logger.info("Kept {data} {count}", data=expensive, count=1)
+        self.assertEqual(calls, [True])
+        self.assertEqual(self.messages(), ["Kept value 1"])
+
+    def test_records_for_throttled_queue_are_dropped(self):
+        pool = QueuePool(size=10, high_watermark=2, low_watermark=1).logs
+        logger = Logger("test", pool)
+        queue = pool.values()[0]
+        for index in xrange(5):
+            logger.info(str(index))
+        self.assertEqual(logger.dropped, 3)
+
+        queue.get()
+        queue.get()
+        logger.info("resumed")
+        self.assertEqual([queue.get().message for _ in xrange(queue.qsize())],
+                         ["resumed", "Dropped 3 log records while log queue '{0}' was saturated".format(queue.name)])
+
+    def test_unformatted_message(self):
+        self.logger.info("Braces {are} kept")
+        self.assertEqual(self.messages(), ["Braces {are} kept"])
+
+
+class TestLogRateLimiter(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = QueuePool().logs
+
+    def messages(self):
+        queue = self.pool.values()[0]
+        return [queue.get().message for _ in xrange(queue.qsize())]
+
+    def test_burst_and_report(self):
+        limiter = LogRateLimiter(rate=0, burst=2, report_interval=3600)
+        logger = Logger("test", self.pool, limiter=limiter)
+        for index in xrange(5):
+            logger.warning("Invalid mimetype {accept}", accept=index)
+            logger.info("Other")
+        logger.error("Invalid mimetype {accept}", accept=5)
+
+        self.assertEqual(self.messages(), ["Invalid mimetype 0", "Other", "Invalid mimetype 1", "Other", "Invalid mimetype 5"])
+        limiter.report()
+        self.assertEqual(sorted(self.messages()), ["Suppressed 3 log records like: Invalid mimetype {accept}",
+                                                   "Suppressed 3 log records like: Other"])
+        limiter.report()
+        self.assertEqual(self.messages(), [])
+
+    def test_sampling(self):
+        limiter = LogRateLimiter(rate=0, burst=1, sample_every=3, report_interval=3600)
+        logger = Logger("test", self.pool, limiter=limiter)
+        for index in xrange(8):
+            logger.info("Record {index}", index=index)
+
+        self.assertEqual(self.messages(), ["Record 0", "Record 3", "Record 6"])
+
+    def test_periodic_report(self):
+        logger = Logger("test", self.pool, limiter=LogRateLimiter(rate=0, burst=0, report_interval=0.01))
+        logger.info("Record")
+        logger.info("Record")
+        self.assertEqual(self.messages(), [])
+        gevent.sleep(0.05)
+        self.assertEqual(self.messages(), ["Suppressed 2 log records like: Record"])
+
+    def test_refill(self):
+        limiter = LogRateLimiter(rate=1000, burst=1)
+        logger = Logger("test", self.pool, limiter=limiter)
+        logger.info("Record")
+        logger.info("Record")
+        gevent.sleep(0.01)
+        logger.info("Record")
+        self.assertEqual(len(self.messages()), 2)
+
+
+class TestSinkLevel(unittest.TestCase):
+
+    def test_sink_level_is_pushed_to_sources(self):
+        source = Null("source")
+        sink = FileLogger("sink", level="WARNING")
+        source.connect_log_queue(source_queue_name="logs", destination=sink, check_existing=False)
+        self.assertEqual(source.logger.level, logging.WARNING)
+
+        sink.set_log_level(logging.DEBUG)
+        self.assertEqual(source.logger.level, logging.DEBUG)
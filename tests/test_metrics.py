@@ -0,0 +1,75 @@
+import unittest
+
+import gevent
+
+from compysition.actor import Actor
+from compysition.event import Event
+from compysition.metrics import MetricsRegistry
+
+from compysition.testutils.test_actor import TestActorWrapper
+
+
+class TestMetricsRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_metrics_are_shared_by_name_and_labels(self):
+        counter = self.registry.counter("events_total", labels={"actor": "a"})
+        self.assertIs(self.registry.counter("events_total", labels={"actor": "a"}), counter)
+        self.assertIsNot(self.registry.counter("events_total", labels={"actor": "b"}), counter)
+        with self.assertRaises(TypeError):
+            self.registry.gauge("events_total", labels={"actor": "a"})
+
+    def test_histogram_buckets(self):
+        histogram = self.registry.histogram("duration_seconds", buckets=(0.1, 1))
+        for value in (0.05, 0.1, 0.5, 5):
+            histogram.observe(value)
+
+        self.assertEqual(histogram.counts, [2, 1, 1])
+        self.assertEqual(histogram.get(), 4)
+
+    def test_expose(self):
+        self.registry.counter("events_total", "Events", labels={"actor": "a"}).inc(3)
+        self.registry.gauge("depth", labels={"queue": 'say "hi"'}, function=lambda: 7)
+        self.registry.histogram("duration_seconds", buckets=(1, )).observe(0.5)
+        lines = self.registry.expose().splitlines()
+        self.assertIn("# HELP events_total Events", lines)
+        self.assertIn("# TYPE events_total counter", lines)
+        self.assertIn('events_total{actor="a"} 3.0', lines)
+        self.assertIn('depth{queue="say \\"hi\\""} 7.0', lines)
+        self.assertIn('duration_seconds_bucket{le="1"} 1.0', lines)
+        self.assertIn('duration_seconds_bucket{le="+Inf"} 1.0', lines)
+        self.assertIn('duration_seconds_count 1.0', lines)
+
+    def test_disabled_registry(self):
+        registry = MetricsRegistry(enabled=False)
+        registry.counter("events_total").inc()
+        registry.histogram("duration_seconds").observe(1)
+        self.assertEqual(registry.expose(), "\n")
+
+
+class FailingActor(Actor):
+
+    def consume(self, event, *args, **kwargs):
+        if event.data == "fail":
+            raise Exception("Failed")
+        self.send_event(event)
+
+
+class TestActorMetrics(unittest.TestCase):
+
+    def test_consume_and_send_metrics(self):
+        registry = MetricsRegistry()
+        actor = TestActorWrapper(FailingActor("failing", metrics=registry))
+        actor.input = Event(data="foo")
+        actor.output
+        actor.input = Event(data="fail")
+        actor.error
+        gevent.sleep(0)
+
+        exposed = registry.expose()
+        self.assertIn('compysition_events_consumed_total{actor="failing"} 2.0', exposed)
+        self.assertIn('compysition_consume_errors_total{actor="failing"} 1.0', exposed)
+        self.assertIn('compysition_events_sent_total{actor="failing",queue="outbox"} 1.0', exposed)
+        self.assertIn('compysition_consume_duration_seconds_count{actor="failing"} 2.0', exposed)
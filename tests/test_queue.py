@@ -0,0 +1,166 @@
+import os
+import unittest
+
+import gevent
+
+from compysition.errors import QueueEmpty, QueueFull
+from compysition.event import JSONEvent
+from compysition.queue import Queue, SpillQueue, PriorityLaneQueue
+
+
+class TestQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.queue = Queue("test")
+
+    def test_blocking_get_receives_later_put(self):
+        gevent.spawn_later(0.01, self.queue.put, "foo")
+        self.assertEqual(self.queue.get(timeout=1), "foo")
+
+    def test_get_timeout_raises_queue_empty(self):
+        with self.assertRaises(QueueEmpty):
+            self.queue.get(timeout=0.01)
+
+    def test_non_blocking_get_raises_queue_empty(self):
+        with self.assertRaises(QueueEmpty):
+            self.queue.get(block=False)
+
+    def test_full_queue_raises_queue_full(self):
+        queue = Queue("bounded", maxsize=1)
+        queue.put("foo")
+        with self.assertRaises(QueueFull):
+            queue.put("bar", block=False)
+
+    def test_wait_until_empty(self):
+        self.queue.put("foo")
+        gevent.spawn_later(0.01, self.queue.get)
+        self.queue.wait_until_empty(timeout=1)
+        self.assertEqual(self.queue.qsize(), 0)
+
+    def test_dump(self):
+        other = Queue("other")
+        for i in xrange(3):
+            self.queue.put(i)
+
+        self.queue.dump(other)
+        self.assertEqual(self.queue.qsize(), 0)
+        self.assertEqual([other.get(block=False) for i in xrange(3)], [0, 1, 2])
+
+
+class TestQueueWatermarks(unittest.TestCase):
+
+    def setUp(self):
+        self.queue = Queue("watermarked", maxsize=10, high_watermark=4, low_watermark=1)
+
+    def test_throttled_at_high_watermark(self):
+        for i in xrange(3):
+            self.queue.put(i)
+        self.assertFalse(self.queue.is_throttled())
+        self.queue.put(3)
+        self.assertTrue(self.queue.is_throttled())
+
+    def test_throttled_until_low_watermark(self):
+        for i in xrange(4):
+            self.queue.put(i)
+
+        self.queue.get()
+        self.queue.get()
+        self.assertTrue(self.queue.is_throttled())
+        self.queue.get()
+        self.assertFalse(self.queue.is_throttled())
+
+    def test_wait_until_free(self):
+        for i in xrange(4):
+            self.queue.put(i)
+
+        self.assertFalse(self.queue.wait_until_free(timeout=0.01))
+        gevent.spawn_later(0.01, lambda: [self.queue.get() for i in xrange(3)])
+        self.assertTrue(self.queue.wait_until_free(timeout=1))
+
+    def test_watermarks_default_to_maxsize(self):
+        queue = Queue("bounded", maxsize=10)
+        self.assertEqual((queue.high_watermark, queue.low_watermark), (10, 5))
+        self.assertIsNone(Queue("unbounded").high_watermark)
+
+
+class TestSpillQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.queue = SpillQueue("spill", memory_size=2, segment_size=64)
+
+    def tearDown(self):
+        self.queue.close()
+
+    def test_spills_overflow_in_fifo_order(self):
+        events = [JSONEvent(data={"index": i}) for i in xrange(10)]
+        for event in events:
+            self.queue.put(event)
+
+        self.assertEqual(self.queue.qsize(), 2)
+        self.assertEqual(self.queue.spilled(), 8)
+        self.assertTrue(len(os.listdir(self.queue.directory)) > 1)
+
+        outputs = [self.queue.get(block=False) for i in xrange(10)]
+        self.assertEqual([output.data for output in outputs], [event.data for event in events])
+        self.assertEqual([output.event_id for output in outputs], [event.event_id for event in events])
+        self.assertEqual(self.queue.spilled(), 0)
+        self.assertEqual(os.listdir(self.queue.directory), [])
+
+    def test_interleaved_put_and_get(self):
+        for i in xrange(5):
+            self.queue.put(i)
+
+        self.assertEqual(self.queue.get(), 0)
+        self.queue.put(5)
+        self.assertEqual([self.queue.get(block=False) for i in xrange(5)], [1, 2, 3, 4, 5])
+        self.assertTrue(self.queue.empty())
+
+    def test_record_larger_than_segment(self):
+        self.queue.put(1)
+        self.queue.put(2)
+        self.queue.put("x" * 1024)
+        self.assertEqual([self.queue.get(block=False) for i in xrange(3)], [1, 2, "x" * 1024])
+
+    def test_never_full(self):
+        for i in xrange(5):
+            self.queue.put(i, block=False)
+        self.assertFalse(self.queue.full())
+        self.assertFalse(self.queue.is_throttled())
+
+
+class TestPriorityLaneQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.queue = PriorityLaneQueue("test", lanes=2, weights=[3, 1])
+
+    def test_fifo_within_lane(self):
+        for i in xrange(3):
+            self.queue.put(JSONEvent(data={"i": i}, priority=0))
+
+        self.assertEqual([self.queue.get(block=False).data["i"] for i in xrange(3)], [0, 1, 2])
+
+    def test_weighted_fair_dequeue(self):
+        for i in xrange(8):
+            self.queue.put(JSONEvent(priority=1))
+            self.queue.put(JSONEvent(priority=0))
+
+        priorities = [self.queue.get(block=False).priority for i in xrange(8)]
+        self.assertEqual(priorities.count(0), 6)
+        self.assertEqual(priorities.count(1), 2)
+        self.assertEqual(self.queue.qsize(), 8)
+
+    def test_default_and_clamped_priority(self):
+        self.queue.put(JSONEvent())
+        self.queue.put(JSONEvent(priority=-5))
+        self.queue.put(JSONEvent(priority=10))
+        self.assertEqual(self.queue.lane_sizes(), [1, 2])
+
+    def test_peek_does_not_alter_schedule(self):
+        self.queue.put(JSONEvent(priority=1))
+        self.queue.put(JSONEvent(priority=0))
+        expected = self.queue.peek()
+        self.assertIs(self.queue.get(block=False), expected)
+
+    def test_invalid_weights(self):
+        with self.assertRaises(ValueError):
+            PriorityLaneQueue("invalid", lanes=3, weights=[1])
@@ -0,0 +1,46 @@
+import unittest
+from time import time
+
+import gevent
+
+from compysition.scheduler import RetryScheduler
+
+
+class TestRetryScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.scheduler = RetryScheduler(tick=0.01, slots=8)
+        self.fired = []
+
+    def tearDown(self):
+        self.scheduler.stop()
+
+    def test_timers_fire_in_order_of_delay(self):
+        self.scheduler.schedule(0.05, self.fired.append, args=("late", ))
+        self.scheduler.schedule(0.01, self.fired.append, args=("early", ))
+        gevent.sleep(0.1)
+        self.assertEqual(self.fired, ["early", "late"])
+
+    def test_timer_scheduled_mid_tick_does_not_fire_early(self):
+        self.scheduler.schedule(0.05, self.fired.append, args=("start", ))
+        for delay in (0.001, 0.003, 0.007, 0.012):
+            gevent.sleep(0.004)
+            self.scheduler.schedule(delay, lambda deadline: self.fired.append(time() >= deadline), args=(time() + delay, ))
+        gevent.sleep(0.1)
+        self.assertEqual(self.fired.count(True), 4)
+
+    def test_delay_longer_than_wheel(self):
+        self.scheduler.schedule(0.12, self.fired.append, args=("wrapped", ))
+        gevent.sleep(0.06)
+        self.assertEqual(self.fired, [])
+        gevent.sleep(0.12)
+        self.assertEqual(self.fired, ["wrapped"])
+
+    def test_pending_counts_by_owner(self):
+        self.scheduler.schedule(1, self.fired.append, args=(1, ), owner="one")
+        self.scheduler.schedule(1, self.fired.append, args=(2, ), owner="one")
+        self.scheduler.schedule(1, self.fired.append, args=(3, ), owner="two")
+        self.assertEqual(len(self.scheduler), 3)
+        self.assertEqual(self.scheduler.pending(owner="one"), 2)
+        self.assertEqual(self.scheduler.pending(owner="three"), 0)
+        self.assertEqual(sorted(timer[2] for timer in self.scheduler.timers(owner="one")), [(1, ), (2, )])
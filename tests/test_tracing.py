@@ -0,0 +1,85 @@
+import unittest
+import sys
+import time
+
+import gevent
+
+from compysition.actor import Actor
+from compysition.event import Event
+from compysition import tracing
+from compysition.tracing import Tracer, monotonic, summarize
+
+from compysition.testutils.test_actor import TestActorWrapper
+
+
+class ListExporter(object):
+
+    def __init__(self):
+        self.records = []
+
+    def export(self, record):
+        self.records.append(record)
+
+
+class Passthrough(Actor):
+
+    def consume(self, event, *args, **kwargs):
+        gevent.sleep(0.01)
+        self.send_event(event)
+
+
+class Terminal(Actor):
+
+    def consume(self, event, *args, **kwargs):
+        self.consumed = event
+
+
+class TestTracer(unittest.TestCase):
+
+    def test_monotonic(self):
+        first = monotonic()
+        gevent.sleep(0.01)
+        self.assertTrue(monotonic() - first >= 0.009)
+
+    @unittest.skipIf(not hasattr(tracing, "_time_monotonic"), "time.monotonic is available")
+    def test_monotonic_falls_back_on_unknown_platforms(self):
+        platform = sys.platform
+        sys.platform = "unknown"
+        try:
+            self.assertIs(tracing._time_monotonic(), time.time)
+        finally:
+            sys.platform = platform
+
+    def test_unsampled_events_are_not_traced(self):
+        actor = TestActorWrapper(Passthrough("passthrough", tracer=Tracer(sample_rate=0)))
+        actor.input = Event()
+        self.assertIs(actor.output.trace, False)
+
+    def test_hops_are_stamped_and_exported(self):
+        exporter = ListExporter()
+        tracer = Tracer(sample_rate=1, exporter=exporter)
+        first = TestActorWrapper(Passthrough("first", tracer=tracer))
+        second = TestActorWrapper(Passthrough("second", tracer=tracer))
+        terminal = TestActorWrapper(Terminal("terminal", tracer=tracer))
+
+        first.input = Event()
+        second.input = first.output
+        terminal.input = second.output
+        gevent.sleep(0.01)
+
+        self.assertEqual(len(exporter.records), 1)
+        hops = [hop for hop in exporter.records[0]["hops"] if "actor" in hop]
+        self.assertEqual([hop["actor"] for hop in hops], ["first", "second", "terminal"])
+        for hop in hops:
+            self.assertTrue(hop["enqueued"] <= hop["started"] <= hop["finished"])
+        self.assertTrue(hops[0]["finished"] - hops[0]["started"] >= 0.009)
+
+    def test_summarize(self):
+        records = [{"hops": [{"actor": "a", "enqueued": 0, "started": 1, "finished": 2},
+                             {"actor": "b", "enqueued": 2, "started": 2, "finished": 8}]},
+                   {"hops": [{"queue": "inbox", "enqueued": 0}]}]
+        summaries = summarize(records)
+        self.assertEqual([summary["actor"] for summary in summaries], ["b", "a"])
+        self.assertEqual(summaries[1]["wait"], 1)
+        self.assertEqual(summaries[0]["service"], 6)
+        self.assertAlmostEqual(summaries[0]["share"], 0.75)